@@ -1,29 +1,11 @@
-import pandas as pd
 import xgboost as xgb
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, roc_auc_score
+from dataset_builder import load_goal_windows
 
 # 1. 读取并排序数据
-df = pd.read_csv("train_data.csv")
-df = df.sort_values(by=["timestamp"]).reset_index(drop=True)
-
-# 2. 提取每次进球前 0.2 秒内的帧，统一打上进球时的 scorer 标签
-selected_rows = []
-goal_events = df[df["in_goal"] == 1]
-for _, goal_row in goal_events.iterrows():
-    goal_time = goal_row["timestamp"]
-    scorer = goal_row["scorer"] - 1  # 转成0/1标签，paddle1赢为1
-    # 修改：选取进球前 0.2 秒内的帧（不包括进球帧本身）
-    candidates = df[
-        (df["timestamp"] >= goal_time - 1.5) &
-        (df["timestamp"] < goal_time -1)
-    ]
-    for _, row in candidates.iterrows():
-        new_row = row.copy()
-        new_row["scorer"] = scorer
-        selected_rows.append(new_row)
-
-selected_df = pd.DataFrame(selected_rows)
+# 2. 提取每次进球前 1 ~ 1.5 秒内的帧，统一打上进球时的 scorer 标签（转成0/1，paddle1赢为1）
+selected_df = load_goal_windows("train_data.csv", before=1.5, after=1)
 
 # 3. 特征和标签
 features = [
@@ -0,0 +1,152 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+
+from tracking import (FieldDetector, TrackingEngine, HSVContourDetector, HybridDetector, GoalZone,
+                      RED_RANGES, RED_RANGES_STRICT, RED_BALL_RANGES, YELLOW_RANGES, BLUE_RANGES,
+                      YELLOW_RANGES_NARROW, state_row)
+from recorder import FrameRecorder
+from schema import FRAME_COLUMNS
+
+# data.py 只在这些列都不为空时写入
+DATA_MUST_HAVE = ["ball_u", "ball_speed", "ball_angle",
+                  "paddle1_u", "paddle1_speed", "paddle1_angle",
+                  "paddle2_u", "paddle2_speed", "paddle2_angle"]
+
+# 与各实时脚本一致的追踪配置：角点模式、画面旋转（只用于检测角点）、检测器、进球判定、
+# 只保存完整行（True 为所有列，列表为指定列）
+PROFILES = {
+    "monitor": {"corner_mode": "gray", "complete_only": False},
+    "record": {"corner_mode": "gray", "complete_only": False},
+    "cv": {"corner_mode": "fixed", "complete_only": True},
+    "data": {"corner_mode": "margin", "rotate": cv2.ROTATE_90_COUNTERCLOCKWISE, "complete_only": DATA_MUST_HAVE},
+}
+
+
+def make_engine(profile, corners):
+    if profile == "monitor":
+        return TrackingEngine(corners, HSVContourDetector(RED_RANGES, YELLOW_RANGES, split_axis=1),
+                              goal_zone=GoalZone(axis=1, band=(0.3, 0.7), edge=0.05, cooldown=3))
+    if profile == "record":
+        return TrackingEngine(corners, HSVContourDetector(RED_RANGES_STRICT),
+                              goal_zone=GoalZone(axis=1, band=(0.3, 0.7), edge=0.05, cooldown=0.5))
+    if profile == "data":
+        # 蓝色球（半径60~100像素）+ 黄色拍子（按 u 分左右半场）
+        return TrackingEngine(corners,
+                              HSVContourDetector(BLUE_RANGES, YELLOW_RANGES_NARROW, split_axis=0,
+                                                 ball_min_radius=60, ball_max_radius=100),
+                              goal_zone=GoalZone(axis=0, band=(0.3, 0.7), edge=0.05, cooldown=2))
+
+    import mediapipe as mp
+    hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=4, min_detection_confidence=0.06,
+                                     min_tracking_confidence=0.06, model_complexity=0)
+    # 离线处理不受帧预算限制：每帧都运行手部模型，结果与处理速度无关
+    return TrackingEngine(corners, HybridDetector(hands, ball_ranges=RED_BALL_RANGES, frame_budget=float("inf")))
+
+
+def detect_corners(video, profile):
+    field = FieldDetector(video, corner_mode=PROFILES[profile]["corner_mode"], rotate=PROFILES[profile].get("rotate"))
+    field.detect_field()
+    corners = field.corner_points
+    fps = field.cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total = int(field.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    field.cap.release()
+    if corners is None:
+        raise RuntimeError(f"{video}: 未检测到球场角点")
+    if total <= 0:
+        raise RuntimeError(f"{video}: 无法获取总帧数（CAP_PROP_FRAME_COUNT = {total}），不能切分片段")
+    return corners, fps, total
+
+
+def seek(cap, frame_idx):
+    """定位到 frame_idx；部分编码格式按帧号跳转不准确，此时从头逐帧 grab"""
+    if frame_idx == 0:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_idx:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(frame_idx):
+        cap.grab()
+
+
+def track_segment(video, profile, corners, fps, start, end, warmup, game_id):
+    """处理 [start, end) 帧。先从 start - warmup 开始预热滤波器与进球冷却，预热帧的输出丢弃。
+    时间戳为 帧号 / fps，保证各段拼接后连续。"""
+    cap = cv2.VideoCapture(video)
+    first = max(start - warmup, 0)
+    seek(cap, first)
+
+    engine = make_engine(profile, corners)
+    engine.set_game_state(game_id=game_id)
+    complete_only = PROFILES[profile]["complete_only"]
+    if complete_only is True:
+        required = list(range(len(FRAME_COLUMNS)))
+    else:
+        required = [FRAME_COLUMNS.index(c) for c in complete_only or []]
+    rows = []
+    for idx in range(first, end):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        state = engine.process(frame, timestamp=idx / fps)
+        if idx < start:
+            continue
+        row = state_row(state)
+        if any(row[k] is None for k in required):
+            continue
+        rows.append(row)
+    cap.release()
+    return rows
+
+
+def split_segments(total, segment_frames):
+    return [(s, min(s + segment_frames, total)) for s in range(0, total, segment_frames)]
+
+
+def batch_track(videos, output, profile="monitor", workers=None, segment_sec=60.0, warmup=90, fmt="npz"):
+    """把每个视频切成 segment_sec 秒的片段并行追踪，按时间顺序合并写入 output。
+    output 以 .csv 结尾时写单个 CSV，否则写 FrameRecorder 分片目录（fmt 格式）。
+    每个视频对应一个 game_id（从 1 开始）。"""
+    jobs = []
+    for game_id, video in enumerate(videos, start=1):
+        corners, fps, total = detect_corners(video, profile)
+        for start, end in split_segments(total, max(int(segment_sec * fps), 1)):
+            jobs.append((video, profile, corners, fps, start, end, warmup, game_id))
+        print(f"{video}: {total} 帧, {fps:.1f} FPS")
+
+    start_time = time.time()
+    n_rows = 0
+    recorder = FrameRecorder(output, fmt=fmt)
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        futures = [pool.submit(track_segment, *job) for job in jobs]
+        # 按提交顺序取结果，即按 (视频, 起始帧) 排序
+        for job, future in zip(jobs, futures):
+            rows = future.result()
+            for row in rows:
+                recorder.append_row(row)
+            n_rows += len(rows)
+            print(f"  {os.path.basename(job[0])} 帧 {job[4]}-{job[5]}: {len(rows)} 行")
+    recorder.close()
+    print(f"共 {len(jobs)} 个片段, {n_rows} 行, 用时 {time.time() - start_time:.1f}s -> {output}")
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线多进程追踪录制好的比赛视频")
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("-o", "--output", default="tracking_data_batch.csv", help="CSV 文件或分片目录")
+    parser.add_argument("--format", default="npz", choices=["npz", "parquet", "csv"], help="分片目录的文件格式")
+    parser.add_argument("--profile", default="monitor", choices=list(PROFILES))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--segment-sec", type=float, default=60.0)
+    parser.add_argument("--warmup", type=int, default=90, help="每段开始前预热的帧数")
+    args = parser.parse_args()
+    batch_track(args.videos, args.output, args.profile, args.workers, args.segment_sec, args.warmup, args.format)
+
+
+if __name__ == "__main__":
+    main()
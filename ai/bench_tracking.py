@@ -0,0 +1,70 @@
+import argparse
+import time
+
+import cv2
+
+from tracking import (FieldDetector, TrackingEngine, HSVContourDetector, HandLandmarkDetector, HybridDetector,
+                      GoalZone, RED_RANGES, RED_BALL_RANGES, YELLOW_RANGES)
+
+
+def make_detector(strategy):
+    if strategy == "hsv":
+        return HSVContourDetector(RED_RANGES, YELLOW_RANGES, split_axis=1)
+
+    import mediapipe as mp
+    hands = mp.solutions.hands.Hands(static_image_mode=False, max_num_hands=2,
+                                     min_detection_confidence=0.7, min_tracking_confidence=0.5)
+    if strategy == "hands":
+        return HandLandmarkDetector(hands)
+    return HybridDetector(hands, ball_ranges=RED_BALL_RANGES)
+
+
+def run(video, strategy, corner_mode, max_frames):
+    """不显示画面，按视频帧号计时间戳，逐帧跑完整个追踪流程"""
+    field = FieldDetector(video, corner_mode=corner_mode)
+    frame = field.detect_field()
+    if frame is None or field.corner_points is None:
+        field.cap.release()
+        raise RuntimeError(f"{video}: 未检测到球场")
+    fps = field.cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    engine = TrackingEngine(field.corner_points, make_detector(strategy), goal_zone=GoalZone(axis=1))
+    n = 0
+    start = time.perf_counter()
+    while frame is not None and (max_frames is None or n < max_frames):
+        engine.process(frame, timestamp=n / fps)
+        n += 1
+        ret, frame = field.cap.read()
+        if not ret:
+            break
+    elapsed = time.perf_counter() - start
+    field.cap.release()
+
+    report = engine.stage_report()
+    report["frames"] = n
+    report["fps"] = n / elapsed if elapsed > 0 else 0.0
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="比较不同检测策略的追踪速度与检测率")
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--strategies", default="hsv,hands,hybrid")
+    parser.add_argument("--corner-mode", default="fixed", choices=["fixed", "margin", "gray"])
+    parser.add_argument("--max-frames", type=int, default=None)
+    args = parser.parse_args()
+
+    for video in args.videos:
+        for strategy in args.strategies.split(","):
+            try:
+                report = run(video, strategy, args.corner_mode, args.max_frames)
+            except ImportError:
+                print(f"[{strategy}] 未安装 mediapipe，跳过")
+                continue
+            stages = "  ".join(f"{k}={v:.2f}" for k, v in report.items() if k.endswith("_ms"))
+            rates = "  ".join(f"{k}={v:.0%}" for k, v in report.items() if k.endswith("_rate"))
+            print(f"{video} [{strategy}] {report['frames']} 帧  {report['fps']:.1f} FPS  {stages}  {rates}")
+
+
+if __name__ == "__main__":
+    main()
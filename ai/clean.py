@@ -1,16 +1,11 @@
-import pandas as pd
+import sys
 
-# 读取CSV
-df = pd.read_csv("tracking_data1.csv")
+from consolidate import main
 
-# 查看哪些列有空值
-print(df.isnull().sum())
-
-# 删除含有空值的行
-df_clean = df.dropna()
-
-# 如果空值是空字符串，也可以用：
-# df_clean = df[(df != '').all(axis=1)]
-
-# 保存到新的CSV文件
-df_clean.to_csv("tracking_data_clean.csv", index=False)
+if __name__ == "__main__":
+    # 分块读取，打印每列空值数量并删除含有空值的行：
+    # python clean.py（默认 tracking_data1.csv -> tracking_data_clean.csv）
+    # python clean.py a.csv b.csv -o clean --format parquet
+    if len(sys.argv) == 1:
+        sys.argv += ["tracking_data1.csv", "-o", "tracking_data_clean.csv"]
+    main(defaults={"dropna": True})
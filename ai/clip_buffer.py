@@ -0,0 +1,183 @@
+import queue
+import threading
+
+import cv2
+import numpy as np
+
+
+class ClipFrames:
+    """从 FrameRing 取下的一段帧（按时间先后），引用原存储不做拷贝；编码完后调用 release() 归还存储"""
+
+    def __init__(self, ring, storage, start, count):
+        self.ring = ring
+        self.storage = storage
+        self.start = start
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        capacity = len(self.storage)
+        for k in range(self.count):
+            yield self.storage[(self.start + k) % capacity]
+
+    @property
+    def frame_size(self):
+        h, w = self.storage.shape[1:3]
+        return w, h
+
+    def release(self):
+        if self.storage is not None:
+            self.ring.recycle(self.storage)
+            self.storage = None
+
+
+class FrameRing:
+    """预分配的帧环形缓冲：cap.read 直接解码到下一个槽位，不再逐帧 copy / pop(0)。
+
+    进球时 detach() 把整块存储交给编码线程，缓冲换用备用存储继续写入，
+    追踪循环无需等待编码完成。存储在第一帧到来时按画面尺寸分配。
+    """
+
+    def __init__(self, capacity, max_spares=2):
+        self.capacity = capacity
+        self.max_spares = max_spares
+        self.storage = None
+        self.spares = []
+        self.lock = threading.Lock()
+        self.write_idx = 0  # 当前存储累计写入的帧数
+
+    def __len__(self):
+        return min(self.write_idx, self.capacity)
+
+    def _allocate(self, frame):
+        with self.lock:
+            for k, spare in enumerate(self.spares):
+                if spare.shape[1:] == frame.shape and spare.dtype == frame.dtype:
+                    return self.spares.pop(k)
+        return np.empty((self.capacity,) + frame.shape, dtype=frame.dtype)
+
+    def read(self, cap):
+        """从 cap 读一帧到下一个槽位，返回 (ret, frame)；frame 是槽位本身，调用方不要在上面绘制"""
+        if self.storage is None:
+            ret, frame = cap.read()
+            if not ret:
+                return ret, frame
+            self.storage = self._allocate(frame)
+            self.write_idx = 0
+            slot = self.storage[0]
+            slot[...] = frame
+        else:
+            slot = self.storage[self.write_idx % self.capacity]
+            ret, frame = cap.read(slot)
+            if not ret:
+                return ret, frame
+            if frame is not slot and not np.shares_memory(frame, slot):
+                # 画面尺寸变化等情况下 OpenCV 会重新分配，退回拷贝
+                if frame.shape != slot.shape:
+                    self.storage = self._allocate(frame)
+                    self.write_idx = 0
+                    slot = self.storage[0]
+                slot[...] = frame
+        self.write_idx += 1
+        return ret, slot
+
+    def detach(self):
+        """取下缓冲中的全部帧（最旧 -> 最新），之后的帧写入新的存储"""
+        if self.storage is None or self.write_idx == 0:
+            return None
+        count = len(self)
+        clip = ClipFrames(self, self.storage, (self.write_idx - count) % self.capacity, count)
+        self.storage = None
+        return clip
+
+    def recycle(self, storage):
+        with self.lock:
+            if len(self.spares) < self.max_spares:
+                self.spares.append(storage)
+
+
+class ClipEncoder:
+    """后台线程编码进球片段（OpenCV 编码时会释放 GIL）"""
+
+    def __init__(self, fourcc="mp4v"):
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, filename, clip, fps):
+        if clip is None or len(clip) == 0:
+            return
+        self.jobs.put((filename, clip, fps))
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            filename, clip, fps = job
+            try:
+                out = cv2.VideoWriter(filename, self.fourcc, fps, clip.frame_size)
+                for frame in clip:
+                    out.write(frame)
+                out.release()
+                print(f"Saved goal clip to {filename}")
+            except Exception as e:
+                print(f"保存进球片段失败 {filename}: {e}")
+            finally:
+                clip.release()
+
+    def close(self):
+        """等待已提交的片段全部写完"""
+        self.jobs.put(None)
+        self.thread.join()
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # 对比：逐帧 copy + list.pop(0) + 同步编码 vs 环形缓冲 + 后台编码（每 goal_every 帧触发一次进球）
+    video, goal_every = sys.argv[1], 150
+    cap = cv2.VideoCapture(video)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    buffer_len = int(fps * 3)
+
+    buffer, worst, n = [], 0.0, 0
+    start = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        ret, frame = cap.read()
+        if not ret:
+            break
+        buffer.append(frame.copy())
+        if len(buffer) > buffer_len:
+            buffer.pop(0)
+        n += 1
+        if n % goal_every == 0:
+            h, w = buffer[0].shape[:2]
+            out = cv2.VideoWriter("/tmp/clip_sync.mp4", cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+            for f in buffer:
+                out.write(f)
+            out.release()
+        worst = max(worst, time.perf_counter() - t0)
+    print(f"list + 同步编码: {n / (time.perf_counter() - start):.1f} FPS, 最长单帧 {worst * 1000:.1f} ms")
+
+    cap = cv2.VideoCapture(video)
+    ring, encoder = FrameRing(buffer_len), ClipEncoder()
+    worst, n = 0.0, 0
+    start = time.perf_counter()
+    while True:
+        t0 = time.perf_counter()
+        ret, frame = ring.read(cap)
+        if not ret:
+            break
+        n += 1
+        if n % goal_every == 0:
+            encoder.submit(f"/tmp/clip_ring_{n}.mp4", ring.detach(), fps)
+        worst = max(worst, time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    encoder.close()
+    print(f"环形缓冲 + 后台编码: {n / elapsed:.1f} FPS, 最长单帧 {worst * 1000:.1f} ms")
@@ -0,0 +1,256 @@
+import argparse
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from recorder import FrameRecorder, _read_part
+from schema import normalize_columns
+
+
+def iter_chunks(path, chunksize=100000):
+    """逐块读取一个输入：CSV 文件按 chunksize 行读取，FrameRecorder 分片目录按分片读取。
+
+    所有列按 float64 读取（整数列可能含缺失值），写出时由 FrameRecorder 把 INT_COLUMNS 转回整数。
+    """
+    if os.path.isdir(path):
+        manifests = []
+        for root, _, files in os.walk(path):
+            if "manifest.json" in files:
+                with open(os.path.join(root, "manifest.json"), encoding="utf-8") as f:
+                    manifests.append((root, json.load(f)))
+        # 各分区（回合）按开始时间排列，而不是按目录名（round10 会排在 round2 前面）
+        manifests = [m for m in manifests if m[1]["parts"]]
+        manifests.sort(key=lambda m: (m[1]["parts"][0]["t_start"] is None, m[1]["parts"][0]["t_start"] or 0))
+        for part_dir, manifest in manifests:
+            for part in manifest["parts"]:
+                df = _read_part(os.path.join(part_dir, part["file"]), manifest["format"])
+                yield normalize_columns(df[manifest["columns"]]).astype(np.float64)
+        return
+
+    header = pd.read_csv(path, nrows=0).columns
+    dtypes = {c: np.float64 for c in header}
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=dtypes):
+        yield normalize_columns(chunk)
+
+
+class _Source:
+    """一个按 timestamp 升序的输入及其当前缓冲块"""
+
+    def __init__(self, index, path, columns, chunksize, dropna):
+        self.index = index
+        self.path = path
+        self.columns = columns
+        self.chunks = iter_chunks(path, chunksize)
+        self.dropna = dropna
+        self.rows_in = 0
+        self.rows_dropped = 0
+        self.nulls = None
+        self.last_ts = -np.inf
+        self.block = None  # {列名: 数组}
+        self.pos = 0
+
+    def remaining(self):
+        return 0 if self.block is None else len(self.block["timestamp"]) - self.pos
+
+    def refill(self):
+        """读取下一个非空块，没有更多数据时返回 False"""
+        for chunk in self.chunks:
+            missing = [c for c in self.columns if c not in chunk.columns]
+            if missing:
+                raise ValueError(f"{self.path} 缺少列: {missing}")
+            chunk = chunk[self.columns]
+            nulls = chunk.isna().sum()
+            self.nulls = nulls if self.nulls is None else self.nulls + nulls
+            self.rows_in += len(chunk)
+            if self.dropna:
+                kept = chunk.dropna()
+                self.rows_dropped += len(chunk) - len(kept)
+                chunk = kept
+            if len(chunk) == 0:
+                continue
+
+            ts = chunk["timestamp"].to_numpy()
+            if ts[0] < self.last_ts or np.any(np.diff(ts) < 0):
+                raise ValueError(f"{self.path} 不是按 timestamp 升序排列，无法流式归并")
+            self.last_ts = ts[-1]
+            self.block = {c: chunk[c].to_numpy() for c in self.columns}
+            self.pos = 0
+            return True
+        self.block = None
+        return False
+
+    def head(self):
+        return self.block["timestamp"][self.pos]
+
+    def tail(self):
+        return self.block["timestamp"][-1]
+
+    def take_until(self, bound):
+        """取出当前块中 timestamp <= bound 的行"""
+        end = np.searchsorted(self.block["timestamp"], bound, side="right")
+        part = {c: v[self.pos:end] for c, v in self.block.items()}
+        self.pos = end
+        return part
+
+
+def open_sources(paths, columns, chunksize=100000, dropna=False):
+    return [_Source(k, p, columns, chunksize, dropna) for k, p in enumerate(paths)]
+
+
+def merge_sources(sources):
+    """按 timestamp 对多个各自有序的输入做 k 路归并，逐块产出 {列名: 数组}。
+
+    内存中最多同时保留每个输入的一个块。时间戳相同时按输入顺序排列（与 concat 后稳定排序相同）。
+    """
+    columns = sources[0].columns
+    active = [s for s in sources if s.refill()]
+    while active:
+        # 各输入未读部分都不早于其当前块的末尾，因此 <= 最小块末尾的行可以安全输出
+        bound = min(s.tail() for s in active)
+        parts = [(s.index, s.take_until(bound)) for s in active if s.head() <= bound]
+        if len(parts) == 1:
+            block = parts[0][1]
+        else:
+            block = {c: np.concatenate([p[c] for _, p in parts]) for c in columns}
+            source = np.concatenate([np.full(len(p["timestamp"]), k) for k, p in parts])
+            order = np.lexsort((source, block["timestamp"]))
+            block = {c: v[order] for c, v in block.items()}
+        yield block
+        active = [s for s in active if s.remaining() > 0 or s.refill()]
+
+
+def read_columns(path):
+    for chunk in iter_chunks(path, 1):
+        return list(chunk.columns)
+    raise ValueError(f"{path} 中没有数据")
+
+
+def consolidate(paths, output, fmt="npz", chunksize=100000, dropna=False, partition_by=(),
+                block_rows=65536):
+    """把多个录制文件归并为一个按时间排序的输出（.csv 文件或分片目录），返回写出的行数"""
+    columns = read_columns(paths[0])
+    sources = open_sources(paths, columns, chunksize, dropna)
+    recorder = FrameRecorder(output, fmt=fmt, columns=columns, block_rows=block_rows, rotate_by=partition_by,
+                             max_pending=2)
+    start = time.time()
+    n_rows = 0
+    try:
+        for block in merge_sources(sources):
+            recorder.append_block(block)
+            n_rows += len(block["timestamp"])
+    finally:
+        recorder.close()
+
+    nulls = sum((s.nulls for s in sources if s.nulls is not None), pd.Series(0, index=columns))
+    print("各列空值数量：")
+    print(nulls.to_string())
+    print(pd.DataFrame({
+        "file": [s.path for s in sources],
+        "rows": [s.rows_in for s in sources],
+        "dropped": [s.rows_dropped for s in sources],
+    }).to_string(index=False))
+    print(f"✅ 合并完成，共 {n_rows} 行，用时 {time.time() - start:.1f}s -> {output}")
+    return n_rows
+
+
+def expand_inputs(inputs, exclude=()):
+    """展开目录（其中的 *.csv）与通配符，排除输出文件本身"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item) and glob.glob(os.path.join(item, "*.csv")):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.csv"))))
+        elif any(ch in item for ch in "*?["):
+            paths.extend(sorted(glob.glob(item)))
+        else:
+            paths.append(item)
+    excluded = {os.path.abspath(p) for p in exclude}
+    return [p for p in paths if os.path.abspath(p) not in excluded]
+
+
+def build_parser(description="流式合并 / 清洗逐帧 CSV：按 timestamp k 路归并，分块读取，内存占用有界"):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("inputs", nargs="+", help="CSV 文件、通配符、含 CSV 的文件夹或 FrameRecorder 分片目录")
+    parser.add_argument("-o", "--output", default="combined_data", help="以 .csv 结尾时写单个 CSV，否则写分片目录")
+    parser.add_argument("--format", default="npz", choices=["npz", "parquet", "csv"], help="分片目录的文件格式")
+    parser.add_argument("--dropna", action="store_true", help="删除含有空值的行")
+    parser.add_argument("--chunksize", type=int, default=100000, help="每次从每个输入读取的行数")
+    parser.add_argument("--partition-by", default="", help="按列分子目录，如 game_id 或 game_id,round_id")
+    return parser
+
+
+def main(argv=None, defaults=None):
+    parser = build_parser()
+    if defaults:
+        parser.set_defaults(**defaults)
+    args = parser.parse_args(argv)
+    paths = expand_inputs(args.inputs, exclude=[args.output])
+    if not paths:
+        parser.error("没有找到输入文件")
+    partition_by = tuple(c for c in args.partition_by.split(",") if c)
+    consolidate(paths, args.output, args.format, args.chunksize, args.dropna, partition_by)
+
+
+def benchmark(n_files=4, rows=50000, chunksize=10000):
+    """与原 merge.py + clean.py（整表读入、concat、sort、dropna）对比结果、耗时与峰值内存"""
+    import shutil
+    import tempfile
+    import tracemalloc
+
+    from recorder import load_recording
+    from schema import FRAME_COLUMNS
+
+    rng = np.random.default_rng(0)
+    out = tempfile.mkdtemp()
+    paths = []
+    for k in range(n_files):
+        df = pd.DataFrame(rng.random((rows, len(FRAME_COLUMNS))), columns=FRAME_COLUMNS)
+        df["timestamp"] = np.sort(rng.uniform(0, rows / 30, rows)).round(3)  # 各文件时间交错、有重复
+        df.loc[rng.random(rows) < 0.03, "ball_u"] = np.nan
+        for c in ["in_goal", "scorer", "round_id", "game_id"]:
+            df[c] = rng.integers(0, 3, rows)
+        paths.append(os.path.join(out, f"part{k}.csv"))
+        df.to_csv(paths[-1], index=False)
+
+    def measure(run):
+        """返回 (耗时, 峰值内存)；tracemalloc 会拖慢 pandas，两者分开测"""
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return elapsed, peak
+
+    def in_memory(target):
+        # 原 merge.py + clean.py：整表读入、concat、sort、dropna 后写出
+        df = pd.concat([pd.read_csv(p) for p in paths], ignore_index=True)
+        df = df.sort_values(by="timestamp", kind="stable").reset_index(drop=True).dropna()
+        df.to_csv(target, index=False)
+        return df
+
+    expected = in_memory(os.path.join(out, "in_memory.csv"))
+    t_old, mem_old = measure(lambda: in_memory(os.path.join(out, "in_memory.csv")))
+    print(f"整表：{t_old:.1f}s，峰值 {mem_old / 2**20:.0f} MB")
+
+    for output in ["merged.csv", "merged"]:
+        target = os.path.join(out, output)
+        t_new, mem_new = measure(lambda: consolidate(paths, target, chunksize=chunksize, dropna=True))
+        result = load_recording(target) if output.endswith(".csv") else pd.concat(
+            list(iter_chunks(target)), ignore_index=True)
+        pd.testing.assert_frame_equal(result, expected.reset_index(drop=True), check_dtype=False)
+        print(f"流式 -> {output}：{len(result)} 行结果一致，{t_new:.1f}s，峰值 {mem_new / 2**20:.0f} MB")
+    shutil.rmtree(out)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["--benchmark"]:
+        benchmark()
+    else:
+        main()
@@ -1,27 +1,16 @@
-import pandas as pd
 import os
-import glob
+import sys
 
-# 设置你的 CSV 文件所在文件夹路径
-csv_folder = r"C:\Users\cxlou\Desktop\SWS-AIoT-Project\ai\csv"
- # ← 修改为你的实际路径
+# 合并逻辑在 ai/consolidate.py：分块读取、按 timestamp k 路归并，内存占用与文件总大小无关
+AI_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, AI_DIR)
 
-# 查找所有 CSV 文件
-csv_files = glob.glob(os.path.join(csv_folder, "*.csv"))
+from consolidate import main
 
-# 读取并合并所有 CSV
-df_list = []
-for file in csv_files:
-    df = pd.read_csv(file)
-    df_list.append(df)
-
-# 合并为一个 DataFrame
-combined_df = pd.concat(df_list, ignore_index=True)
-
-# 按照时间排序（可选）
-combined_df = combined_df.sort_values(by="timestamp").reset_index(drop=True)
-
-# 保存为新的 CSV（可选）
-combined_df.to_csv("combined_data.csv", index=False)
-
-print(f"✅ 合并完成，总共有 {len(combined_df)} 行数据。")
+if __name__ == "__main__":
+    # 默认合并本文件夹下所有 CSV 到 combined_data.csv；也可以指定输入与输出，
+    # 如 python merge.py a.csv b.csv -o combined --format parquet --partition-by game_id
+    csv_folder = os.path.dirname(os.path.abspath(__file__))
+    if len(sys.argv) == 1:
+        sys.argv += [csv_folder, "-o", "combined_data.csv"]
+    main()
@@ -1,30 +1,15 @@
-import pandas as pd
 import torch
 import torch.nn as nn
 import torch.optim as optim
 from torch.utils.data import TensorDataset, DataLoader
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, roc_auc_score
+from model import MLP
+from dataset_builder import load_goal_windows
 
 # 1. 读取并排序数据
-df = pd.read_csv("train_data.csv")
-df = df.sort_values(by=["timestamp"]).reset_index(drop=True)
-
-# 2. 提取每次进球前0.2秒内帧，给标签
-selected_rows = []
-goal_events = df[df["in_goal"] == 1]
-for _, goal_row in goal_events.iterrows():
-    goal_time = goal_row["timestamp"]
-    scorer = goal_row["scorer"]-1  # 转成0/1标签，paddle1赢为1
-    candidates = df[
-        (df["timestamp"] < goal_time-0.2) &
-        (df["timestamp"] >= goal_time - 0.4)
-    ]
-    for _, row in candidates.iterrows():
-        new_row = row.copy()
-        new_row["scorer"] = scorer
-        selected_rows.append(new_row)
-selected_df = pd.DataFrame(selected_rows)
+# 2. 提取每次进球前 0.2 ~ 0.4 秒内帧，给标签（scorer 转成0/1，paddle1赢为1）
+selected_df = load_goal_windows("train_data.csv", before=0.4, after=0.2)
 
 # 3. 特征和标签
 features = [
@@ -51,23 +36,7 @@ val_dataset = TensorDataset(X_val_tensor, y_val_tensor)
 train_loader = DataLoader(train_dataset, batch_size=batch_size, shuffle=True)
 val_loader = DataLoader(val_dataset, batch_size=batch_size)
 
-# 6. 定义MLP模型
-class MLP(nn.Module):
-    def __init__(self, input_dim):
-        super().__init__()
-        self.net = nn.Sequential(
-            nn.Linear(input_dim, 64),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(64, 32),
-            nn.ReLU(),
-            nn.Dropout(0.3),
-            nn.Linear(32, 1),
-            nn.Sigmoid()
-        )
-    def forward(self, x):
-        return self.net(x)
-
+# 6. 定义MLP模型（见 model.py）
 model = MLP(input_dim=X.shape[1])
 criterion = nn.BCELoss()
 optimizer = optim.Adam(model.parameters(), lr=1e-3)
@@ -111,4 +80,6 @@ with torch.no_grad():
 
 val_df = selected_df.iloc[len(y_train):].copy()
 
-
+# 9. 保存模型（可用 export_models.py 导出为 TorchScript / int8）
+torch.save(model.state_dict(), "mlp_model.pt")
+print("模型已保存到: mlp_model.pt")
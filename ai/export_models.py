@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import time
+import warnings
+
+import torch
+import torch.nn as nn
+
+from model import LSTMClassifier, MLP
+
+# 导出的几种推理方式：eager(float32) / int8(动态量化) / 二者的 TorchScript 版本
+BACKENDS = ["eager", "int8", "torchscript", "torchscript_int8"]
+# 需要直接调用 .lstm / .fc 子模块（流式推理）时只能用 eager 模块
+STREAMING_BACKENDS = ["eager", "int8"]
+
+
+def quantize(model):
+    """对 nn.LSTM / nn.Linear 做动态 int8 量化（权重 int8，激活在运行时量化）"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # 只屏蔽 quantize_dynamic 的弃用提示
+        return torch.ao.quantization.quantize_dynamic(model, {nn.LSTM, nn.Linear}, dtype=torch.qint8)
+
+
+def build_lstm(state_dict_path, input_size, hidden_size=64, num_layers=1, num_classes=2):
+    model = LSTMClassifier(input_size=input_size, hidden_size=hidden_size, num_layers=num_layers,
+                           num_classes=num_classes)
+    model.load_state_dict(torch.load(state_dict_path, map_location="cpu"))
+    return model.eval()
+
+
+def build_mlp(state_dict_path, input_dim=12):
+    model = MLP(input_dim)
+    model.load_state_dict(torch.load(state_dict_path, map_location="cpu"))
+    return model.eval()
+
+
+def artifact_paths(state_dict_path):
+    prefix = os.path.splitext(state_dict_path)[0]
+    return {
+        "torchscript": prefix + ".ts",
+        "torchscript_int8": prefix + ".int8.ts",
+        "report": prefix + ".export.json",
+    }
+
+
+@torch.no_grad()
+def measure_latency(model, example, n=200):
+    for _ in range(10):
+        model(*example)
+    start = time.perf_counter()
+    for _ in range(n):
+        model(*example)
+    return (time.perf_counter() - start) / n * 1000
+
+
+@torch.no_grad()
+def compare_outputs(reference, model, eval_batches, to_probs):
+    """与 float32 eager 模型比较：概率最大偏差与预测一致率（有标签时另给准确率）"""
+    max_delta, agree, correct, total = 0.0, 0, 0, 0
+    for inputs, labels in eval_batches:
+        p_ref = to_probs(reference(*inputs))
+        p = to_probs(model(*inputs))
+        max_delta = max(max_delta, (p - p_ref).abs().max().item())
+        pred_ref, pred = p_ref.argmax(dim=1), p.argmax(dim=1)
+        agree += (pred == pred_ref).sum().item()
+        if labels is not None:
+            correct += (pred == labels).sum().item()
+        total += len(pred)
+    return {
+        "max_prob_delta": max_delta,
+        "agreement": agree / total if total else None,
+        "accuracy": correct / total if total and eval_batches[0][1] is not None else None,
+    }
+
+
+def export(model, state_dict_path, example, eval_batches, to_probs):
+    """导出 TorchScript / int8 TorchScript，测量各方式的单次延迟与相对 float32 的精度差，写入报告"""
+    paths = artifact_paths(state_dict_path)
+    variants = {"eager": model, "int8": quantize(model)}
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # 只屏蔽 trace 的提示
+        variants["torchscript"] = torch.jit.trace(variants["eager"], example, check_trace=False)
+        variants["torchscript_int8"] = torch.jit.trace(variants["int8"], example, check_trace=False)
+    variants["torchscript"].save(paths["torchscript"])
+    variants["torchscript_int8"].save(paths["torchscript_int8"])
+
+    report = {"state_dict": os.path.basename(state_dict_path), "backends": {}}
+    for name in BACKENDS:
+        entry = {"latency_ms": measure_latency(variants[name], example)}
+        entry.update(compare_outputs(model, variants[name], eval_batches, to_probs))
+        report["backends"][name] = entry
+        acc = f"  acc={entry['accuracy']:.4f}" if entry["accuracy"] is not None else ""
+        print(f"{name:17s} {entry['latency_ms']:.3f} ms  max|Δp|={entry['max_prob_delta']:.4f}  "
+              f"一致率={entry['agreement']:.4f}{acc}")
+
+    with open(paths["report"], "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"已导出 {paths['torchscript']}、{paths['torchscript_int8']}，报告 {paths['report']}")
+    return report
+
+
+def load_fastest(state_dict_path, build_eager, streaming=False, max_prob_delta=0.05):
+    """按导出报告选择 CPU 上最快、且概率偏差不超过 max_prob_delta 的推理方式。
+
+    build_eager() 返回 float32 eager 模型，仅在选中 eager / int8 时调用；
+    TorchScript 文件直接加载，不需要模型类。没有报告时退回 eager。
+    返回 (模型, 推理方式名)。
+    """
+    paths = artifact_paths(state_dict_path)
+    allowed = STREAMING_BACKENDS if streaming else BACKENDS
+    choice = "eager"
+    if os.path.exists(paths["report"]):
+        with open(paths["report"], encoding="utf-8") as f:
+            backends = json.load(f)["backends"]
+        candidates = [name for name in allowed if name in backends
+                      and backends[name]["max_prob_delta"] <= max_prob_delta
+                      and (not name.startswith("torchscript") or os.path.exists(paths[name]))]
+        if candidates:
+            choice = min(candidates, key=lambda name: backends[name]["latency_ms"])
+
+    if choice.startswith("torchscript"):
+        return torch.jit.load(paths[choice], map_location="cpu").eval(), choice
+    model = build_eager()
+    if choice == "int8":
+        model = quantize(model)
+    return model, choice
+
+
+def load_eval_dataset(path):
+    from train import ScoreSequenceDataset
+    return ScoreSequenceDataset(path)
+
+
+def lstm_eval_batches(args, dataset=None):
+    if dataset is not None:
+        return [((seq.unsqueeze(0), torch.tensor([len(seq)])), torch.tensor([label]))
+                for seq, label in zip(dataset.samples, dataset.labels)]
+    # 没有数据时用随机序列，只报告与 float32 的偏差
+    gen = torch.Generator().manual_seed(0)
+    batches = []
+    for _ in range(200):
+        t = int(torch.randint(10, 120, (1,), generator=gen))
+        batches.append(((torch.randn(1, t, args.input_size, generator=gen), torch.tensor([t])), None))
+    return batches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导出 TorchScript / 动态量化模型并报告延迟与精度差")
+    parser.add_argument("kind", choices=["lstm", "mlp"])
+    parser.add_argument("state_dict")
+    parser.add_argument("--input-size", type=int, default=None,
+                        help="LSTM 输入维度 / MLP 特征数；默认 19，LSTM 指定 --data 时取数据集的特征数")
+    parser.add_argument("--hidden-size", type=int, default=64)
+    parser.add_argument("--num-layers", type=int, default=1)
+    parser.add_argument("--data", default=None, help="用于评估精度的训练格式 CSV（仅 LSTM）")
+    args = parser.parse_args()
+    torch.set_num_threads(1)  # 与 AI 节点上单线程推理的情况一致
+
+    dataset = None
+    if args.kind == "lstm" and args.data:
+        dataset = load_eval_dataset(args.data)
+        n_features = len(dataset.feature_cols)
+        if args.input_size is None:
+            args.input_size = n_features
+        elif args.input_size != n_features:
+            parser.error(f"--input-size {args.input_size} 与 --data 的特征数 {n_features} 不一致")
+    if args.input_size is None:
+        args.input_size = 19
+
+    if args.kind == "lstm":
+        model = build_lstm(args.state_dict, args.input_size, args.hidden_size, args.num_layers)
+        example = (torch.randn(1, 30, args.input_size), torch.tensor([30]))
+        export(model, args.state_dict, example, lstm_eval_batches(args, dataset),
+               lambda logits: torch.softmax(logits, dim=1))
+    else:
+        model = build_mlp(args.state_dict, args.input_size)
+        example = (torch.randn(1, args.input_size),)
+        gen = torch.Generator().manual_seed(0)
+        batches = [((torch.rand(64, args.input_size, generator=gen),), None) for _ in range(20)]
+        export(model, args.state_dict, example, batches,
+               lambda p: torch.cat([1 - p, p], dim=1))
+
+
+if __name__ == "__main__":
+    main()
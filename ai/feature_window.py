@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+
+from schema import FEATURE_COLUMNS
+
+
+class FeatureWindow:
+    """预分配的特征环形缓冲，保存最近 capacity 帧的 LSTM 输入特征（缺失值记为 0）。
+
+    每行同时写入位置 i 和 i + capacity，因此任意最近 k 帧在内存中都是连续的，
+    window() 直接返回视图，不拷贝。视图在下一次 push 之前有效。
+    """
+
+    def __init__(self, capacity=512, columns=FEATURE_COLUMNS):
+        self.capacity = capacity
+        self.columns = list(columns)
+        self.data = np.zeros((2 * capacity, len(self.columns)), dtype=np.float32)
+        self.timestamps = np.zeros(2 * capacity, dtype=np.float64)
+        self.count = 0  # 累计写入的帧数
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def push(self, timestamp, row):
+        """row 为状态字典（按列名取值）"""
+        i = self.count % self.capacity
+        values = [row.get(c) for c in self.columns]
+        values = [0.0 if v is None or math.isnan(v) else v for v in values]
+        self.data[i] = values
+        self.data[i + self.capacity] = values
+        self.timestamps[i] = timestamp
+        self.timestamps[i + self.capacity] = timestamp
+        self.count += 1
+
+    def _last(self, n):
+        # 最近 n 帧在双写数组中的连续区间 [start, end)
+        end = (self.count - 1) % self.capacity + 1 + self.capacity
+        return end - n, end
+
+    def latest(self):
+        """最新一帧的特征 (features,)"""
+        if self.count == 0:
+            return None
+        return self.data[(self.count - 1) % self.capacity]
+
+    def window(self, window_sec):
+        """最新时间往前 window_sec 秒内的特征，形状 (T, features)；无数据时返回 None"""
+        n = len(self)
+        if n == 0:
+            return None
+        start, end = self._last(n)
+        ts = self.timestamps[start:end]
+        first = np.searchsorted(ts, ts[-1] - window_sec, side="left")
+        return self.data[start + first:end]
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    import pandas as pd
+
+    # 与 load_recent_data 原实现（读取 CSV 并 fillna(0)）对比
+    rng = random.Random(0)
+    fw = FeatureWindow(capacity=64)
+    rows = []
+    for k in range(1000):
+        row = {c: (None if rng.random() < 0.05 else rng.random()) for c in FEATURE_COLUMNS}
+        t = k / 30
+        fw.push(t, row)
+        row["timestamp"] = t
+        rows.append(row)
+        if k % 37 == 0:
+            df = pd.DataFrame(rows)
+            w = df[(df["timestamp"] >= t - 0.5) & (df["timestamp"] <= t)]
+            expected = w[FEATURE_COLUMNS].fillna(0).values.astype(np.float32)
+            assert np.array_equal(fw.window(0.5), expected)
+
+    start = time.perf_counter()
+    for _ in range(10000):
+        fw.window(0.5)
+    print(f"window(0.5): {(time.perf_counter() - start) / 10000 * 1e6:.1f} us/次，与 CSV 结果一致")
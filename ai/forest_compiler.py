@@ -0,0 +1,156 @@
+import numpy as np
+
+
+class CompiledForest:
+    """把 sklearn 随机森林展开为扁平数组（特征、阈值、左右子节点、叶子概率），用 NumPy 按层向量化求值。
+
+    所有树的节点拼接在同一组数组中，叶子节点的左右子节点指向自身，
+    因此每个样本的所有树可以一起迭代 max_depth 次走到叶子。
+    计算口径与 sklearn 一致：输入先转 float32，x <= threshold 走左子树，
+    各树概率按树的顺序依次累加后除以树的数量，结果逐位相同。
+    """
+
+    def __init__(self, feature, threshold, left, right, leaf_proba, roots, max_depth, classes):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.leaf_proba = leaf_proba
+        # 左右子节点交错存放：children[2 * i] 为左，children[2 * i + 1] 为右
+        self.children = np.stack([left, right], axis=1).ravel().astype(np.int64)
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_ = int(feature.max()) + 1 if len(feature) else 0
+        self.n_estimators = len(roots)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        features, thresholds, lefts, rights, probas, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            is_leaf = tree.children_left == -1
+            node_ids = np.arange(n) + offset
+
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(tree.threshold.astype(np.float64))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(is_leaf, node_ids, tree.children_right + offset).astype(np.int32))
+
+            # 与 DecisionTreeClassifier.predict_proba 相同的归一化
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1)
+            normalizer[normalizer == 0.0] = 1.0
+            probas.append(value / normalizer[:, None])
+
+            roots.append(offset)
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        compiled = cls(np.concatenate(features), np.concatenate(thresholds), np.concatenate(lefts),
+                       np.concatenate(rights), np.concatenate(probas), np.array(roots, dtype=np.int32),
+                       max_depth, np.asarray(model.classes_))
+        compiled.n_features_in_ = model.n_features_in_
+        return compiled
+
+    def save(self, path):
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 leaf_proba=self.leaf_proba, roots=self.roots, max_depth=self.max_depth, classes=self.classes_,
+                 n_features_in=self.n_features_in_)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as d:
+            compiled = cls(d["feature"], d["threshold"], d["left"], d["right"], d["leaf_proba"], d["roots"],
+                           d["max_depth"], d["classes"])
+            compiled.n_features_in_ = int(d["n_features_in"])
+        return compiled
+
+    def apply(self, X):
+        """每个样本在每棵树上落到的叶子节点编号，形状 (n, n_estimators)"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n, n_features = X.shape
+        x_flat = X.ravel()
+        # 每个 (样本, 树) 对应的行首偏移，用一维下标取特征值
+        row_offset = np.repeat(np.arange(n, dtype=np.int64) * n_features, self.n_estimators)
+        idx = np.tile(self.roots, n).astype(np.int64)
+        for _ in range(self.max_depth):
+            go_right = x_flat[row_offset + self.feature[idx]] > self.threshold[idx]
+            idx = self.children[2 * idx + go_right]
+        return idx.reshape(n, self.n_estimators)
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        leaf = self.leaf_proba[self.apply(X)]  # (n, trees, classes)
+        # cumsum 按树的顺序依次累加，与 sklearn 的逐树 += 结果一致
+        total = np.cumsum(leaf, axis=1)[:, -1]
+        return total / self.n_estimators
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def compile_forest(model):
+    return CompiledForest.from_sklearn(model)
+
+
+def load_forest(model_path="random_forest_model.pkl"):
+    """优先读取同名 .npz 编译结果（比 .pkl 旧时视为过期），否则从 joblib 模型编译"""
+    import os
+    compiled_path = os.path.splitext(model_path)[0] + ".npz"
+    if os.path.exists(compiled_path) and \
+            (not os.path.exists(model_path) or os.path.getmtime(compiled_path) >= os.path.getmtime(model_path)):
+        return CompiledForest.load(compiled_path)
+    import joblib
+    return compile_forest(joblib.load(model_path))
+
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+
+    # python forest_compiler.py [random_forest_model.pkl]：编译并保存为 .npz，同时做一致性检查与计时
+    rng = np.random.default_rng(0)
+    if len(sys.argv) > 1:
+        model = joblib.load(sys.argv[1])
+    else:
+        X_train = rng.random((4000, 12))
+        y_train = ((X_train[:, 0] - X_train[:, 4] + 0.3 * rng.standard_normal(4000)) > 0).astype(int)
+        model = RandomForestClassifier(n_estimators=100, max_depth=8, random_state=42).fit(X_train, y_train)
+
+    compiled = compile_forest(model)
+    if len(sys.argv) > 1:
+        out = sys.argv[1].rsplit(".", 1)[0] + ".npz"
+        compiled.save(out)
+        compiled = CompiledForest.load(out)
+        print(f"已保存 {out}")
+
+    X = rng.random((20000, model.n_features_in_)) * 1.2 - 0.1
+    expected = model.predict_proba(X)
+    actual = compiled.predict_proba(X)
+    assert np.array_equal(expected, actual), np.abs(expected - actual).max()
+    print(f"一致性检查：{len(X)} 条样本 predict_proba 逐位相同")
+
+    def per_call(fn, n=300):
+        start = time.perf_counter()
+        for k in range(n):
+            fn(X[k:k + 1])
+        return (time.perf_counter() - start) / n * 1e6
+
+    print(f"单条预测：sklearn {per_call(model.predict_proba):.0f} us，编译后 {per_call(compiled.predict_proba):.0f} us")
+    for n in (64, 1024):
+        start = time.perf_counter()
+        model.predict_proba(X[:n])
+        t_sk = time.perf_counter() - start
+        start = time.perf_counter()
+        compiled.predict_proba(X[:n])
+        t_c = time.perf_counter() - start
+        print(f"批量 {n} 条：sklearn {t_sk / n * 1e6:.1f} us/条，编译后 {t_c / n * 1e6:.1f} us/条")
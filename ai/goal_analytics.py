@@ -0,0 +1,187 @@
+import numpy as np
+import pandas as pd
+
+
+# ---------- 向量化基础函数（按行处理二维数组，每行一个进球窗口） ----------
+
+def max_run_length(mask):
+    """每行连续 True 的最大长度；一维输入返回标量"""
+    mask = np.asarray(mask, dtype=bool)
+    if mask.ndim == 1:
+        return int(max_run_length(mask[None, :])[0])
+    if mask.shape[1] == 0:
+        return np.zeros(len(mask), dtype=np.int64)
+    counts = np.cumsum(mask, axis=1)
+    # 每个位置之前最近一个 False 处的累计值，相减即当前连续段长度
+    resets = np.maximum.accumulate(np.where(mask, 0, counts), axis=1)
+    return (counts - resets).max(axis=1)
+
+
+def compact_rows(values):
+    """把每行的 NaN 移到末尾（保持其余元素顺序），等价于逐行 dropna。返回 (数组, 每行有效个数)"""
+    valid = ~np.isnan(values)
+    order = np.argsort(~valid, axis=1, kind="stable")
+    return np.take_along_axis(values, order, axis=1), valid.sum(axis=1)
+
+
+def first_true(mask):
+    """每行第一个 True 的位置与是否存在"""
+    return mask.argmax(axis=1), mask.any(axis=1)
+
+
+def masked_mean(values, count):
+    """compact_rows 结果的逐行均值（前 count 个），空行为 NaN"""
+    valid = np.arange(values.shape[1]) < count[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(valid, values, 0.0).sum(axis=1) / np.where(count > 0, count, np.nan)
+
+
+def masked_var(values, count):
+    mean = masked_mean(values, count)
+    valid = np.arange(values.shape[1]) < count[:, None]
+    centered = np.where(valid, values - mean[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (centered * centered).sum(axis=1) / np.where(count > 0, count, np.nan)
+
+
+def masked_max(values, count):
+    valid = np.arange(values.shape[1]) < count[:, None]
+    out = np.where(valid, values, -np.inf).max(axis=1, initial=-np.inf)
+    return np.where(count > 0, out, np.nan)
+
+
+def batch_curvature(u, v, count):
+    """逐行轨迹曲折度：相邻方向夹角之和 / 总路程（与 analyze.trajectory_curvature 口径相同）。
+
+    u, v 为 compact_rows 后的坐标，count 为每行有效点数。
+    """
+    n = u.shape[1]
+    if n < 3:
+        return np.zeros(len(u))
+    du, dv = np.diff(u, axis=1), np.diff(v, axis=1)
+    norms = np.hypot(du, dv)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cu, cv = du / norms, dv / norms
+        cos = np.clip(cu[:, :-1] * cu[:, 1:] + cv[:, :-1] * cv[:, 1:], -1, 1)
+        angles = np.arccos(cos)
+    # 第 j 段有效需 j + 1 < count，第 j 个夹角需 j + 2 < count
+    seg_valid = np.arange(n - 1) < (count - 1)[:, None]
+    pair_valid = np.arange(n - 2) < (count - 2)[:, None]
+    total_angle = np.where(pair_valid, np.abs(angles), 0.0).sum(axis=1)
+    total_dist = np.where(seg_valid, norms, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        curvature = total_angle / total_dist
+    return np.where((count < 3) | (total_dist == 0), 0.0, curvature)
+
+
+def reaction_delays(ball_dir, paddle_speed, timestamps, in_window,
+                    speed_threshold=0.02, dir_change_threshold=15):
+    """逐行反应延迟：球方向第一次变化超过阈值的帧，到之后球拍速度第一次超过阈值的时间差。
+
+    paddle_speed 的缺失值按 0 处理；找不到时为 NaN。
+    """
+    with np.errstate(invalid="ignore"):
+        changed = np.abs(np.diff(ball_dir, axis=1)) > dir_change_threshold
+    changed &= in_window[:, 1:] & in_window[:, :-1]
+    first_change, has_change = first_true(changed)
+    first_change = first_change + 1
+
+    cols = np.arange(ball_dir.shape[1])
+    moving = (np.nan_to_num(paddle_speed, nan=0.0) > speed_threshold) & in_window \
+        & (cols >= first_change[:, None])
+    react, has_react = first_true(moving)
+
+    rows = np.arange(len(ball_dir))
+    delay = timestamps[rows, react] - timestamps[rows, first_change.clip(max=len(cols) - 1)]
+    return np.where(has_change & has_react, delay, np.nan)
+
+
+# ---------- 进球窗口分析 ----------
+
+def goal_window_positions(goal_idx, window_frames):
+    """每个进球之前 window_frames 帧的行号矩阵 (goals, window_frames) 与有效掩码（开头不足时左侧无效）"""
+    offsets = np.arange(-window_frames, 0)
+    positions = goal_idx[:, None] + offsets
+    return positions.clip(min=0), positions >= 0
+
+
+def analyze_goals(df, fps=30, window_sec=1, fail_dist=0.3):
+    """一次处理所有进球：每个进球前 window_sec 秒内得分方球拍 / 球的统计，列与 analyze.py 相同"""
+    goal_idx = np.flatnonzero(df["in_goal"].to_numpy() == True)
+    window_frames = int(fps * window_sec)
+    positions, in_window = goal_window_positions(goal_idx, window_frames)
+    scorer = df["scorer"].to_numpy()[goal_idx].astype(int)
+    is_p1 = (scorer == 1)[:, None]
+
+    def gather(col):
+        values = df[col].to_numpy(dtype=np.float64)[positions]
+        return np.where(in_window, values, np.nan)
+
+    def gather_player(field):
+        return np.where(is_p1, gather(f"paddle1_{field}"), gather(f"paddle2_{field}"))
+
+    dist, dist_n = compact_rows(np.where(is_p1, gather("dist_ball_paddle1"), gather("dist_ball_paddle2")))
+    speed, speed_n = compact_rows(gather_player("speed"))
+    acc, acc_n = compact_rows(gather_player("acc"))
+    u, u_n = compact_rows(gather_player("u"))
+    v, v_n = compact_rows(gather_player("v"))
+    ball_speed, ball_speed_n = compact_rows(gather("ball_speed"))
+
+    valid_dist = np.arange(window_frames) < dist_n[:, None]
+    fail_mask = (dist > fail_dist) & valid_dist
+
+    timestamps = df["timestamp"].to_numpy(dtype=np.float64)[positions]
+    raw_speed = gather_player("speed")
+    delays = reaction_delays(gather("ball_angle"), raw_speed, timestamps, in_window)
+
+    curvature = batch_curvature(u, v, u_n)
+    curvature = np.where(u_n == v_n, curvature, np.nan)  # u、v 缺失位置不一致时无法配对
+
+    return pd.DataFrame({
+        "goal_index": df.index[goal_idx],
+        "scorer": scorer,
+        "dist_max": masked_max(dist, dist_n),
+        "dist_mean": masked_mean(dist, dist_n),
+        "speed_mean": masked_mean(speed, speed_n),
+        "acc_mean": masked_mean(acc, acc_n),
+        "max_consec_fails": max_run_length(fail_mask) if len(goal_idx) else np.zeros(0, dtype=int),
+        "total_fail_time_s": fail_mask.sum(axis=1) / fps,
+        "reaction_delay_s": delays,
+        "ball_speed_var": masked_var(ball_speed, ball_speed_n),
+        "paddle_trajectory_curvature": curvature,
+    })
+
+
+if __name__ == "__main__":
+    import time
+
+    from analyze import analyze_goals_loop
+    from schema import FRAME_COLUMNS
+
+    # 模拟 2 小时 30 FPS 的数据，约每 10 秒一个进球，含 5% 缺失
+    rng = np.random.default_rng(0)
+    n = 30 * 3600 * 2
+    df = pd.DataFrame(rng.random((n, len(FRAME_COLUMNS))), columns=FRAME_COLUMNS)
+    df["timestamp"] = np.arange(n) / 30
+    df["ball_angle"] = rng.uniform(-180, 180, n) * (rng.random(n) < 0.2)
+    df["paddle1_speed"] *= 0.03
+    df["dist_ball_paddle1"] = np.where(rng.random(n) < 0.7, df["dist_ball_paddle1"], 0.1)
+    for col in ["ball_speed", "ball_angle", "paddle1_speed", "paddle2_acc", "dist_ball_paddle1"]:
+        df.loc[rng.random(n) < 0.05, col] = np.nan
+    lost = rng.random(n) < 0.05
+    df.loc[lost, ["paddle1_u", "paddle1_v"]] = np.nan
+    df["in_goal"] = rng.random(n) < 1 / 300
+    df.loc[:10, "in_goal"] = [True] + [False] * 10  # 开头的进球：窗口为空
+    df["scorer"] = np.where(df["in_goal"], rng.integers(1, 3, n), 0)
+
+    start = time.perf_counter()
+    expected = analyze_goals_loop(df, fps=30, window_sec=1)
+    t_loop = time.perf_counter() - start
+    start = time.perf_counter()
+    result = analyze_goals(df, fps=30, window_sec=1)
+    t_vec = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(result, expected.astype(result.dtypes.to_dict()), check_dtype=False,
+                                  rtol=1e-9)
+    print(f"{len(result)} 个进球（{n} 帧）结果一致：逐个进球 {t_loop:.2f}s，向量化 {t_vec * 1000:.0f} ms"
+          f"（{t_loop / t_vec:.0f}x）")
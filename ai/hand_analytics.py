@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+# MediaPipe 最多检测 2 只手，HandID 为 "{Left/Right}_{检测序号}"，共 4 个槽位
+HAND_IDS = ["Left_0", "Left_1", "Right_0", "Right_1"]
+ACTIONS = np.array(["Idle", "Prepare", "Swing"])
+# analyze_by_second 的输出列
+SECOND_COLUMNS = ["Second", "HandID", "Label", "Avg_Speed", "Main_Action", "Stability_L8", "Stability_L12",
+                  "Stability_L16", "Smoothness_L8", "Angle_Mean", "Angle_Std"]
+
+
+def hand_slot(label, hand_idx):
+    return HAND_IDS.index(f"{label}_{hand_idx}")
+
+
+def classify_speeds(speed, low_thresh=0.005, high_thresh=0.02):
+    """hand.classify_speed 的向量化版本，返回 ACTIONS 中的下标"""
+    return np.where(speed < low_thresh, 0, np.where(speed < high_thresh, 1, 2))
+
+
+class HandCapture:
+    """预分配的手部关键点存储：landmarks (frames, hands, 21, 2)，未检测到的位置为 NaN。
+
+    frame_count 未知（如摄像头）时按需翻倍扩容。帧号从 1 开始，与原 raw_data 的 Frame 相同。
+    """
+
+    def __init__(self, frame_count=0, fps=30):
+        self.fps = fps
+        capacity = max(int(frame_count), 64)
+        self.landmarks = np.full((capacity, len(HAND_IDS), 21, 2), np.nan, dtype=np.float32)
+        self.speed = np.zeros((capacity, len(HAND_IDS)), dtype=np.float32)
+        self.present = np.zeros((capacity, len(HAND_IDS)), dtype=bool)
+        self.frames = 0
+
+    def _grow(self, frames):
+        capacity = len(self.landmarks)
+        while capacity < frames:
+            capacity *= 2
+        extra = capacity - len(self.landmarks)
+        if extra:
+            self.landmarks = np.concatenate(
+                [self.landmarks, np.full((extra,) + self.landmarks.shape[1:], np.nan, dtype=np.float32)])
+            self.speed = np.concatenate([self.speed, np.zeros((extra, len(HAND_IDS)), dtype=np.float32)])
+            self.present = np.concatenate([self.present, np.zeros((extra, len(HAND_IDS)), dtype=bool)])
+
+    def add(self, frame_idx, label, hand_idx, landmarks, speed):
+        """landmarks 为 (21, 2) 像素坐标"""
+        self._grow(frame_idx)
+        slot = hand_slot(label, hand_idx)
+        self.landmarks[frame_idx - 1, slot] = landmarks
+        self.speed[frame_idx - 1, slot] = speed
+        self.present[frame_idx - 1, slot] = True
+        self.frames = max(self.frames, frame_idx)
+
+    def to_dataframe(self):
+        """原 raw_data 格式（每帧每只手一行，44 个关键点列）"""
+        frame_idx, slot = np.nonzero(self.present[:self.frames])
+        points = self.landmarks[frame_idx, slot].reshape(len(frame_idx), 42)
+        df = pd.DataFrame(points.astype(np.float64), columns=[f"L{i}_{axis}" for i in range(21) for axis in "xy"])
+        labels = np.array([h.split("_")[0] for h in HAND_IDS])
+        speed = self.speed[frame_idx, slot].astype(np.float64)
+        df.insert(0, "Frame", frame_idx + 1)
+        df.insert(1, "FPS", self.fps)
+        df.insert(2, "HandID", np.array(HAND_IDS)[slot])
+        df.insert(3, "Label", labels[slot])
+        df.insert(4, "Speed", speed)
+        df.insert(5, "Action", ACTIONS[classify_speeds(speed)])
+        return df
+
+
+def _group_std(values, starts, counts, valid=None):
+    """按连续分组计算总体标准差（ddof=0）；valid 为 False 的元素不计入"""
+    if valid is None:
+        valid = np.ones(len(values), dtype=bool)
+    n = np.add.reduceat(valid.astype(np.int64), starts)
+    filled = np.where(valid, values, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.add.reduceat(filled, starts) / n
+        centered = np.where(valid, values - np.repeat(mean, counts), 0.0)
+        return np.sqrt(np.add.reduceat(centered * centered, starts) / n)
+
+
+def batch_angles(A, B, C):
+    """三点夹角（度），A/B/C 为 (n, 2)；与原 hand.py 的逐帧 calculate_angle 口径相同"""
+    AB, CB = A - B, C - B
+    cosine = (AB * CB).sum(axis=1) / (np.hypot(AB[:, 0], AB[:, 1]) * np.hypot(CB[:, 0], CB[:, 1]) + 1e-6)
+    return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+
+def analyze_by_second(capture):
+    """按 (秒, 手) 分组一次性计算所有指标，列与原 analyze_by_second_multi 相同"""
+    frame_idx, slot = np.nonzero(capture.present[:capture.frames])
+    if len(frame_idx) == 0:  # 整段都没有检测到手
+        return pd.DataFrame(columns=SECOND_COLUMNS)
+    second = (frame_idx + 1) // capture.fps
+    # 按 (秒, 手) 稳定排序，组内保持帧顺序
+    order = np.argsort(second * len(HAND_IDS) + slot, kind="stable")
+    frame_idx, slot, second = frame_idx[order], slot[order], second[order]
+    key = second * len(HAND_IDS) + slot
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    counts = np.diff(np.r_[starts, len(key)])
+
+    points = capture.landmarks[frame_idx, slot].astype(np.float64)  # (n, 21, 2)
+    speed = capture.speed[frame_idx, slot].astype(np.float64)
+
+    # 平均速度与主要动作（次数最多；次数相同时取组内先出现的动作）
+    avg_speed = np.add.reduceat(speed, starts) / counts
+    action = classify_speeds(speed)
+    onehot = np.eye(len(ACTIONS), dtype=np.int64)[action]
+    action_counts = np.add.reduceat(onehot, starts)
+    position = np.arange(len(action))
+    first_seen = np.full((len(starts), len(ACTIONS)), np.iinfo(np.int64).max)
+    group_of = np.repeat(np.arange(len(starts)), counts)
+    np.minimum.at(first_seen, (group_of, action), position)
+    best = action_counts == action_counts.max(axis=1, keepdims=True)
+    main_action = ACTIONS[np.where(best, first_seen, np.iinfo(np.int64).max).argmin(axis=1)]
+
+    # 稳定性：指尖到手腕距离的标准差
+    wrist = points[:, 0]
+    stability = {f: _group_std(np.hypot(*(points[:, f] - wrist).T), starts, counts) for f in (8, 12, 16)}
+
+    # 平滑度：食指尖逐帧位移的标准差（每组第一帧没有位移）
+    step = np.r_[np.nan, np.hypot(*np.diff(points[:, 8], axis=0).T)]
+    first_in_group = np.zeros(len(step), dtype=bool)
+    first_in_group[starts] = True
+    smoothness = _group_std(step, starts, counts, valid=~first_in_group)
+
+    angles = batch_angles(points[:, 8], points[:, 12], points[:, 16])
+    angle_valid = ~np.isnan(angles)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        angle_mean = np.add.reduceat(np.where(angle_valid, angles, 0.0), starts) / \
+            np.add.reduceat(angle_valid.astype(np.int64), starts)
+    angle_std = _group_std(angles, starts, counts, valid=angle_valid)
+
+    hand_ids = np.array(HAND_IDS)[slot[starts]]
+    return pd.DataFrame({
+        "Second": second[starts],
+        "HandID": hand_ids,
+        "Label": [h.split("_")[0] for h in hand_ids],
+        "Avg_Speed": avg_speed,
+        "Main_Action": main_action,
+        "Stability_L8": stability[8],
+        "Stability_L12": stability[12],
+        "Stability_L16": stability[16],
+        "Smoothness_L8": smoothness,
+        "Angle_Mean": angle_mean,
+        "Angle_Std": angle_std,
+    })
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    def calculate_angle(A, B, C):
+        # 原 hand.py 的逐帧夹角
+        AB = np.array([A[0] - B[0], A[1] - B[1]])
+        CB = np.array([C[0] - B[0], C[1] - B[1]])
+        cosine_angle = np.dot(AB, CB) / (np.linalg.norm(AB) * np.linalg.norm(CB) + 1e-6)
+        angle = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
+        return np.degrees(angle)
+
+    def analyze_by_second_multi(df):
+        # 原 hand.py 的实现
+        result_rows = []
+        df["second"] = df["Frame"] // df["FPS"]
+        for (sec, hand_id), group in df.groupby(["second", "HandID"]):
+            stability = {}
+            for f in [8, 12, 16]:
+                dist = np.sqrt((group[f"L{f}_x"] - group["L0_x"]) ** 2 + (group[f"L{f}_y"] - group["L0_y"]) ** 2)
+                stability[f"L{f}"] = np.std(dist)
+            vx = group["L8_x"].diff().dropna()
+            vy = group["L8_y"].diff().dropna()
+            angles = []
+            for _, row in group.iterrows():
+                angles.append(calculate_angle((row["L8_x"], row["L8_y"]), (row["L12_x"], row["L12_y"]),
+                                              (row["L16_x"], row["L16_y"])))
+            result_rows.append({
+                "Second": sec, "HandID": hand_id, "Label": group["Label"].iloc[0],
+                "Avg_Speed": group["Speed"].mean(), "Main_Action": group["Action"].value_counts().idxmax(),
+                "Stability_L8": stability["L8"], "Stability_L12": stability["L12"],
+                "Stability_L16": stability["L16"], "Smoothness_L8": np.std(np.sqrt(vx ** 2 + vy ** 2)),
+                "Angle_Mean": np.nanmean(angles), "Angle_Std": np.nanstd(angles),
+            })
+        return pd.DataFrame(result_rows)
+
+    # 模拟 5 分钟 30 FPS 的训练视频，每帧 1~2 只手
+    rng = np.random.default_rng(0)
+    fps, frames = 30, 30 * 300
+    tracemalloc.start()
+    capture = HandCapture(frames, fps)
+    raw_data = []
+    for k in range(1, frames + 1):
+        for hand_idx in range(rng.integers(1, 3)):
+            label = "Left" if rng.random() < 0.5 else "Right"
+            landmarks = rng.random((21, 2)) * [640, 480]
+            speed = rng.random() * 0.03
+            capture.add(k, label, hand_idx, landmarks, speed)
+    mem_capture = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    df = capture.to_dataframe()
+    raw_data = df.to_dict("records")  # 原来每只手每帧一个 44 键字典
+    mem_raw = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    df = pd.DataFrame(raw_data)
+
+    start = time.perf_counter()
+    expected = analyze_by_second_multi(df)
+    t_old = time.perf_counter() - start
+    start = time.perf_counter()
+    result = analyze_by_second(capture)
+    t_new = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False, rtol=1e-9)
+    # 没有检测到手时返回同样列名的空表
+    empty = analyze_by_second(HandCapture(frames, fps))
+    assert len(empty) == 0 and list(empty.columns) == list(result.columns) == SECOND_COLUMNS
+    print(f"{len(df)} 条手部记录，{len(result)} 个 (秒, 手) 分组结果一致："
+          f"iterrows {t_old:.2f}s，向量化 {t_new * 1000:.1f} ms；"
+          f"存储 {mem_capture / 2**20:.1f} MB（字典列表 {mem_raw / 2**20:.1f} MB）")
@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+
+class HandScheduler:
+    """按帧预算自适应地降频运行 MediaPipe 手部模型。
+
+    每 interval 帧才运行一次 hands.process，并且只在上次手部框附近的 ROI 上运行
+    （ROI 再缩放到 max_width 以内）；每 full_every 次运行或上次没检测到手时用整幅画面，
+    以便发现新出现的手。interval 根据实测帧耗时在 [min_interval, max_interval] 之间调整。
+    两次运行之间由调用方用光流或红色拍子轮廓跟踪。
+
+    hands 为视频模式（static_image_mode=False）的实例，会把上一次的手部框按图像坐标带到下一次，
+    所以只用于几何不变的整幅画面；ROI 的位置和大小每次都不同，改用单独的 static_image_mode=True
+    实例 roi_hands（未提供时按需创建），每次都重新检测手掌。
+    """
+
+    def __init__(self, hands, frame_budget=1 / 30, min_interval=1, max_interval=6,
+                 max_width=640, roi_margin=0.5, full_every=10, adjust_every=15, roi_hands=None):
+        self.hands = hands
+        self.roi_hands = roi_hands
+        self.frame_budget = frame_budget
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_width = max_width
+        self.roi_margin = roi_margin      # ROI 相对手部框尺寸的外扩比例
+        self.full_every = full_every
+        self.adjust_every = adjust_every
+
+        self.interval = min_interval
+        self.frame_idx = 0
+        self.last_run_frame = None
+        self.runs = 0
+        self.last_boxes = []              # 上次检测到的手部框（像素）
+        self.avg_frame_time = None
+        self.frames_since_adjust = 0
+
+    def due(self):
+        if self.last_run_frame is None:
+            return True
+        return self.frame_idx - self.last_run_frame >= self.interval
+
+    def _roi(self, w, h):
+        if not self.last_boxes or self.runs % self.full_every == 0:
+            return 0, 0, w, h
+        x0 = min(b[0] for b in self.last_boxes)
+        y0 = min(b[1] for b in self.last_boxes)
+        x1 = max(b[2] for b in self.last_boxes)
+        y1 = max(b[3] for b in self.last_boxes)
+        mx = int((x1 - x0) * self.roi_margin) + 60
+        my = int((y1 - y0) * self.roi_margin) + 60
+        return max(x0 - mx, 0), max(y0 - my, 0), min(x1 + mx, w), min(y1 + my, h)
+
+    def _static_hands(self):
+        if self.roi_hands is None:
+            import mediapipe as mp
+            self.roi_hands = mp.solutions.hands.Hands(static_image_mode=True, max_num_hands=4,
+                                                      min_detection_confidence=0.3, model_complexity=0)
+        return self.roi_hands
+
+    def process(self, frame):
+        """frame 为 BGR 整幅画面。本帧需要运行时返回手部关键点列表（坐标已映射回整幅画面的归一化坐标），
+        本帧跳过时返回 None。"""
+        self.frame_idx += 1
+        if not self.due():
+            return None
+
+        h, w = frame.shape[:2]
+        x0, y0, x1, y1 = self._roi(w, h)
+        crop = frame[y0:y1, x0:x1]
+        cw, ch = x1 - x0, y1 - y0
+        scale = min(1.0, self.max_width / float(cw))
+        if scale < 1.0:
+            crop = cv2.resize(crop, (int(cw * scale), int(ch * scale)), interpolation=cv2.INTER_AREA)
+        # 只对 ROI 做颜色转换；cvtColor 输出是连续内存，满足 MediaPipe 的要求
+        rgb_crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        full_frame = (x0, y0, x1, y1) == (0, 0, w, h)
+        result = (self.hands if full_frame else self._static_hands()).process(rgb_crop)
+
+        self.last_run_frame = self.frame_idx
+        self.runs += 1
+
+        hands_landmarks = result.multi_hand_landmarks or []
+        boxes = []
+        for hand_landmarks in hands_landmarks:
+            # ROI 内的归一化坐标 -> 整幅画面的归一化坐标
+            for lm in hand_landmarks.landmark:
+                lm.x = (lm.x * cw + x0) / w
+                lm.y = (lm.y * ch + y0) / h
+            xs = [lm.x * w for lm in hand_landmarks.landmark]
+            ys = [lm.y * h for lm in hand_landmarks.landmark]
+            boxes.append((int(min(xs)), int(min(ys)), int(max(xs)) + 1, int(max(ys)) + 1))
+        self.last_boxes = boxes
+        return hands_landmarks
+
+    def report_frame_time(self, elapsed):
+        """上报本帧处理耗时（不含显示等待），据此调整运行间隔"""
+        if self.avg_frame_time is None:
+            self.avg_frame_time = elapsed
+        else:
+            self.avg_frame_time = 0.9 * self.avg_frame_time + 0.1 * elapsed
+
+        self.frames_since_adjust += 1
+        if self.frames_since_adjust < self.adjust_every:
+            return
+        self.frames_since_adjust = 0
+        if self.avg_frame_time > self.frame_budget and self.interval < self.max_interval:
+            self.interval += 1
+        elif self.avg_frame_time < 0.6 * self.frame_budget and self.interval > self.min_interval:
+            self.interval -= 1
+
+
+def track_points_flow(prev_gray, gray, points, max_error=30.0):
+    """用金字塔 LK 光流跟踪像素点，返回与 points 等长的列表，跟丢的点为 None"""
+    tracked = [None] * len(points)
+    valid = [i for i, p in enumerate(points) if p is not None]
+    if prev_gray is None or not valid:
+        return tracked
+
+    p0 = np.array([[points[i]] for i in valid], dtype=np.float32)
+    p1, status, err = cv2.calcOpticalFlowPyrLK(prev_gray, gray, p0, None, winSize=(21, 21), maxLevel=2)
+    if p1 is None:
+        return tracked
+    for k, i in enumerate(valid):
+        if status[k][0] == 1 and err[k][0] < max_error:
+            tracked[i] = (float(p1[k][0][0]), float(p1[k][0][1]))
+    return tracked
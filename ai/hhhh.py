@@ -1,11 +1,206 @@
 import math
 
+import numpy as np
+
 def sigmoid(x, k=10):
     return 1 / (1 + math.exp(-k * x))
 
+def fold(y, field_height=1.0):
+    """展开坐标 -> 上下边反弹后的真实坐标（周期 2H 的三角波）"""
+    m = y % (2 * field_height)
+    return m if m <= field_height else 2 * field_height - m
+
+def _first_band_entry(y1, goal_v_min, goal_v_max, field_height):
+    """沿展开坐标向上（y 增大）走，从 y1 开始第一次进入球门范围的展开坐标。
+
+    球门范围 [a, b] 在展开坐标中对应每个周期 2H 内的两段：[a, b] 和 [2H - b, 2H - a]。
+    """
+    period = 2 * field_height
+    a, b = goal_v_min, goal_v_max
+    s = y1 % period
+    base = y1 - s
+    if a <= s <= b or period - b <= s <= period - a:
+        return y1
+    starts = [start for start in (a, period - b, a + period) if start > s]
+    return base + min(starts)
+
+def solve_intercept(
+    ball_v, ball_speed, ball_angle,
+    goal_v_min=0.33, goal_v_max=0.66,
+    field_height=1.0,
+    max_time=10.0,
+    dt=0.01
+):
+    """闭式求解 predict_both_scores 的步进循环：返回 (到达时间, 到达时的 v) 或 None。
+
+    与原步进逻辑一致：只看 v 方向（上下边反弹），第 k 步 (k >= 1) 时 v 第一次落在
+    [goal_v_min, goal_v_max] 内即视为到达，时间取 k * dt。
+    """
+    vy = ball_speed * math.sin(math.radians(ball_angle))
+    y0 = fold(ball_v, field_height)
+    if vy < 0:  # 三角波是偶函数，向下运动等价于镜像后向上运动
+        y0, vy = -y0, -vy
+
+    if vy == 0:
+        if goal_v_min <= fold(y0, field_height) <= goal_v_max:
+            return dt, fold(y0, field_height)
+        return None
+
+    # 步长内跨过整个球门范围时按步检查，最多检查两个周期
+    k = 1
+    for _ in range(4):
+        y_enter = _first_band_entry(y0 + vy * k * dt, goal_v_min, goal_v_max, field_height)
+        k = max(k, math.ceil((y_enter - y0) / (vy * dt) - 1e-9))
+        y = fold(y0 + vy * k * dt, field_height)
+        if goal_v_min <= y <= goal_v_max:
+            break
+        k += 1
+    else:
+        return None
+
+    if k * dt > max_time + 1e-9:
+        return None
+    return k * dt, y
+
+def solve_intercept_batch(
+    ball_v, ball_speed, ball_angle,
+    goal_v_min=0.33, goal_v_max=0.66,
+    field_height=1.0,
+    max_time=10.0,
+    dt=0.01
+):
+    """solve_intercept 的向量化版本，返回 (time, v, found) 三个数组。
+
+    假设每步位移 |vy| * dt 小于球门宽度（速度 < 33 场宽/秒），此时与逐个求解相同。
+    """
+    ball_v = np.asarray(ball_v, dtype=np.float64)
+    vy = np.asarray(ball_speed, dtype=np.float64) * np.sin(np.radians(ball_angle))
+    vy = np.broadcast_to(vy, np.broadcast(ball_v, vy).shape)
+    period = 2 * field_height
+    a, b = goal_v_min, goal_v_max
+
+    y0 = ball_v % period
+    y0 = np.where(y0 <= field_height, y0, period - y0)
+    sign = np.where(vy < 0, -1.0, 1.0)
+    y0, speed = y0 * sign, np.abs(vy)
+
+    # 第一步之后的位置，以及从该位置起第一次进入球门范围的展开坐标
+    y1 = y0 + speed * dt
+    s = y1 % period
+    inside = ((a <= s) & (s <= b)) | ((period - b <= s) & (s <= period - a))
+    next_start = np.where(s < a, a, np.where(s < period - b, period - b, a + period))
+    y_enter = np.where(inside, y1, y1 - s + next_start)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = np.ceil((y_enter - y0) / (speed * dt) - 1e-9)
+    moving = speed > 0
+    k = np.where(moving, np.maximum(k, 1), 1)
+
+    m = (y0 + speed * k * dt) % period
+    y = np.where(m <= field_height, m, period - m)
+    found = (a <= y) & (y <= b) & (k * dt <= max_time + 1e-9)
+    t = np.where(found, k * dt, np.nan)
+    return t, np.where(found, y, np.nan), found
+
 def predict_both_scores(
     ball_u, ball_v, ball_speed, ball_angle,
-    paddle1_u, paddle1_v, paddle1_speed, 
+    paddle1_u, paddle1_v, paddle1_speed,
+    paddle2_u, paddle2_v, paddle2_speed,
+    goal_v_min=0.33, goal_v_max=0.66,
+    paddle_radius=0.08,
+    field_width=1.0, field_height=1.0,
+    max_time=10.0,
+    dt=0.01
+):
+    intercept = solve_intercept(ball_v, ball_speed, ball_angle, goal_v_min, goal_v_max,
+                                field_height, max_time, dt)
+    if intercept is None:
+        # 球不射门，双方得分概率都很低
+        return {"player1_score_prob": 0.0, "player2_score_prob": 0.0}
+    time_elapsed, intercept_y = intercept
+
+    # 计算防守方和进攻方
+    if ball_angle <= 0:
+        attacker = 2  # 球往左门，player2进攻，player1防守
+        intercept_x = 0
+        defender_u, defender_v, defender_speed = paddle1_u, paddle1_v, paddle1_speed
+    else:
+        attacker = 1  # 球往右门，player1进攻，player2防守
+        intercept_x = field_width
+        defender_u, defender_v, defender_speed = paddle2_u, paddle2_v, paddle2_speed
+
+    dist_to_intercept = math.hypot(intercept_x - defender_u, intercept_y - defender_v)
+    max_reach = defender_speed * time_elapsed
+    delta = (dist_to_intercept - max_reach) / paddle_radius
+    prob_score = sigmoid(delta, k=2)
+    prob_score = min(max(prob_score, 0.0), 1.0)
+
+    if attacker == 1:
+        return {
+            "player1_score_prob": prob_score,
+            "player2_score_prob": 1 - prob_score
+        }
+    else:
+        return {
+            "player1_score_prob": 1 - prob_score,
+            "player2_score_prob": prob_score
+        }
+
+def intercept_threat_batch(
+    ball_v, ball_speed, ball_angle,
+    paddle1_u, paddle1_v, paddle1_speed,
+    paddle2_u, paddle2_v, paddle2_speed,
+    goal_v_min=0.33, goal_v_max=0.66,
+    paddle_radius=0.08,
+    field_width=1.0, field_height=1.0,
+    max_time=10.0,
+    dt=0.01
+):
+    """向量化的射门核心：球到达球门线的位置 / 时间与进攻方得分概率（predict_both_scores 的口径）。
+
+    返回 {left, found, intercept_u, intercept_v, intercept_time, defender_dist, defender_reach, prob}，
+    left 为球往左门（player2 进攻），未到达球门的行 found 为 False、其余各项为 NaN。
+    """
+    ball_angle = np.asarray(ball_angle, dtype=np.float64)
+    t, y, found = solve_intercept_batch(ball_v, ball_speed, ball_angle, goal_v_min, goal_v_max,
+                                        field_height, max_time, dt)
+    left = ball_angle <= 0  # 球往左门：player2 进攻，player1 防守
+    defender_u = np.where(left, paddle1_u, paddle2_u)
+    defender_v = np.where(left, paddle1_v, paddle2_v)
+    defender_speed = np.where(left, paddle1_speed, paddle2_speed)
+    intercept_u = np.where(found, np.where(left, 0.0, field_width), np.nan)
+
+    dist = np.hypot(intercept_u - defender_u, y - defender_v)
+    reach = defender_speed * t
+    with np.errstate(over="ignore", invalid="ignore"):
+        prob = 1 / (1 + np.exp(-2 * (dist - reach) / paddle_radius))
+    return {"left": left, "found": found, "intercept_u": intercept_u, "intercept_v": y,
+            "intercept_time": t, "defender_dist": dist, "defender_reach": reach, "prob": prob}
+
+def predict_both_scores_batch(
+    ball_u, ball_v, ball_speed, ball_angle,
+    paddle1_u, paddle1_v, paddle1_speed,
+    paddle2_u, paddle2_v, paddle2_speed,
+    goal_v_min=0.33, goal_v_max=0.66,
+    paddle_radius=0.08,
+    field_width=1.0, field_height=1.0,
+    max_time=10.0,
+    dt=0.01
+):
+    """predict_both_scores 的向量化版本：参数为等长数组，返回 (player1_prob, player2_prob)"""
+    core = intercept_threat_batch(ball_v, ball_speed, ball_angle,
+                                  paddle1_u, paddle1_v, paddle1_speed,
+                                  paddle2_u, paddle2_v, paddle2_speed,
+                                  goal_v_min, goal_v_max, paddle_radius, field_width, field_height,
+                                  max_time, dt)
+    found, left, prob_score = core["found"], core["left"], core["prob"]
+    p1 = np.where(found, np.where(left, 1 - prob_score, prob_score), 0.0)
+    p2 = np.where(found, np.where(left, prob_score, 1 - prob_score), 0.0)
+    return p1, p2
+
+def predict_both_scores_stepped(
+    ball_u, ball_v, ball_speed, ball_angle,
+    paddle1_u, paddle1_v, paddle1_speed,
     paddle2_u, paddle2_v, paddle2_speed,
     goal_v_min=0.33, goal_v_max=0.66,
     paddle_radius=0.08,
@@ -13,6 +208,7 @@ def predict_both_scores(
     max_time=10.0,
     dt=0.01
 ):
+    """原来按 dt 步进的实现，仅用于一致性检查和计时"""
     x, y = ball_u, ball_v
     angle_rad = math.radians(ball_angle)
     vx = ball_speed * math.cos(angle_rad)
@@ -50,15 +246,13 @@ def predict_both_scores(
             break
 
     if not intercept_found:
-        # 球不射门，双方得分概率都很低
         return {"player1_score_prob": 0.0, "player2_score_prob": 0.0}
 
-    # 计算防守方和进攻方
     if goal_side == "left":
-        attacker = 2  # 球往左门，player2进攻，player1防守
+        attacker = 2
         defender_u, defender_v, defender_speed = paddle1_u, paddle1_v, paddle1_speed
     else:
-        attacker = 1  # 球往右门，player1进攻，player2防守
+        attacker = 1
         defender_u, defender_v, defender_speed = paddle2_u, paddle2_v, paddle2_speed
 
     dist_to_intercept = math.hypot(intercept_x - defender_u, intercept_y - defender_v)
@@ -68,12 +262,41 @@ def predict_both_scores(
     prob_score = min(max(prob_score, 0.0), 1.0)
 
     if attacker == 1:
-        return {
-            "player1_score_prob": prob_score,
-            "player2_score_prob": 1 - prob_score
-        }
+        return {"player1_score_prob": prob_score, "player2_score_prob": 1 - prob_score}
     else:
-        return {
-            "player1_score_prob": 1 - prob_score,
-            "player2_score_prob": prob_score
-        }
+        return {"player1_score_prob": 1 - prob_score, "player2_score_prob": prob_score}
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    # 随机球 / 球拍状态：比较步进版、闭式解和向量化版本
+    rng = random.Random(0)
+    states = []
+    for _ in range(2000):
+        states.append((
+            rng.random(), rng.random(), rng.uniform(0, 3), rng.uniform(-180, 180),
+            rng.random(), rng.random(), rng.uniform(0, 1),
+            rng.random(), rng.random(), rng.uniform(0, 1),
+        ))
+
+    start = time.perf_counter()
+    stepped = [predict_both_scores_stepped(*s) for s in states]
+    t_stepped = (time.perf_counter() - start) / len(states)
+    start = time.perf_counter()
+    closed = [predict_both_scores(*s) for s in states]
+    t_closed = (time.perf_counter() - start) / len(states)
+    columns = [np.array(c) for c in zip(*states)]
+    start = time.perf_counter()
+    p1, p2 = predict_both_scores_batch(*columns)
+    t_batch = (time.perf_counter() - start) / len(states)
+
+    # 步进版的时间是逐步累加的浮点数，边界附近可能差一步，对应概率误差很小
+    err = max(abs(a["player1_score_prob"] - b["player1_score_prob"]) for a, b in zip(stepped, closed))
+    err_batch = max(np.max(np.abs(p1 - [r["player1_score_prob"] for r in closed])),
+                    np.max(np.abs(p2 - [r["player2_score_prob"] for r in closed])))
+    assert err < 1e-2 and err_batch < 1e-9, (err, err_batch)
+    print(f"与步进版最大概率误差 {err:.2e}，向量化与闭式解误差 {err_batch:.2e}")
+    print(f"步进 {t_stepped * 1e6:.1f} us/次，闭式 {t_closed * 1e6:.1f} us/次，"
+          f"向量化 {t_batch * 1e6:.2f} us/次（加速 {t_stepped / t_batch:.0f}x）")
@@ -0,0 +1,143 @@
+import math
+import numpy as np
+
+
+class KalmanTracker:
+    """归一化球场坐标 (u, v) 下的恒速卡尔曼滤波器，带边界反弹处理。
+
+    状态为 [u, v, vu, vv]，单位为 场地宽度 与 场地宽度/秒。
+    predict() 给出下一帧的位置预测，search_window() 给出检测时只需搜索的小窗口；
+    连续丢失 max_misses 帧后返回 None，调用方应退回全画面搜索。
+    """
+
+    def __init__(self, process_noise=30.0, measurement_noise=2e-4, bounce=True,
+                 max_misses=5, gate_sigma=3.0, min_window=0.04, max_window=0.35):
+        self.process_noise = process_noise          # 加速度噪声谱密度
+        self.measurement_noise = measurement_noise  # 观测方差 (uv^2)
+        self.bounce = bounce                        # 球在边界反弹，球拍则夹在场内
+        self.max_misses = max_misses
+        self.gate_sigma = gate_sigma
+        self.min_window = min_window
+        self.max_window = max_window
+
+        self.R = np.eye(2) * measurement_noise
+        self.H = np.array([[1.0, 0.0, 0.0, 0.0],
+                           [0.0, 1.0, 0.0, 0.0]])
+        self.reset()
+
+    def reset(self):
+        self.x = None
+        self.P = None
+        self.misses = 0
+
+    @property
+    def initialized(self):
+        return self.x is not None
+
+    @property
+    def lost(self):
+        return self.x is None or self.misses >= self.max_misses
+
+    @property
+    def position(self):
+        if self.x is None:
+            return None
+        return self.x[0], self.x[1]
+
+    @property
+    def velocity(self):
+        if self.x is None:
+            return 0.0, 0.0
+        return self.x[2], self.x[3]
+
+    @property
+    def speed(self):
+        vu, vv = self.velocity
+        return math.hypot(vu, vv)
+
+    @property
+    def angle(self):
+        # 与 compute_speed_and_angle 一致：速度过小时角度记为 0
+        vu, vv = self.velocity
+        if math.hypot(vu, vv) < 0.01:
+            return 0.0
+        return math.degrees(math.atan2(vv, vu))
+
+    def predict(self, dt):
+        if self.x is None:
+            return None
+        if dt <= 0:
+            return self.position
+
+        F = np.eye(4)
+        F[0, 2] = dt
+        F[1, 3] = dt
+        # 离散白噪声加速度模型
+        q = self.process_noise
+        dt2 = dt * dt
+        dt3 = dt2 * dt / 2
+        dt4 = dt2 * dt2 / 4
+        Q = np.array([[dt4, 0, dt3, 0],
+                      [0, dt4, 0, dt3],
+                      [dt3, 0, dt2, 0],
+                      [0, dt3, 0, dt2]]) * q
+
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q
+        self._handle_walls()
+        return self.position
+
+    def _handle_walls(self):
+        for axis in (0, 1):
+            pos = self.x[axis]
+            if 0.0 <= pos <= 1.0:
+                continue
+            if self.bounce:
+                # 镜面反射：越界部分折回，速度分量取反
+                self.x[axis] = -pos if pos < 0.0 else 2.0 - pos
+                self.x[axis + 2] = -self.x[axis + 2]
+                self.x[axis] = min(max(self.x[axis], 0.0), 1.0)
+            else:
+                self.x[axis] = min(max(pos, 0.0), 1.0)
+                self.x[axis + 2] = 0.0
+
+    def gate(self, uv):
+        """观测是否落在预测的 gate_sigma 马氏距离内"""
+        if self.lost:
+            return True
+        y = np.asarray(uv, dtype=np.float64) - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        d2 = y @ np.linalg.solve(S, y)
+        return d2 <= self.gate_sigma ** 2
+
+    def update(self, uv):
+        z = np.asarray(uv, dtype=np.float64)
+        if self.x is None or self.misses >= self.max_misses:
+            # 首次观测或丢失后重新锁定：速度未知，给较大的初始方差
+            self.x = np.array([z[0], z[1], 0.0, 0.0])
+            self.P = np.diag([self.measurement_noise, self.measurement_noise, 4.0, 4.0])
+            self.misses = 0
+            return self.position
+
+        y = z - self.H @ self.x
+        S = self.H @ self.P @ self.H.T + self.R
+        K = self.P @ self.H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(4) - K @ self.H) @ self.P
+        self.misses = 0
+        return self.position
+
+    def miss(self):
+        if self.x is not None:
+            self.misses += 1
+
+    def search_window(self):
+        """返回 (中心uv, 半径uv)；丢失时返回 None 表示需要全画面搜索"""
+        if self.lost:
+            return None
+        sigma = math.sqrt(max(self.P[0, 0], self.P[1, 1]))
+        radius = self.gate_sigma * sigma
+        # 每丢一帧窗口翻倍，逐步扩大搜索范围
+        radius *= 2 ** self.misses
+        radius = min(max(radius, self.min_window), self.max_window)
+        return self.position, radius
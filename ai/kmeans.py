@@ -1,24 +1,21 @@
-import pandas as pd
+import argparse
+import os
+
 import numpy as np
+import pandas as pd
 import torch
 import torch.nn as nn
 import torch.optim as optim
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import IncrementalPCA
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.decomposition import PCA
-import matplotlib.pyplot as plt
-from torch.utils.data import DataLoader, TensorDataset
+from torch.utils.data import DataLoader, IterableDataset
 
-# 1. 读取数据
-df = pd.read_csv("/home/mkbk/code/nus/proj/tracking_data_clean.csv")
-data = df.select_dtypes(include=[np.number])  # 只用数值列
+from consolidate import iter_chunks
+from recorder import INT_COLUMNS
 
-# 2. 标准化
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(data)
-X_tensor = torch.tensor(X_scaled, dtype=torch.float32)
 
-# 3. 定义自编码器
+# 自编码器
 class Autoencoder(nn.Module):
     def __init__(self, input_dim, encoding_dim=5):
         super(Autoencoder, self).__init__()
@@ -39,47 +36,221 @@ class Autoencoder(nn.Module):
         decoded = self.decoder(encoded)
         return decoded
 
-# 4. 初始化模型
-input_dim = X_scaled.shape[1]
-encoding_dim = 5
-model = Autoencoder(input_dim, encoding_dim)
-criterion = nn.MSELoss()
-optimizer = optim.Adam(model.parameters(), lr=0.001)
-
-# 5. 训练模型
-dataset = TensorDataset(X_tensor, X_tensor)
-dataloader = DataLoader(dataset, batch_size=32, shuffle=True)
-
-for epoch in range(10):
-    for batch_x, _ in dataloader:
-        optimizer.zero_grad()
-        outputs = model(batch_x)
-        loss = criterion(outputs, batch_x)
-        loss.backward()
-        optimizer.step()
-    if (epoch+1) % 10 == 0:
-        print(f"Epoch [{epoch+1}/100], Loss: {loss.item():.4f}")
-
-# 6. 获取编码特征
-with torch.no_grad():
-    X_encoded = model.encoder(X_tensor).numpy()
-
-# 7. 聚类
-kmeans = KMeans(n_clusters=4, random_state=42)
-labels = kmeans.fit_predict(X_encoded)
-df["cluster"] = labels
-
-# 8. 保存结果
-df.to_csv("clustered_output.csv", index=False)
-
-# 9. 可视化（PCA降维）
-pca = PCA(n_components=2)
-X_pca = pca.fit_transform(X_encoded)
-
-plt.figure(figsize=(8, 6))
-for i in range(4):
-    plt.scatter(X_pca[labels == i, 0], X_pca[labels == i, 1], label=f"Cluster {i}")
-plt.legend()
-plt.title("Player Clusters")
-plt.savefig("cluster_plot.png")
-plt.show()
+
+def iter_numeric(path, chunksize=100000, columns=None):
+    """逐块读取数值列（与原来的 select_dtypes(include=[np.number]) 相同），跳过含空值的行"""
+    for chunk in iter_chunks(path, chunksize):
+        chunk = chunk.dropna()
+        if len(chunk):
+            yield chunk if columns is None else chunk[columns]
+
+
+def fit_scaler(path, chunksize=100000):
+    """分块 partial_fit，结果与整表 fit 相同；返回 (scaler, 列名)"""
+    scaler = StandardScaler()
+    columns = None
+    for chunk in iter_numeric(path, chunksize):
+        columns = list(chunk.columns) if columns is None else columns
+        scaler.partial_fit(chunk[columns].to_numpy())
+    if columns is None:
+        raise ValueError(f"{path} 中没有数据")
+    return scaler, columns
+
+
+class ScaledChunks(IterableDataset):
+    """流式数据集：逐块读取、标准化，块内打乱后按 batch_size 切成小批量，内存中只保留一块"""
+
+    def __init__(self, path, scaler, columns, batch_size=32, chunksize=100000, shuffle=True, seed=0):
+        self.path = path
+        self.scaler = scaler
+        self.columns = columns
+        self.batch_size = batch_size
+        self.chunksize = chunksize
+        self.shuffle = shuffle
+        self.rng = np.random.default_rng(seed)
+
+    def __iter__(self):
+        for chunk in iter_numeric(self.path, self.chunksize, self.columns):
+            x = self.scaler.transform(chunk.to_numpy()).astype(np.float32)
+            if self.shuffle:
+                x = x[self.rng.permutation(len(x))]
+            for start in range(0, len(x), self.batch_size):
+                yield torch.from_numpy(x[start:start + self.batch_size])
+
+
+def train_autoencoder(path, scaler, columns, encoding_dim=5, epochs=10, batch_size=32, lr=0.001,
+                      chunksize=100000):
+    model = Autoencoder(len(columns), encoding_dim)
+    criterion = nn.MSELoss()
+    optimizer = optim.Adam(model.parameters(), lr=lr)
+    # 数据集自己产出小批量，DataLoader 不再分批
+    loader = DataLoader(ScaledChunks(path, scaler, columns, batch_size, chunksize), batch_size=None)
+
+    for epoch in range(epochs):
+        total, n = 0.0, 0
+        for batch_x in loader:
+            optimizer.zero_grad()
+            outputs = model(batch_x)
+            loss = criterion(outputs, batch_x)
+            loss.backward()
+            optimizer.step()
+            total += loss.item() * len(batch_x)
+            n += len(batch_x)
+        print(f"Epoch [{epoch + 1}/{epochs}], Loss: {total / n:.4f}")
+    return model
+
+
+def iter_encoded(path, model, scaler, columns, chunksize=100000):
+    """逐块产出 (原始数据块, 编码)"""
+    model.eval()
+    for chunk in iter_numeric(path, chunksize, columns):
+        x = torch.tensor(scaler.transform(chunk.to_numpy()), dtype=torch.float32)
+        with torch.no_grad():
+            yield chunk, model.encoder(x).numpy()
+
+
+def fit_clusters(path, model, scaler, columns, n_clusters=4, chunksize=100000, batch_size=4096, max_passes=5,
+                 tol=1e-4):
+    """在编码上训练 MiniBatchKMeans：每块切成 batch_size 行的小批量逐个 partial_fit，
+    最多遍历 max_passes 遍，一遍下来聚类中心的最大移动不超过 tol 时提前停止"""
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=42, batch_size=batch_size, n_init=3)
+    previous = None
+    for n_pass in range(max_passes):
+        for _, encoded in iter_encoded(path, model, scaler, columns, chunksize):
+            for start in range(0, len(encoded), batch_size):
+                batch = encoded[start:start + batch_size]
+                # 初始化聚类中心的第一批要求不少于 n_clusters 行
+                if not hasattr(kmeans, "cluster_centers_") and len(batch) < n_clusters:
+                    continue
+                kmeans.partial_fit(batch)
+        if not hasattr(kmeans, "cluster_centers_"):
+            raise ValueError(f"{path} 中完整数据不足：没有一个小批量达到 {n_clusters} 行，无法聚成 {n_clusters} 类")
+
+        centers = kmeans.cluster_centers_.copy()
+        shift = np.inf if previous is None else np.linalg.norm(centers - previous, axis=1).max()
+        print(f"KMeans pass [{n_pass + 1}/{max_passes}], centroid shift: {shift:.6f}")
+        if shift <= tol:
+            break
+        previous = centers
+    return kmeans
+
+
+class ClusterModel:
+    """保存好的编码器 + 标准化参数 + 聚类中心，新比赛的数据直接分配到已有的簇，无需重新训练"""
+
+    def __init__(self, model, scaler, columns, centroids):
+        self.model = model.eval()
+        self.scaler = scaler
+        self.columns = list(columns)
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+
+    def encode(self, data):
+        """data 为含 columns 的 DataFrame 或按 columns 排列的数组"""
+        x = data[self.columns].to_numpy(dtype=np.float64) if isinstance(data, pd.DataFrame) \
+            else np.asarray(data, dtype=np.float64)
+        x = torch.tensor(self.scaler.transform(x), dtype=torch.float32)
+        with torch.no_grad():
+            return self.model.encoder(x).numpy()
+
+    def assign(self, encoded):
+        """编码后每行最近的聚类中心编号"""
+        dist = ((encoded[:, None, :] - self.centroids[None]) ** 2).sum(axis=2)
+        return dist.argmin(axis=1)
+
+    def predict(self, data):
+        return self.assign(self.encode(data))
+
+    def save(self, path):
+        torch.save({
+            "state_dict": self.model.state_dict(),
+            "input_dim": len(self.columns),
+            "encoding_dim": self.centroids.shape[1],
+            "columns": self.columns,
+            "scaler_mean": self.scaler.mean_,
+            "scaler_var": self.scaler.var_,
+            "scaler_scale": self.scaler.scale_,
+            "scaler_n": self.scaler.n_samples_seen_,
+            "centroids": self.centroids,
+        }, path)
+
+    @classmethod
+    def load(cls, path):
+        bundle = torch.load(path, weights_only=False)
+        model = Autoencoder(bundle["input_dim"], bundle["encoding_dim"])
+        model.load_state_dict(bundle["state_dict"])
+        scaler = StandardScaler()
+        scaler.mean_ = bundle["scaler_mean"]
+        scaler.var_ = bundle["scaler_var"]
+        scaler.scale_ = bundle["scaler_scale"]
+        scaler.n_samples_seen_ = bundle["scaler_n"]
+        scaler.n_features_in_ = bundle["input_dim"]
+        return cls(model, scaler, bundle["columns"], bundle["centroids"])
+
+
+def write_clusters(path, cluster_model, output, chunksize=100000, plot_path=None, plot_points=20000):
+    """逐块给每行打上 cluster 标签并追加写出；同时用 IncrementalPCA 画出抽样点的二维分布"""
+    pca = IncrementalPCA(n_components=2)
+    sample, sample_labels = [], []
+    n_rows = 0
+    header = True
+    for chunk, encoded in iter_encoded(path, cluster_model.model, cluster_model.scaler, cluster_model.columns,
+                                       chunksize):
+        labels = cluster_model.assign(encoded)
+        chunk = chunk.assign(cluster=labels).astype({c: np.int64 for c in INT_COLUMNS if c in chunk.columns})
+        chunk.to_csv(output, mode="w" if header else "a", header=header, index=False)
+        header = False
+        n_rows += len(chunk)
+        if plot_path is not None:
+            if len(encoded) >= 2:
+                pca.partial_fit(encoded)
+            if sum(len(s) for s in sample) < plot_points:
+                sample.append(encoded[:plot_points])
+                sample_labels.append(labels[:plot_points])
+    print(f"✅ {n_rows} 行已写入 {output}")
+
+    if plot_path is not None and sample:
+        import matplotlib.pyplot as plt
+        X_pca = pca.transform(np.concatenate(sample)[:plot_points])
+        labels = np.concatenate(sample_labels)[:plot_points]
+        plt.figure(figsize=(8, 6))
+        for i in range(len(cluster_model.centroids)):
+            plt.scatter(X_pca[labels == i, 0], X_pca[labels == i, 1], label=f"Cluster {i}")
+        plt.legend()
+        plt.title("Player Clusters")
+        plt.savefig(plot_path)
+        plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="自编码器 + MiniBatchKMeans 球员聚类（分块读取，内存占用与数据量无关）")
+    parser.add_argument("data", nargs="?", default="tracking_data_clean.csv", help="CSV 文件或 FrameRecorder 分片目录")
+    parser.add_argument("--clusters", type=int, default=4)
+    parser.add_argument("--encoding-dim", type=int, default=5)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--chunksize", type=int, default=100000)
+    parser.add_argument("--kmeans-batch-size", type=int, default=4096)
+    parser.add_argument("--kmeans-passes", type=int, default=5, help="聚类最多遍历数据的遍数，中心不再移动时提前停止")
+    parser.add_argument("--bundle", default="player_clusters.pt", help="保存编码器 / 标准化参数 / 聚类中心")
+    parser.add_argument("--assign", action="store_true", help="用已保存的 --bundle 直接分配簇，不重新训练")
+    parser.add_argument("-o", "--output", default="clustered_output.csv")
+    parser.add_argument("--plot", default="cluster_plot.png")
+    args = parser.parse_args()
+
+    if args.assign:
+        cluster_model = ClusterModel.load(args.bundle)
+    else:
+        scaler, columns = fit_scaler(args.data, args.chunksize)
+        model = train_autoencoder(args.data, scaler, columns, args.encoding_dim, args.epochs, args.batch_size,
+                                  chunksize=args.chunksize)
+        kmeans = fit_clusters(args.data, model, scaler, columns, args.clusters, args.chunksize,
+                              args.kmeans_batch_size, args.kmeans_passes)
+        cluster_model = ClusterModel(model, scaler, columns, kmeans.cluster_centers_)
+        cluster_model.save(args.bundle)
+        print(f"✅ 模型已保存到 {os.path.abspath(args.bundle)}")
+
+    write_clusters(args.data, cluster_model, args.output, args.chunksize, args.plot)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,12 @@ import time
 from cv import CameraTracker  # 假设 CameraTracker 类在 ai/camera_tracker.py 中定义
 import json
 from predictor import RealTimePredictor
+from prediction_scheduler import PredictionScheduler
 from cv import client  # 导入 MQTT 客户端
-from rule_based_report import analyze_recent_round, analyze_recent_game
+from rule_based_report import analyze_recent_round, analyze_recent_game, RoundAccumulator
 from collections import deque
 from hhhh import predict_both_scores
-import requests
+from uploader import AnalysisUploader
 MQTT_BROKER_URL = "172.20.10.3"
 MQTT_BROKER_PORT = 45679 
 status = "ended"
@@ -67,10 +68,14 @@ def main():
     last_handled_round = None
     last_handled_game = None
     predictor = RealTimePredictor()
+    # 只在发布周期到达或球的状态明显变化时计算胜率
+    scheduler = PredictionScheduler(interval=publish_interval)
     client.on_connect = on_connect
     client.on_message = on_message
     handled_game_id = 0  # ✅ 加在 main 函数中初始化
-    round_history = []
+    # 分析结果由后台线程上传，追踪循环不等待网络
+    uploader = AnalysisUploader("http://172.20.10.3:45678")
+    round_history = RoundAccumulator(tail_sec=5)  # 在线统计 + 最近 5 秒，内存不随回合长度增长
     game_history = []
     try:
         last_print_time = 0
@@ -107,20 +112,22 @@ def main():
             if not tracker.process_frame():
                 break
             latest = tracker.latest_data
-            round_history.append(latest.copy()) 
+            round_history.append(latest)
             if  status == "in progress" and in_goal == 1:
-                result_round = analyze_recent_round(game_id, round_id,round_history)
+                result_round = analyze_recent_round(game_id, round_id, round_history, scorer=scorer)
                 game_history.append(result_round)
                 round_history.clear()  # 清空回合历史
-                response = requests.post('http://172.20.10.3:45678/analysis/round/new', json=result_round)
+                uploader.submit('/analysis/round/new', result_round, key=f"round:{game_id}:{round_id}")
                 round_id += 1
+                scheduler.reset()
+                prediction_buffer.clear()  # 进球前提交的预测属于上一回合，不能用来初始化新回合的平滑值
                 print(result_round)
             if (status == "ended" and game_id != handled_game_id):
                 result_game = analyze_recent_game(game_id,game_history)
                 game_id = -1
                 round_id = 1
                 print(result_game)
-                response = requests.post('http://172.20.10.3:45678/analysis/game/new', json=result_game)
+                uploader.submit('/analysis/game/new', result_game, key=f"game:{result_game['gid']}")
                 handled_game_id = game_id
                 game_history.clear()
             if latest:
@@ -164,13 +171,20 @@ def main():
             ]
             
 
-            if all(v is not None for v in features):
-                prediction = predictor.update_and_predict(features)
+            if all(v is not None for v in features) and \
+                    scheduler.should_evaluate(time.time(), ball["speed"], ball["angle"]):
+                # 提交给批量预测服务，不阻塞追踪循环
+                prediction_buffer.append((predictor.submit(features), features))
+
+            # 取出已经算完的预测（按提交顺序）
+            while prediction_buffer and prediction_buffer[0][0].done():
+                future, done_features = prediction_buffer.popleft()
+                prediction = future.result()
                 if prediction is not None:
                     now = time.time()
 
-                    p1_speed = features[6]
-                    p2_speed = features[10]
+                    p1_speed = done_features[6]
+                    p2_speed = done_features[10]
                     if p1_speed >= 0.05 and p2_speed >= 0.05:
                         mean_pred = prediction
                     else:
@@ -178,19 +192,20 @@ def main():
                             "playerA": 50,
                             "playerB": 50
                         }
+                    scheduler.update(mean_pred)  # 指数平滑
 
-                    # 如果到达发布时间，发送
-                    if now - last_publish_time >= publish_interval:
-                        last_publish_time = now
-                        client.publish("game/prediction", json.dumps(mean_pred))
-
+            # 到达发布时间就发送最新的平滑结果，与预测何时算完无关
+            now = time.time()
+            mean_pred = scheduler.value
+            if mean_pred is not None and now - last_publish_time >= publish_interval:
+                last_publish_time = now
+                client.publish("game/prediction", json.dumps(mean_pred))
 
 
-                        payload1 = json.dumps(mean_pred)
-                        client.publish('game/predictions', payload1)
-                        print("Published pred:", payload1)
 
-                        last_publish_time = now  # 更新时间戳
+                payload1 = json.dumps(mean_pred)
+                client.publish('game/predictions', payload1)
+                print("Published pred:", payload1)
 
             
 
@@ -198,6 +213,8 @@ def main():
         print("退出程序")
     finally:
         tracker.release()
+        predictor.close()
+        uploader.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
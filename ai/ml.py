@@ -1,4 +1,3 @@
-import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
 from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
@@ -10,28 +9,17 @@ from sklearn.neighbors import KNeighborsClassifier
 from sklearn.naive_bayes import GaussianNB
 import warnings
 import joblib
+from forest_compiler import compile_forest
+from dataset_builder import load_goal_windows
 
 warnings.filterwarnings("ignore")  # 屏蔽部分不必要警告
 
 # 读取数据
-df = pd.read_csv(r"C:\Users\cxlou\Desktop\SWS-AIoT-Project\ai\csv\combined_data.csv")
-print("选手 1 进球数:", (df["scorer"] == 1).sum())
-print("选手 2 进球数:", (df["scorer"] == 2).sum())
-
-df = df.sort_values(by=["timestamp"]).reset_index(drop=True)
-
-# 选取进球前 0.5 ~ 1 秒的帧
-selected_rows = []
-goal_events = df[df["in_goal"] == 1]
-for _, goal_row in goal_events.iterrows():
-    goal_time = goal_row["timestamp"]
-    scorer = goal_row["scorer"] - 1  # 转为 0/1
-    candidates = df[(df["timestamp"] >= goal_time - 1) & (df["timestamp"] < goal_time - 0.5)]
-    for _, row in candidates.iterrows():
-        new_row = row.copy()
-        new_row["scorer"] = scorer
-        selected_rows.append(new_row)
-selected_df = pd.DataFrame(selected_rows)
+# 选取进球前 0.5 ~ 1 秒的帧，scorer 转为 0/1
+selected_df = load_goal_windows(r"C:\Users\cxlou\Desktop\SWS-AIoT-Project\ai\csv\combined_data.csv",
+                                before=1, after=0.5)
+print("选手 1 进球前样本数:", (selected_df["scorer"] == 0).sum())
+print("选手 2 进球前样本数:", (selected_df["scorer"] == 1).sum())
 
 # 特征和标签
 features = [
@@ -104,3 +92,7 @@ print(f"  AUROC:     {roc_auc_score(y_val, y_prob):.4f}")
 # 保存模型
 joblib.dump(model, "random_forest_model.pkl")
 print("\n✅ 随机森林模型已保存为 random_forest_model.pkl")
+
+# 导出扁平数组形式，供 RealTimePredictor 快速推理
+compile_forest(model).save("random_forest_model.npz")
+print("✅ 编译后的模型已保存为 random_forest_model.npz")
@@ -0,0 +1,78 @@
+class PredictionScheduler:
+    """决定哪些帧需要计算胜率，并对结果做指数平滑。
+
+    只在到达周期计算时刻（每 interval 秒，与发布频率一致），或球的状态明显变化
+    （方向变化超过 angle_change 度、速度变化超过 speed_jump）时才计算；
+    其余帧的预测结果本来就不会被发布。状态变化触发的计算不推迟周期计算时刻，
+    保证每个发布周期内都有一次新的预测。
+    """
+
+    def __init__(self, interval=1.0, angle_change=90.0, speed_jump=0.3, ema_alpha=0.5):
+        self.interval = interval
+        self.angle_change = angle_change
+        self.speed_jump = speed_jump
+        self.ema_alpha = ema_alpha
+
+        self.next_periodic = None  # 下一次周期计算的时刻
+        self.last_ball = None  # 上次计算时球的 (speed, angle)
+        self.smoothed = None
+        self.evaluations = 0
+        self.frames = 0
+
+    def reset(self):
+        """回合结束时清空平滑状态"""
+        self.next_periodic = None
+        self.last_ball = None
+        self.smoothed = None
+
+    def _state_changed(self, speed, angle):
+        if self.last_ball is None:
+            return True
+        last_speed, last_angle = self.last_ball
+        if abs(speed - last_speed) > self.speed_jump:
+            return True
+        diff = abs(angle - last_angle) % 360
+        return min(diff, 360 - diff) > self.angle_change
+
+    def should_evaluate(self, now, ball_speed, ball_angle):
+        self.frames += 1
+        periodic = self.next_periodic is None or now >= self.next_periodic
+        if periodic or self._state_changed(ball_speed, ball_angle):
+            if periodic:
+                self.next_periodic = now + self.interval
+            self.last_ball = (ball_speed, ball_angle)
+            self.evaluations += 1
+            return True
+        return False
+
+    def update(self, prediction):
+        """加入一次新的预测结果 {"playerA": .., "playerB": ..}，返回平滑后的整数结果"""
+        if self.smoothed is None:
+            self.smoothed = {k: float(v) for k, v in prediction.items()}
+        else:
+            a = self.ema_alpha
+            self.smoothed = {k: a * float(v) + (1 - a) * self.smoothed[k] for k, v in prediction.items()}
+        return self.value
+
+    @property
+    def value(self):
+        if self.smoothed is None:
+            return None
+        return {k: int(round(v)) for k, v in self.smoothed.items()}
+
+
+if __name__ == "__main__":
+    import random
+
+    # 模拟 60 FPS、5 分钟的球运动（随机反弹与击球），统计实际需要计算的帧数
+    rng = random.Random(0)
+    scheduler = PredictionScheduler()
+    speed, angle = 0.5, 30.0
+    fps, n = 60, 60 * 300
+    for k in range(n):
+        if rng.random() < 0.02:  # 撞墙或被击中
+            angle = (angle + rng.choice([180, 90, -90]) + rng.uniform(-20, 20) + 180) % 360 - 180
+            speed = max(0.0, speed + rng.uniform(-0.4, 0.4))
+        speed = max(0.0, speed + rng.gauss(0, 0.01))
+        scheduler.should_evaluate(k / fps, speed, angle)
+    print(f"{n} 帧中计算 {scheduler.evaluations} 次，减少为 1/{n / scheduler.evaluations:.0f}")
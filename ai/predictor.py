@@ -1,11 +1,15 @@
 # predictor_rf.py
-import joblib
 import numpy as np
+from forest_compiler import load_forest
+from prediction_service import PredictionService, format_probs
 
 class RealTimePredictor:
-    def __init__(self, model_path="random_forest_model.pkl"):
-        self.model = joblib.load(model_path)
+    def __init__(self, model_path="random_forest_model.pkl", max_latency=0.02):
+        # 使用编译后的扁平数组森林，输出与 sklearn predict_proba 相同
+        self.model = load_forest(model_path)
         self.feature_len = self.model.n_features_in_
+        # 多帧 / 多张球桌的请求合并为一次 predict_proba
+        self.service = PredictionService(self.model, max_latency=max_latency, feature_len=self.feature_len)
 
     def update_and_predict(self, feature_vector):
         # 若特征不完整或长度不一致，跳过
@@ -14,8 +18,11 @@ class RealTimePredictor:
 
         X = np.array(feature_vector).reshape(1, -1)
         probs = self.model.predict_proba(X)[0]  # [p0, p1]
-        return {
-            "playerA": int(probs[0] * 100),
-            "playerB": int(probs[1] * 100)
-        }
+        return format_probs(probs)
 
+    def submit(self, feature_vector, callback=None):
+        """异步预测，返回 Future，结果格式与 update_and_predict 相同"""
+        return self.service.submit(feature_vector, callback)
+
+    def close(self):
+        self.service.close()
@@ -4,15 +4,16 @@ from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.tree import export_text
 from sklearn.metrics import classification_report, confusion_matrix
+from schema import normalize_columns
 
 # 1. 加载数据
-df = pd.read_csv("/home/mkbk/code/nus/proj/tracking_data_clean.csv")  # 修改为你的CSV路径
+df = normalize_columns(pd.read_csv("/home/mkbk/code/nus/proj/tracking_data_clean.csv"))  # 修改为你的CSV路径
 
 # 2. 选择特征列和目标列
 features = [
-    'ball_u', 'ball_v', 'ball_speed', 'ball_acc', 'ball_dir',
-    'paddle1_u', 'paddle1_v', 'paddle1_speed', 'paddle1_acc', 'paddle1_dir',
-    'paddle2_u', 'paddle2_v', 'paddle2_speed', 'paddle2_acc', 'paddle2_dir',
+    'ball_u', 'ball_v', 'ball_speed', 'ball_acc', 'ball_angle',
+    'paddle1_u', 'paddle1_v', 'paddle1_speed', 'paddle1_acc', 'paddle1_angle',
+    'paddle2_u', 'paddle2_v', 'paddle2_speed', 'paddle2_acc', 'paddle2_angle',
     'dist_ball_paddle1', 'dist_ball_paddle2', 'dist_paddle1_paddle2', 'dist_ball_goal'
 ]
 
@@ -1,19 +1,20 @@
 import cv2
 import numpy as np
 import time
-import math
-import csv
 import pandas as pd
 import torch
 import torch.nn.functional as F
 from model import LSTMClassifier
-import collections
 import json
 from datetime import datetime
+from clip_buffer import FrameRing, ClipEncoder
+from recorder import FrameRecorder
+from tracking import (FieldDetector, TrackingEngine, HSVContourDetector, GoalZone, RED_RANGES_STRICT,
+                      FEATURE_COLUMNS, normalize_columns)
 
 
 def analyze_csv(csv_path, window_sec=3.0):
-    df = pd.read_csv(csv_path)
+    df = normalize_columns(pd.read_csv(csv_path))
     if len(df) == 0:
         raise ValueError("CSV文件为空")
     max_time = df["timestamp"].max()
@@ -34,7 +35,7 @@ def analyze_csv(csv_path, window_sec=3.0):
     report["avg_dist_ball_p2"] = window_df["dist_ball_paddle2"].mean()
     report["avg_dist_paddles"] = window_df["dist_paddle1_paddle2"].mean()
     report["max_ball_speed"] = window_df["ball_speed"].max()
-    report["avg_ball_dir"] = window_df["ball_dir"].mean()
+    report["avg_ball_dir"] = window_df["ball_angle"].mean()
     upper_half_frames = window_df[window_df["ball_v"] < 0.5]
     report["upper_half_ratio"] = len(upper_half_frames) / len(window_df)
     report["avg_p1_goal_dist"] = window_df["paddle1_goal_dist"].mean() if "paddle1_goal_dist" in window_df else None
@@ -59,98 +60,47 @@ def generate_suggestions(report):
     return suggestions
 
 
-class FieldDetector:
-    def __init__(self, video_source):
-        self.cap = cv2.VideoCapture(video_source)
-        if not self.cap.isOpened():
-            raise IOError("无法打开摄像头或视频源")
-        self.corner_points = None
-
-    def detect_field_once(self):
-        while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                return None
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            lower_gray = 200
-            upper_gray = 240
-            mask = cv2.inRange(gray, lower_gray, upper_gray)
-            kernel = np.ones((5, 5), np.uint8)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-            all_points = []
-            for cnt in contours:
-                area = cv2.contourArea(cnt)
-                if area > 500:
-                    for pt in cnt:
-                        all_points.append(pt[0])
-            if len(all_points) < 4:
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    return None
-                continue
-
-            all_points = np.array(all_points)
-            sum_coords = all_points.sum(axis=1)
-            diff_coords = np.diff(all_points, axis=1).reshape(-1)
-
-            top_left = all_points[np.argmin(sum_coords)]
-            bottom_right = all_points[np.argmax(sum_coords)]
-            top_right = all_points[np.argmin(diff_coords)]
-            bottom_left = all_points[np.argmax(diff_coords)]
-
-            self.corner_points = np.array([top_left, top_right, bottom_right, bottom_left], dtype=np.int32)
-            return frame
-
-    def release(self):
-        self.cap.release()
-        cv2.destroyAllWindows()
-
-
 class CameraTracker:
     def __init__(self, video_source):
-        self.detector = FieldDetector(video_source)
+        self.detector = FieldDetector(video_source, corner_mode="gray")
         frame = self.detector.detect_field_once()
         if self.detector.corner_points is None:
             raise Exception("No corner detected")
         self.corners = self.detector.corner_points
         self.cap = self.detector.cap
 
-        self.prev_ball_uv = None
-        self.prev_time = None
+        # 只追踪红色球，进球由球的位置判定
+        self.engine = TrackingEngine(
+            self.corners,
+            HSVContourDetector(RED_RANGES_STRICT),
+            goal_zone=GoalZone(axis=1, band=(0.3, 0.7), edge=0.05, cooldown=0.5)
+        )
 
         self.score_player1 = 0
         self.score_player2 = 0
 
         self.csv_path = "tracking_data.csv"
-        self.csv_file = open(self.csv_path, mode="w", newline="")
-        self.csv_writer = csv.writer(self.csv_file)
-        self.csv_writer.writerow([
-            "timestamp", "ball_u", "ball_v", "in_goal", "scorer"
-        ])
+        # 逐帧数据按列缓存，后台线程整块写入
+        self.recorder = FrameRecorder(self.csv_path)
 
         self.analysis_interval = 1.0
         self.last_analysis_time = 0
         self.current_suggestions = []
 
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = LSTMClassifier(input_size=19, hidden_size=64, num_layers=1, num_classes=2)
+        self.model = LSTMClassifier(input_size=len(FEATURE_COLUMNS), hidden_size=64, num_layers=1, num_classes=2)
         self.model.load_state_dict(torch.load("/home/mkbk/code/nus/proj/lstm_model.pt", map_location=self.device))
         self.model.to(self.device)
         self.model.eval()
 
         # 帧缓存与JSON
-        self.frame_buffer = collections.deque(maxlen=60)
+        self.frame_buffer = FrameRing(60)
+        self.clip_encoder = ClipEncoder()
         self.events = []
         self.json_path = "goal_events.json"
 
     def compute_normalized(self, pt):
-        TL, TR, BR, BL = self.corners
-        src_quad = np.array([TL, TR, BR, BL], dtype=np.float32)
-        dst_quad = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float32)
-        M = cv2.getPerspectiveTransform(src_quad, dst_quad)
-        uv = cv2.perspectiveTransform(np.array([[[pt[0], pt[1]]]], dtype=np.float32), M)
-        return uv[0, 0]
+        return self.engine.geometry.to_uv(pt)
 
     def save_goal_event(self, scorer):
         event = {
@@ -162,68 +112,34 @@ class CameraTracker:
         with open(self.json_path, "w") as f:
             json.dump(self.events, f, indent=2, ensure_ascii=False)
 
-        if self.frame_buffer:
-            now = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"recording/goal_{now}_player{scorer}.mp4"
-            h, w = self.frame_buffer[0].shape[:2]
-            fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-            out = cv2.VideoWriter(filename, fourcc, 30, (w, h))
-            for frame in self.frame_buffer:
-                out.write(frame)
-            out.release()
-            print(f"Saved goal video: {filename}")
+        now = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"recording/goal_{now}_player{scorer}.mp4"
+        self.clip_encoder.submit(filename, self.frame_buffer.detach(), 30)
 
     def process_frame(self):
-        ret, frame = self.cap.read()
+        ret, raw = self.frame_buffer.read(self.cap)
         if not ret:
             return False
 
-        self.frame_buffer.append(frame.copy())
-
         curr_time = time.time()
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+        state = self.engine.process(raw, curr_time)
+
+        # 在画布上绘制，缓冲中保留原始帧
+        h, w = raw.shape[:2]
+        expanded = np.ones((h, w + 200, 3), dtype=np.uint8) * 255
+        frame = expanded[:, :w]
+        frame[...] = raw
         cv2.polylines(frame, [self.corners.reshape((-1, 1, 2))], isClosed=True, color=(156, 85, 43), thickness=3)
+        self.recorder.append(state)
 
-        # Ball detection
-        lower_ball1 = np.array([0, 100, 100])
-        upper_ball1 = np.array([10, 255, 255])
-        lower_ball2 = np.array([170, 100, 100])
-        upper_ball2 = np.array([179, 255, 255])
-        mask1 = cv2.inRange(hsv, lower_ball1, upper_ball1)
-        mask2 = cv2.inRange(hsv, lower_ball2, upper_ball2)
-        mask_ball = cv2.bitwise_or(mask1, mask2)
-
-        ball_uv = None
-        ball_contours, _ = cv2.findContours(mask_ball, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        ball_candidates = []
-        for c in ball_contours:
-            (x, y), radius = cv2.minEnclosingCircle(c)
-            uv = self.compute_normalized((int(x), int(y)))
-            ball_candidates.append((c, uv, (x, y, radius)))
-
-        if ball_candidates:
-            _, uv, _ = max(ball_candidates, key=lambda t: cv2.contourArea(t[0]))
-            ball_uv = uv
-
-        in_goal = False
-        scorer = None
-        if ball_uv is not None:
-            if 0.3 < ball_uv[0] < 0.7:
-                if ball_uv[1] < 0.05:
-                    if time.time() - self.last_time > 0.5:
-                        self.score_player2 += 1
-                        self.save_goal_event(2)
-                        self.last_time = time.time()
-                elif ball_uv[1] > 0.95:
-                    if time.time() - self.last_time > 0.5:
-                        self.score_player1 += 1
-                        self.save_goal_event(1)
-                        self.last_time = time.time()
+        if state["scorer"] == 2:
+            self.score_player2 += 1
+            self.save_goal_event(2)
+        elif state["scorer"] == 1:
+            self.score_player1 += 1
+            self.save_goal_event(1)
 
         # Create overlay only for SCORE
-        h, w = frame.shape[:2]
-        expanded = np.ones((h, w + 200, 3), dtype=np.uint8) * 255
-        expanded[:, :w] = frame
         overlay = expanded[:, w:]
         cv2.putText(overlay, "=== SCORE ===", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
         cv2.putText(overlay, f"Player1: {self.score_player1}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
@@ -232,16 +148,15 @@ class CameraTracker:
         cv2.imshow("Tracking", expanded)
         cv2.waitKey(1)
 
-        self.prev_time = curr_time
         return True
 
     def run(self):
-        self.last_time = time.time()
         while True:
             if not self.process_frame():
                 break
         self.cap.release()
-        self.csv_file.close()
+        self.clip_encoder.close()
+        self.recorder.close()
         cv2.destroyAllWindows()
 
 
@@ -0,0 +1,241 @@
+import math
+from collections import deque
+
+
+class RollingWindowStats:
+    """最近 window_sec 秒内各列的滑动统计，每帧 push 一次，均摊 O(1)。
+
+    与 pandas 的口径一致：None/NaN 不计入 mean/std/max（std 为样本标准差），
+    diff_mean 等价于 np.mean(np.diff(col))，窗口内含缺失值时为 NaN；
+    below_ratio 为 col < threshold 的帧数占窗口总帧数的比例。
+    """
+
+    def __init__(self, window_sec, columns, below=(), resync_every=10000):
+        self.window_sec = window_sec
+        self.columns = list(columns)
+        self.index = {c: k for k, c in enumerate(self.columns)}
+        self.below = [(self.index[c], thr) for c, thr in below]
+        self.below_index = {key: k for k, key in enumerate(below)}
+        self.resync_every = resync_every  # 每淘汰这么多帧重新求和一次，防止浮点累积误差
+
+        n = len(self.columns)
+        self.rows = deque()  # (timestamp, values)
+        self.seq = 0         # 下一帧的序号
+        self.counts = [0] * n
+        self.sums = [0.0] * n
+        self.sumsqs = [0.0] * n
+        self.missing = [0] * n
+        self.maxima = [deque() for _ in range(n)]  # 单调递减队列 (seq, value)
+        self.below_counts = [0] * len(self.below)
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.rows)
+
+    def reset(self):
+        self.__init__(self.window_sec, self.columns,
+                      [(self.columns[k], thr) for k, thr in self.below], self.resync_every)
+
+    def push(self, timestamp, row):
+        """row 为字典（按列名取值）或与 columns 等长的序列"""
+        if isinstance(row, dict):
+            values = [row.get(c) for c in self.columns]
+        else:
+            values = list(row)
+        values = [math.nan if v is None else float(v) for v in values]
+
+        for k, v in enumerate(values):
+            if math.isnan(v):
+                self.missing[k] += 1
+                continue
+            self.counts[k] += 1
+            self.sums[k] += v
+            self.sumsqs[k] += v * v
+            maxima = self.maxima[k]
+            while maxima and maxima[-1][1] <= v:
+                maxima.pop()
+            maxima.append((self.seq, v))
+        for j, (k, thr) in enumerate(self.below):
+            if values[k] < thr:
+                self.below_counts[j] += 1
+
+        self.rows.append((timestamp, values))
+        self.seq += 1
+
+        # 与 analyze_csv 相同：保留 timestamp >= 最新时间 - window_sec 的帧
+        min_time = timestamp - self.window_sec
+        while self.rows and self.rows[0][0] < min_time:
+            self._evict()
+        if self.evicted >= self.resync_every:
+            self._resync()
+
+    def _evict(self):
+        _, values = self.rows.popleft()
+        first_seq = self.seq - len(self.rows) - 1
+        for k, v in enumerate(values):
+            if math.isnan(v):
+                self.missing[k] -= 1
+                continue
+            self.counts[k] -= 1
+            self.sums[k] -= v
+            self.sumsqs[k] -= v * v
+            maxima = self.maxima[k]
+            if maxima and maxima[0][0] == first_seq:
+                maxima.popleft()
+        for j, (k, thr) in enumerate(self.below):
+            if values[k] < thr:
+                self.below_counts[j] -= 1
+        self.evicted += 1
+
+    def _resync(self):
+        for k in range(len(self.columns)):
+            vals = [values[k] for _, values in self.rows if not math.isnan(values[k])]
+            self.sums[k] = math.fsum(vals)
+            self.sumsqs[k] = math.fsum(v * v for v in vals)
+        self.evicted = 0
+
+    def mean(self, col):
+        k = self.index[col]
+        return self.sums[k] / self.counts[k] if self.counts[k] else math.nan
+
+    def std(self, col):
+        k = self.index[col]
+        n = self.counts[k]
+        if n < 2:
+            return math.nan
+        mean = self.sums[k] / n
+        var = (self.sumsqs[k] - n * mean * mean) / (n - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def max(self, col):
+        maxima = self.maxima[self.index[col]]
+        return maxima[0][1] if maxima else math.nan
+
+    def diff_mean(self, col):
+        k = self.index[col]
+        n = len(self.rows)
+        if n < 2 or self.missing[k]:
+            return math.nan
+        return (self.rows[-1][1][k] - self.rows[0][1][k]) / (n - 1)
+
+    def below_ratio(self, col, threshold):
+        if not self.rows:
+            return math.nan
+        return self.below_counts[self.below_index[(col, threshold)]] / len(self.rows)
+
+
+# monitor.py 生成建议所需的列与阈值
+SUGGESTION_COLUMNS = ["ball_v", "ball_speed", "ball_angle", "paddle1_speed", "paddle2_speed",
+                      "dist_ball_paddle1", "dist_ball_paddle2", "dist_paddle1_paddle2"]
+SUGGESTION_BELOW = [("ball_v", 0.5), ("dist_ball_paddle1", 0.2), ("dist_ball_paddle2", 0.2)]
+
+
+def suggestion_stats(window_sec):
+    return RollingWindowStats(window_sec, SUGGESTION_COLUMNS, SUGGESTION_BELOW)
+
+
+def suggestion_report(stats):
+    """由滑动统计生成与 analyze_csv 相同字段的报告"""
+    if len(stats) == 0:
+        raise ValueError("窗口内没有数据")
+
+    report = {}
+
+    # 平均速度
+    report["avg_p1_speed"] = stats.mean("paddle1_speed")
+    report["avg_p2_speed"] = stats.mean("paddle2_speed")
+
+    # 速度标准差 - 动作连贯性指标
+    report["std_p1_speed"] = stats.std("paddle1_speed")
+    report["std_p2_speed"] = stats.std("paddle2_speed")
+
+    # 加速度（速度一阶差分）
+    report["avg_p1_acc"] = stats.diff_mean("paddle1_speed")
+    report["avg_p2_acc"] = stats.diff_mean("paddle2_speed")
+    report["avg_ball_acc"] = stats.diff_mean("ball_speed")
+
+    # 与球距离
+    report["avg_dist_ball_p1"] = stats.mean("dist_ball_paddle1")
+    report["avg_dist_ball_p2"] = stats.mean("dist_ball_paddle2")
+
+    # 与对手距离
+    report["avg_dist_paddles"] = stats.mean("dist_paddle1_paddle2")
+
+    # 球速最大值
+    report["max_ball_speed"] = stats.max("ball_speed")
+
+    # 球方向平均值（绝对值表示角度变化幅度）
+    report["avg_ball_dir"] = stats.mean("ball_angle")
+
+    # 球垂直位置比例 - 比如上半场比例
+    report["upper_half_ratio"] = stats.below_ratio("ball_v", 0.5)
+
+    # 拍与己方球门距离：当前数据格式中没有对应列
+    report["avg_p1_goal_dist"] = None
+    report["avg_p2_goal_dist"] = None
+
+    # 控球时间估算：球与拍距离<阈值的比例（近距离视为控球）
+    report["p1_possession_ratio"] = stats.below_ratio("dist_ball_paddle1", 0.2)
+    report["p2_possession_ratio"] = stats.below_ratio("dist_ball_paddle2", 0.2)
+
+    return report
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+    import warnings
+
+    import numpy as np
+    import pandas as pd
+
+    from schema import FRAME_COLUMNS
+
+    warnings.simplefilter("ignore", RuntimeWarning)
+
+    def old_report(csv_path, window_sec):
+        # 原 analyze_csv 的实现：每次读整个 CSV
+        df = pd.read_csv(csv_path)
+        max_time = df["timestamp"].max()
+        w = df[(df["timestamp"] >= max_time - window_sec) & (df["timestamp"] <= max_time)]
+        return {
+            "avg_p1_speed": w["paddle1_speed"].mean(), "std_p2_speed": w["paddle2_speed"].std(),
+            "avg_p1_acc": np.mean(np.diff(w["paddle1_speed"])), "max_ball_speed": w["ball_speed"].max(),
+            "avg_ball_dir": w["ball_angle"].mean(), "upper_half_ratio": (w["ball_v"] < 0.5).sum() / len(w),
+            "p2_possession_ratio": (w["dist_ball_paddle2"] < 0.2).sum() / len(w),
+        }
+
+    # 模拟 30 分钟、30 FPS 的比赛，每秒生成一次建议
+    fps, minutes = 30, 30
+    rng = random.Random(0)
+    path = os.path.join(tempfile.mkdtemp(), "tracking_data.csv")
+    stats = suggestion_stats(1.0)
+    f = open(path, "w")
+    f.write(",".join(FRAME_COLUMNS) + "\n")
+    old_cost, new_cost = {}, {}
+    for i in range(fps * 60 * minutes + 1):
+        t = i / fps
+        row = {c: rng.random() for c in FRAME_COLUMNS}
+        row["timestamp"] = t
+        if rng.random() < 0.05:
+            row["paddle1_speed"] = None  # 偶尔丢失
+        f.write(",".join("" if row[c] is None else repr(row[c]) for c in FRAME_COLUMNS) + "\n")
+        stats.push(t, row)
+
+        if i % fps == 0 and i > 0:
+            start = time.perf_counter()
+            new = suggestion_report(stats)
+            new_cost[i // fps] = time.perf_counter() - start
+            if i % (fps * 60 * 5) == 0 or i == fps:
+                f.flush()
+                start = time.perf_counter()
+                old = old_report(path, 1.0)
+                old_cost[i // fps] = time.perf_counter() - start
+                for key, v in old.items():
+                    assert (math.isnan(v) and math.isnan(new[key])) or abs(v - new[key]) < 1e-9, (key, v, new[key])
+    f.close()
+
+    for sec in sorted(old_cost):
+        print(f"第 {sec // 60:2d} 分钟: 读CSV {old_cost[sec] * 1000:8.2f} ms   滑动统计 {new_cost[sec] * 1000:.3f} ms")
@@ -1,11 +1,9 @@
 # analysis.py
 import pandas as pd
 import numpy as np
-import json
 import time
-import requests
-import json
 import random
+from rolling_stats import RollingWindowStats
 def angle_diff(a, b):
     diff = abs(a - b) % 360
     return diff
@@ -15,6 +13,17 @@ GOAL_DIRECTION = {
     "paddle2": 0
 }
 
+PLAYER_INDEX = {"paddle1": 1, "paddle2": 2}
+
+# 前端期望的5种错误类型和对应建议
+ERROR_MAPPING = {
+    "Slow Reaction": "Try to react more quickly to incoming plays.",
+    "Low Activity": "Move more actively to stay engaged in the game.",
+    "Weak Defense": "Improve your defense to prevent goals when under threat.",
+    "Poor Alignment": "Align your movement better with the direction of the ball.",
+    "Coverage Gap": "Increase your coverage area to better influence the game."
+}
+
 
 def judge_status(row, player, speed_threshold=10):
     ball_speed = row["ball_speed_mean"]
@@ -41,14 +50,7 @@ def judge_keywords_and_advice(row, player):
     in_goal = row.get("in_goal_max", 0)
     scorer = row.get("scorer_mode", None)
 
-    # 前端期望的5种错误类型和对应建议
-    error_mapping = {
-        "Slow Reaction": "Try to react more quickly to incoming plays.",
-        "Low Activity": "Move more actively to stay engaged in the game.",
-        "Weak Defense": "Improve your defense to prevent goals when under threat.",
-        "Poor Alignment": "Align your movement better with the direction of the ball.",
-        "Coverage Gap": "Increase your coverage area to better influence the game."
-    }
+    error_mapping = ERROR_MAPPING
 
     # 分析规则（与前端期望的错误类型匹配）
     if speed_max < 0.5:
@@ -62,7 +64,8 @@ def judge_keywords_and_advice(row, player):
     if u_std < 0.0005 and v_std < 0.0005:
             problems.append("Coverage Gap")
             advices.append(error_mapping["Coverage Gap"])
-    if scorer != player and speed_mean < 0.05:
+    # scorer 是 1 / 2，player 是 "paddle1" / "paddle2"
+    if scorer != PLAYER_INDEX[player] and speed_mean < 0.05:
         problems.append("Weak Defense")
         advices.append(error_mapping["Weak Defense"])
 
@@ -101,7 +104,7 @@ def summarize_data(df):
     # 球数据
     if 'ball_speed' in df.columns:
         summary['ball_speed_mean'] = df['ball_speed'].mean()
-    if 'ball_dir' in df.columns:
+    if 'ball_angle' in df.columns:
         summary['ball_angle_mean'] = df['ball_angle'].mean()
     
     # 进球数据
@@ -115,72 +118,250 @@ def summarize_data(df):
     return summary
 
 
-def analyze_recent_round(game_id, round_id, round_history, seconds=5):
-    """分析指定游戏和回合的最近数据（使用传入数据而非 CSV），返回前端期望格式"""
+# ---------- 向量化规则引擎 ----------
+# 回合帧缓冲的列（扁平、float64，缺失值为 NaN）
+ROUND_COLUMNS = [
+    "timestamp", "ball_speed", "ball_angle",
+    "paddle1_u", "paddle1_v", "paddle1_speed", "paddle1_angle",
+    "paddle2_u", "paddle2_v", "paddle2_speed", "paddle2_angle",
+    "scorer",
+]
+_COL = {name: i for i, name in enumerate(ROUND_COLUMNS)}
+
+# 每个球员的特征（行：paddle1 / paddle2）
+PLAYER_FEATURES = ["speed_max", "speed_mean", "u_std", "v_std", "not_scorer", "align_err"]
+_FEAT = {name: i for i, name in enumerate(PLAYER_FEATURES)}
+
+# 规则表：(错误类型, [(特征, 比较, 阈值), ...])，条件全部满足即命中；顺序即输出顺序。
+# 阈值与 judge_keywords_and_advice 相同
+RULES = [
+    ("Slow Reaction", [("speed_max", "<", 0.5)]),
+    ("Low Activity", [("speed_mean", "<", 0.05)]),
+    ("Coverage Gap", [("u_std", "<", 0.0005), ("v_std", "<", 0.0005)]),
+    ("Weak Defense", [("not_scorer", ">", 0.5), ("speed_mean", "<", 0.05)]),
+    ("Poor Alignment", [("align_err", ">", 0.1)]),
+]
+
+
+def _compile_rules(rules):
+    # 条件统一成 sign * 特征 < sign * 阈值，条件 -> 规则用 0/1 矩阵聚合
+    feat_idx, signs, thresholds, owner = [], [], [], []
+    for r, (_, conditions) in enumerate(rules):
+        for name, op, threshold in conditions:
+            sign = 1.0 if op == "<" else -1.0
+            feat_idx.append(_FEAT[name])
+            signs.append(sign)
+            thresholds.append(sign * threshold)
+            owner.append(r)
+    membership = np.zeros((len(feat_idx), len(rules)), dtype=np.int64)
+    membership[np.arange(len(feat_idx)), owner] = 1
+    return (np.array(feat_idx), np.array(signs), np.array(thresholds), membership,
+            membership.sum(axis=0))
+
+
+_RULE_TABLE = _compile_rules(RULES)
+_RULE_NAMES = [name for name, _ in RULES]
+
+
+def flatten_frame(frame):
+    """CameraTracker.latest_data（嵌套 ball / paddle 字典）或扁平状态字典 -> ROUND_COLUMNS 一行"""
+    row = np.full(len(ROUND_COLUMNS), np.nan)
+    for i, name in enumerate(ROUND_COLUMNS):
+        obj, _, field = name.partition("_")
+        value = frame.get(name)
+        if value is None and isinstance(frame.get(obj), dict):
+            value = frame[obj].get(field)
+        if value is not None:
+            row[i] = value
+    return row
+
+
+class RoundBuffer:
+    """预分配的回合帧缓冲，按 ROUND_COLUMNS 存放扁平 float64 数据，容量不足时翻倍"""
+
+    def __init__(self, capacity=4096):
+        self.data = np.empty((capacity, len(ROUND_COLUMNS)))
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, frame):
+        if self.size == len(self.data):
+            self.data = np.concatenate([self.data, np.empty_like(self.data)])
+        self.data[self.size] = flatten_frame(frame)
+        self.size += 1
+
+    def clear(self):
+        self.size = 0
+
+    def frames(self):
+        return self.data[:self.size]
+
+
+# 规则用到的统计列（顺序固定，summarize_frames 与 RoundAccumulator 共用）
+STAT_COLUMNS = [f"paddle{p}_{field}" for p in (1, 2) for field in ("speed", "angle", "u", "v")] \
+    + ["ball_speed", "ball_angle"]
+_STAT_IDX = [_COL[c] for c in STAT_COLUMNS]
+
+
+def _player_features(mean, std, maximum, scorer):
+    """STAT_COLUMNS 顺序的 mean / std / max 数组 -> (PLAYER_FEATURES 矩阵 (2, F), 球的统计)"""
+    features = np.empty((2, len(PLAYER_FEATURES)))
+    features[:, _FEAT["speed_max"]] = maximum[[0, 4]]
+    features[:, _FEAT["speed_mean"]] = mean[[0, 4]]
+    features[:, _FEAT["u_std"]] = std[[2, 6]]
+    features[:, _FEAT["v_std"]] = std[[3, 7]]
+    features[:, _FEAT["not_scorer"]] = [scorer != 1, scorer != 2]
+    features[:, _FEAT["align_err"]] = np.abs(mean[9] - mean[[1, 5]])
+    return features, {"ball_speed_mean": mean[8], "ball_angle_mean": mean[9]}
+
+
+def summarize_frames(frames, scorer=None):
+    """一次性计算两名球员的全部统计量，返回 (PLAYER_FEATURES 矩阵 (2, F), 球的统计)。
+
+    frames 为 ROUND_COLUMNS 布局的二维数组。口径与 summarize_data 相同
+    （忽略缺失值，标准差 ddof=1）。scorer 为本回合得分方 1 / 2，缺省时取 scorer 列的众数。
+    """
+    x = frames[:, _STAT_IDX]
+
+    # 合并的列归约：计数、均值、最大值、离差平方和
+    valid = ~np.isnan(x)
+    count = valid.sum(axis=0)
+    filled = np.where(valid, x, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = filled.sum(axis=0) / count
+        centered = np.where(valid, x - mean, 0.0)
+        std = np.sqrt((centered * centered).sum(axis=0) / (count - 1))
+    maximum = np.where(valid, x, -np.inf).max(axis=0, initial=-np.inf)
+    maximum[count == 0] = np.nan
+
+    if scorer is None:
+        s = frames[:, _COL["scorer"]]
+        s = s[~np.isnan(s)]
+        scorer = np.bincount(s.astype(np.int64)).argmax() if len(s) else None
+    return _player_features(mean, std, maximum, scorer)
+
+
+class RoundAccumulator:
+    """回合统计的在线累加器，内存不随回合长度增长。
+
+    整个回合只记 scorer 计数（众数）；最近 tail_sec 秒：RollingWindowStats 的滑动统计与原始帧（有界尾部）。
+    进球时 analyze_recent_round 直接读取尾部统计，O(1) 完成。
+    """
+
+    def __init__(self, tail_sec=5.0):
+        self.tail_sec = tail_sec
+        self.tail = RollingWindowStats(tail_sec, STAT_COLUMNS)
+        self.clear()
+
+    def __len__(self):
+        return self.frames
+
+    def clear(self):
+        self.scorer_counts = {}
+        self.frames = 0
+        self.tail.reset()
+
+    def append(self, frame):
+        row = flatten_frame(frame)
+        scorer = row[_COL["scorer"]]
+        if not np.isnan(scorer):
+            self.scorer_counts[int(scorer)] = self.scorer_counts.get(int(scorer), 0) + 1
+        self.tail.push(row[_COL["timestamp"]], row[_STAT_IDX])
+        self.frames += 1
+
+    def scorer_mode(self):
+        if not self.scorer_counts:
+            return None
+        # 与 Series.mode().iloc[0] 相同：次数相同时取较小值
+        return min(self.scorer_counts, key=lambda s: (-self.scorer_counts[s], s))
+
+    def recent_features(self, scorer=None):
+        """最近 tail_sec 秒的球员特征，与 summarize_frames 作用于同一时间窗的结果相同"""
+        mean = np.array([self.tail.mean(c) for c in STAT_COLUMNS])
+        std = np.array([self.tail.std(c) for c in STAT_COLUMNS])
+        maximum = np.array([self.tail.max(c) for c in STAT_COLUMNS])
+        if scorer is None:
+            scorer = self.scorer_mode()
+        return _player_features(mean, std, maximum, scorer)
+
+    def tail_frames(self):
+        """最近 tail_sec 秒的原始帧 (timestamp, STAT_COLUMNS 数值)"""
+        return [(t, list(values)) for t, values in self.tail.rows]
+
+
+def judge_players(features):
+    """用规则表同时判断两名球员，返回每名球员命中的错误类型列表（按 RULES 顺序）"""
+    feat_idx, signs, thresholds, membership, required = _RULE_TABLE
+    hits = features[:, feat_idx] * signs < thresholds          # (2, 条件数)
+    fired = hits.astype(np.int64) @ membership == required     # (2, 规则数)
+    return [[_RULE_NAMES[r] for r in np.flatnonzero(fired[p])] for p in range(2)]
+
+
+def _pick(problems):
+    # 选一个随机下标（确保类型与建议配对）
+    if not problems:
+        return "", ""
+    problem = problems[random.randint(0, len(problems) - 1)]
+    return problem, ERROR_MAPPING[problem]
+
+
+def _round_result(game_id, round_id, p1_problems, p2_problems):
+    a_type, a_analysis = _pick(p1_problems)
+    b_type, b_analysis = _pick(p2_problems)
+    return {
+        "gid": int(game_id),
+        "rid": int(round_id),
+        "A_type": a_type,
+        "A_analysis": a_analysis,
+        "B_type": b_type,
+        "B_analysis": b_analysis
+    }
+
+
+def analyze_recent_round(game_id, round_id, round_history, seconds=5, scorer=None):
+    """分析本回合最近 seconds 秒的数据，返回前端期望格式。
+
+    round_history 为 RoundAccumulator（统计窗口为其 tail_sec，seconds 必须与之相同）、RoundBuffer，
+    或逐帧字典列表（CameraTracker.latest_data 或扁平状态）。scorer 为本回合得分方 1 / 2。
+    """
+    if isinstance(round_history, RoundAccumulator) and seconds != round_history.tail_sec:
+        raise ValueError(f"RoundAccumulator 只保留最近 {round_history.tail_sec} 秒，无法分析最近 {seconds} 秒")
+    empty = {
+        "gid": int(game_id),
+        "rid": int(round_id),
+        "A_type": [],
+        "A_analysis": [],
+        "B_type": [],
+        "B_analysis": []
+    }
     try:
-        # 直接使用传入的历史数据，转为 DataFrame，不做筛选
-        df_all = pd.DataFrame(round_history)
-
-        if df_all.empty:
-            return {
-                "gid": int(game_id),
-                "rid": int(round_id),
-                "A_type": [],
-                "A_analysis": [],
-                "B_type": [],
-                "B_analysis": []
-            }
-
-        # 使用最后一条的 timestamp 作为 now（不使用系统时间）
-        now = df_all["timestamp"].iloc[-1]
-        df_recent = df_all[df_all["timestamp"] >= now - seconds]
-
-        if df_recent.empty:
-            return {"error": f"No recent data (last {seconds}s) for game {game_id}, round {round_id}"}
-
-        # 汇总最近数据
-        row = summarize_data(df_recent)
-
-        # 根据 paddle1、paddle2 分别打分
-        p1_problems, p1_advices = judge_keywords_and_advice(row, "paddle1")
-        p2_problems, p2_advices = judge_keywords_and_advice(row, "paddle2")
-
-        # 选一个随机下标（确保配对）
-        if p1_problems and p1_advices:
-            idx1 = random.randint(0, min(len(p1_problems), len(p1_advices)) - 1)
-            a_type = p1_problems[idx1]
-            a_analysis = p1_advices[idx1]
+        if isinstance(round_history, RoundAccumulator):
+            if len(round_history) == 0:
+                return empty
+            p1_problems, p2_problems = judge_players(round_history.recent_features(scorer)[0])
+            return _round_result(game_id, round_id, p1_problems, p2_problems)
+
+        if isinstance(round_history, RoundBuffer):
+            frames = round_history.frames()
         else:
-            a_type = ""
-            a_analysis = ""
+            frames = np.array([flatten_frame(f) for f in round_history]).reshape(-1, len(ROUND_COLUMNS))
 
-        if p2_problems and p2_advices:
-            idx2 = random.randint(0, min(len(p2_problems), len(p2_advices)) - 1)
-            b_type = p2_problems[idx2]
-            b_analysis = p2_advices[idx2]
-        else:
-            b_type = ""
-            b_analysis = ""
+        if len(frames) == 0:
+            return empty
 
-        return {
-            "gid": int(game_id),
-            "rid": int(round_id),
-            "A_type": a_type,
-            "A_analysis": a_analysis,
-            "B_type": b_type,
-            "B_analysis": b_analysis
-        }
+        # 使用最后一条的 timestamp 作为 now（不使用系统时间）；时间戳递增，二分查找窗口起点
+        timestamps = frames[:, _COL["timestamp"]]
+        start = np.searchsorted(timestamps, timestamps[-1] - seconds, side="left")
+        features, _ = summarize_frames(frames[start:], scorer)
 
+        # 根据 paddle1、paddle2 同时打分
+        p1_problems, p2_problems = judge_players(features)
+        return _round_result(game_id, round_id, p1_problems, p2_problems)
 
     except Exception as e:
-        return {
-            "gid": int(game_id),
-            "rid": int(round_id),
-            "A_type": [],
-            "A_analysis": [],
-            "B_type": [],
-            "B_analysis": []
-        }
+        return empty
 
 
 def analyze_recent_game(game_id, result_game):
@@ -215,13 +396,66 @@ def analyze_recent_game(game_id, result_game):
 
 
 
-import json
-
-
-
 if __name__ == "__main__":
-    data = analyze_recent_game(game_id=0)  # 或者指定 round_id=0
-    print(data)
-    response = requests.post('http://172.20.10.2:45678/analysis/game/new', json=data)
-    print(response)
+    # 与原 DataFrame 路径（summarize_data + judge_keywords_and_advice）对比，并计时
+    rng = np.random.default_rng(0)
+    fps, n = 60, 60 * 20
+
+    def make_round(k):
+        history = []
+        for i in range(n):
+            frame = {"timestamp": i / fps, "scorer": 0}
+            for name in ("ball", "paddle1", "paddle2"):
+                lost = rng.random() < 0.05
+                frame[name] = {
+                    "u": None if lost else rng.random() * (0.001 if k % 3 == 0 else 1),
+                    "v": None if lost else rng.random() * (0.001 if k % 3 == 0 else 1),
+                    "speed": rng.random() * (0.08 if k % 2 else 1),
+                    "angle": rng.uniform(-180, 180),
+                }
+            history.append(frame)
+        return history
+
+    def old_analyze(history, seconds, scorer):
+        flat = [{f"{name}_{field}": frame[name][field] for name in ("ball", "paddle1", "paddle2")
+                 for field in frame[name]} | {"timestamp": frame["timestamp"], "scorer": scorer}
+                for frame in history]
+        df = pd.DataFrame(flat)
+        df = df[df["timestamp"] >= df["timestamp"].iloc[-1] - seconds]
+        row = summarize_data(df)
+        return [judge_keywords_and_advice(row, player)[0] for player in ("paddle1", "paddle2")]
+
+    t_old = t_new = t_append = t_final = 0.0
+    for k in range(20):
+        history = make_round(k)
+        buffer = RoundBuffer()
+        for frame in history:
+            buffer.append(frame)
+        scorer = 1 + k % 2
+
+        start = time.perf_counter()
+        expected = old_analyze(history, 5, scorer)
+        t_old += time.perf_counter() - start
+        start = time.perf_counter()
+        frames = buffer.frames()
+        timestamps = frames[:, _COL["timestamp"]]
+        begin = np.searchsorted(timestamps, timestamps[-1] - 5, side="left")
+        got = judge_players(summarize_frames(frames[begin:], scorer)[0])
+        t_new += time.perf_counter() - start
+        assert got == expected, (k, got, expected)
+
+        # 在线累加器：尾部统计与窗口结果相同
+        accumulator = RoundAccumulator(tail_sec=5)
+        start = time.perf_counter()
+        for frame in history:
+            accumulator.append(frame)
+        t_append += time.perf_counter() - start
+        start = time.perf_counter()
+        got = judge_players(accumulator.recent_features(scorer)[0])
+        t_final += time.perf_counter() - start
+        assert got == expected, (k, got, expected)
+        assert len(accumulator.tail) <= 5 * fps + 1
+    print(f"20 个回合结果一致：DataFrame {t_old / 20 * 1000:.2f} ms/回合，向量化 {t_new / 20 * 1000:.3f} ms/回合")
+    print(f"累加器：每帧 {t_append / (20 * n) * 1e6:.1f} us，进球时 {t_final / 20 * 1000:.3f} ms/回合，"
+          f"尾部最多 {5 * fps + 1} 帧")
 
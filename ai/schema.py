@@ -0,0 +1,34 @@
+"""CSV 逐帧数据格式，训练与追踪脚本共用（不依赖 OpenCV）"""
+
+# 所有追踪脚本共用的逐帧输出格式（CSV 列顺序）
+FRAME_COLUMNS = [
+    "timestamp",
+    "ball_u", "ball_v", "ball_speed", "ball_acc", "ball_angle",
+    "paddle1_u", "paddle1_v", "paddle1_speed", "paddle1_acc", "paddle1_angle",
+    "paddle2_u", "paddle2_v", "paddle2_speed", "paddle2_acc", "paddle2_angle",
+    "dist_ball_paddle1", "dist_ball_paddle2",
+    "dist_paddle1_paddle2",
+    "dist_ball_goal",
+    "in_goal", "scorer", "round_id", "game_id",
+]
+
+# LSTM 等模型使用的 19 维特征（timestamp 之后、in_goal 之前的列）
+FEATURE_COLUMNS = FRAME_COLUMNS[1:20]
+
+# 旧版 monitor.py 输出的列名
+LEGACY_COLUMN_ALIASES = {
+    "ball_dir": "ball_angle",
+    "paddle1_dir": "paddle1_angle",
+    "paddle2_dir": "paddle2_angle",
+}
+
+
+def normalize_columns(df):
+    """把旧 CSV 的列名统一为 FRAME_COLUMNS 的命名"""
+    rename = {k: v for k, v in LEGACY_COLUMN_ALIASES.items() if k in df.columns and v not in df.columns}
+    return df.rename(columns=rename) if rename else df
+
+
+def state_row(state):
+    """按 FRAME_COLUMNS 顺序取出一行"""
+    return [state[c] for c in FRAME_COLUMNS]
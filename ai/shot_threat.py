@@ -0,0 +1,125 @@
+import argparse
+
+import numpy as np
+
+from hhhh import intercept_threat_batch
+
+# 每帧威胁评估的输出列
+THREAT_COLUMNS = ["shot_prob", "attacker", "intercept_u", "intercept_v", "intercept_time",
+                  "defender_dist", "defender_reach", "reachable"]
+
+
+def shot_threat(
+    ball_v, ball_speed, ball_angle,
+    paddle1_u, paddle1_v, paddle1_speed,
+    paddle2_u, paddle2_v, paddle2_speed,
+    goal_v_min=0.33, goal_v_max=0.66,
+    paddle_radius=0.08,
+    field_width=1.0, field_height=1.0,
+    max_time=10.0,
+    dt=0.01
+):
+    """一次向量化计算整段轨迹每一帧的射门威胁，口径与 hhhh.predict_both_scores 相同。
+
+    参数为等长数组（缺失值为 NaN），返回 {列名: 数组}：
+      shot_prob      进攻方得分概率，不构成射门或数据缺失时为 0
+      attacker       进攻方 1 / 2，不构成射门时为 0
+      intercept_u/v  球到达球门线的位置，intercept_time 到达时间 (s)
+      defender_dist  防守方到到达点的距离，defender_reach 到达前能移动的距离
+      reachable      防守方能否在球到达前赶到
+    """
+    core = intercept_threat_batch(ball_v, ball_speed, ball_angle,
+                                  paddle1_u, paddle1_v, paddle1_speed,
+                                  paddle2_u, paddle2_v, paddle2_speed,
+                                  goal_v_min, goal_v_max, paddle_radius, field_width, field_height,
+                                  max_time, dt)
+    left, found, prob = core["left"], core["found"], core["prob"]
+    # 防守方位置缺失时无法判断，按 predict_both_scores 的输入要求视为不可评估
+    valid = found & ~np.isnan(prob)
+
+    return {
+        "shot_prob": np.where(valid, prob, 0.0),
+        "attacker": np.where(valid, np.where(left, 2, 1), 0),
+        "intercept_u": np.where(valid, core["intercept_u"], np.nan),
+        "intercept_v": np.where(valid, core["intercept_v"], np.nan),
+        "intercept_time": np.where(valid, core["intercept_time"], np.nan),
+        "defender_dist": np.where(valid, core["defender_dist"], np.nan),
+        "defender_reach": np.where(valid, core["defender_reach"], np.nan),
+        "reachable": valid & (core["defender_reach"] >= core["defender_dist"]),
+    }
+
+
+def frame_threat(df, **kwargs):
+    """对逐帧 DataFrame（FRAME_COLUMNS 格式）计算威胁，返回附加了 THREAT_COLUMNS 的副本"""
+    threat = shot_threat(
+        df["ball_v"].to_numpy(dtype=np.float64), df["ball_speed"].to_numpy(dtype=np.float64),
+        df["ball_angle"].to_numpy(dtype=np.float64),
+        df["paddle1_u"].to_numpy(dtype=np.float64), df["paddle1_v"].to_numpy(dtype=np.float64),
+        df["paddle1_speed"].to_numpy(dtype=np.float64),
+        df["paddle2_u"].to_numpy(dtype=np.float64), df["paddle2_v"].to_numpy(dtype=np.float64),
+        df["paddle2_speed"].to_numpy(dtype=np.float64),
+        **kwargs)
+    out = df.copy()
+    for name in THREAT_COLUMNS:
+        out[name] = threat[name]
+    return out
+
+
+def round_summary(threat_df, danger=0.7):
+    """按 (game_id, round_id) 汇总：各方最大威胁、危险帧数（shot_prob >= danger）与最危险时刻"""
+    prob, attacker = threat_df["shot_prob"], threat_df["attacker"]
+    df = threat_df.assign(danger=prob >= danger,
+                          p1_threat=prob.where(attacker == 1), p2_threat=prob.where(attacker == 2))
+    keys = ["game_id", "round_id"]
+    summary = df.groupby(keys).agg(
+        frames=("shot_prob", "size"),
+        max_threat=("shot_prob", "max"),
+        danger_frames=("danger", "sum"),
+        p1_max=("p1_threat", "max"),
+        p2_max=("p2_threat", "max"),
+    )
+    peak = df.loc[df.groupby(keys)["shot_prob"].idxmax(), keys + ["timestamp", "ball_u", "ball_v"]]
+    return summary.join(peak.set_index(keys).add_prefix("peak_")).reset_index()
+
+
+def threat_heatmap(threat_df, bins=20, danger=0.7, attacker=None):
+    """危险时刻（shot_prob >= danger）球所在位置的二维直方图，返回 (counts, u_edges, v_edges)"""
+    mask = threat_df["shot_prob"] >= danger
+    if attacker is not None:
+        mask &= threat_df["attacker"] == attacker
+    return np.histogram2d(threat_df.loc[mask, "ball_u"], threat_df.loc[mask, "ball_v"],
+                          bins=bins, range=[[0, 1], [0, 1]])
+
+
+def main():
+    import time
+
+    from recorder import load_recording
+    from schema import normalize_columns
+
+    parser = argparse.ArgumentParser(description="逐帧射门威胁评估：每回合汇总与危险位置热力图")
+    parser.add_argument("recording", help="CSV 文件或 FrameRecorder 分片目录")
+    parser.add_argument("--danger", type=float, default=0.7, help="视为危险的得分概率阈值")
+    parser.add_argument("--bins", type=int, default=20)
+    parser.add_argument("-o", "--output", default=None, help="保存逐帧结果与热力图的 .npz")
+    args = parser.parse_args()
+
+    df = normalize_columns(load_recording(args.recording))
+    start = time.perf_counter()
+    threat_df = frame_threat(df)
+    elapsed = time.perf_counter() - start
+    print(f"{len(df)} 帧，计算用时 {elapsed * 1000:.1f} ms")
+
+    summary = round_summary(threat_df, args.danger)
+    print(summary.to_string(index=False))
+
+    heatmaps = {f"player{p}": threat_heatmap(threat_df, args.bins, args.danger, attacker=p)[0]
+                for p in (1, 2)}
+    if args.output:
+        np.savez(args.output, **{name: threat_df[name].to_numpy() for name in THREAT_COLUMNS},
+                 timestamp=threat_df["timestamp"].to_numpy(), **heatmaps)
+        print(f"已保存 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+import argparse
+import time
+
+import numpy as np
+
+from recorder import FrameRecorder
+from schema import FRAME_COLUMNS
+
+
+def _param(rng, value, n, integer=False):
+    """value 为常数或 (最小, 最大) 区间；区间时每张球桌随机取一个值"""
+    if np.ndim(value) == 0:
+        return np.full(n, value, dtype=np.int64 if integer else np.float64)
+    low, high = value
+    return rng.integers(low, high + 1, n) if integer else rng.uniform(low, high, n)
+
+
+class AirHockeySim:
+    """无界面、向量化的桌上冰球模拟：n_tables 张球桌的状态都是 (n_tables,) 数组，一次 step() 推进所有球桌一帧。
+
+    物理与 AI 与 game.py 相同（像素坐标、每帧位移、反应延迟 reaction_delay 帧的预测球拍），
+    默认参数下单张球桌与 game.py 逐帧一致。ball_jitter / reaction_delay / skill / deflect 给区间时
+    每张球桌取不同的值，用来生成水平不同的对局。
+
+    step() 返回一帧的 FRAME_COLUMNS 数据（归一化 u/v 坐标，速度为 每秒 u/v，角度为度），
+    与追踪引擎输出的 CSV 口径相同：paddle1 为上方球拍，球进入上方球门记为 player 2 得分（scorer=2）。
+    每个进球结束一个回合，先得 points_to_win 分结束一局，球桌随即开始新的一局（game_id 全局递增）。
+    """
+
+    def __init__(self, n_tables=1024, seed=0, fps=30, width=640, height=480, ball_radius=15,
+                 paddle_radius=25, goal_band=(0.33, 0.67), ball_speed=(8.0, 7.0), ball_jitter=0.0,
+                 reaction_delay=3, skill=1.0, deflect=0.0, noise=0.0, points_to_win=7, table_offset=1e6,
+                 first_table=0, first_game_id=1):
+        self.n = n_tables
+        self.rng = np.random.default_rng(seed)
+        self.fps = fps
+        self.W, self.H = width, height
+        self.r, self.R = ball_radius, paddle_radius
+        self.goal_x = (width * goal_band[0], width * goal_band[1])
+        self.serve = ball_speed
+        self.ball_jitter = ball_jitter
+        self.deflect = _param(self.rng, deflect, n_tables)
+        self.noise = noise
+        self.points_to_win = points_to_win
+
+        # 球拍按 [上, 下] 排列，形状 (2, n_tables)
+        self.delay = np.stack([_param(self.rng, reaction_delay, n_tables, integer=True) for _ in range(2)])
+        self.skill = np.stack([_param(self.rng, skill, n_tables) for _ in range(2)])
+
+        n = n_tables
+        self.ball = np.tile([[width // 2], [height // 2]], n).astype(np.float64)  # (2, n): x, y
+        self.vel = np.tile([[ball_speed[0]], [ball_speed[1]]], n).astype(np.float64)
+        self.paddle_x = np.full((2, n), float(width // 2))
+        self.paddle_y = np.stack([np.full(n, float(paddle_radius + 20)),
+                                  np.full(n, float(height - paddle_radius - 20))])
+        self.target_x = self.paddle_x.copy()
+        self.target_y = self.paddle_y.copy()
+        self.y_min = np.array([[paddle_radius], [height // 2 + paddle_radius]], dtype=np.float64)
+        self.y_max = np.array([[height // 2 - paddle_radius], [height - paddle_radius]], dtype=np.float64)
+
+        self.frame = 0
+        self.score = np.zeros((2, n), dtype=np.int64)  # player 1, player 2
+        self.round_id = np.ones(n, dtype=np.int64)
+        self.game_id = first_game_id + np.arange(n)
+        self.next_game_id = first_game_id + n
+        # 各球桌时间互不重叠，合并后按 timestamp 排序不会交错；first_table 用于分组模拟时接续编号
+        self.t0 = (first_table + np.arange(n)) * table_offset
+        self.prev_speed = np.full((3, n), np.nan)
+
+    def _serve(self, mask, vy):
+        """mask 中的球放回中心重新发球，横向方向随机"""
+        k = int(mask.sum())
+        if k == 0:
+            return
+        scale = 1.0
+        if self.ball_jitter:
+            scale = self.rng.uniform(1 - self.ball_jitter, 1 + self.ball_jitter, k)
+        self.ball[0, mask] = self.W // 2
+        self.ball[1, mask] = self.H // 2
+        self.vel[0, mask] = self.rng.choice([-1.0, 1.0], k) * self.serve[0] * scale
+        self.vel[1, mask] = vy * self.serve[1] * scale
+
+    def step(self):
+        W, H, r, R = self.W, self.H, self.r, self.R
+        ball, vel = self.ball, self.vel
+
+        # 球运动，左右边界反弹
+        ball += vel
+        vel[0] = np.where((ball[0] - r <= 0) | (ball[0] + r >= W), -vel[0], vel[0])
+
+        # 上下边界：落在球门范围内为进球，否则反弹（记录进球瞬间的位置与速度）
+        seen_ball, seen_vel = ball.copy(), vel.copy()
+        in_band = (self.goal_x[0] < ball[0]) & (ball[0] < self.goal_x[1])
+        top = ball[1] - r <= 0
+        top_goal = top & in_band
+        vel[1] = np.where(top & ~in_band, np.abs(vel[1]), vel[1])
+        self._serve(top_goal, 1.0)
+        bottom = ball[1] + r >= H
+        in_band = (self.goal_x[0] < ball[0]) & (ball[0] < self.goal_x[1])
+        bottom_goal = bottom & in_band
+        vel[1] = np.where(bottom & ~in_band, -np.abs(vel[1]), vel[1])
+        self._serve(bottom_goal, -1.0)
+
+        # 两个 AI 球拍：预测球到达球拍所在高度时的 x（左右反弹展开为周期 2W 的三角波）
+        with np.errstate(divide="ignore", invalid="ignore"):
+            frames_to_reach = (self.paddle_y - ball[1]) / vel[1]
+        predicted_x = np.where(vel[1] != 0, ball[0] + vel[0] * frames_to_reach, ball[0])
+        m = np.mod(predicted_x, 2 * W)
+        predicted_x = np.where((predicted_x >= 0) & (predicted_x <= W), predicted_x,
+                               np.where(m <= W, m, 2 * W - m))
+        target_y = np.stack([np.minimum(H // 2 - R, np.maximum(R, ball[1])),
+                             np.maximum(H // 2 + R, np.minimum(H - R, ball[1]))])
+        update = self.frame % self.delay == 0
+        self.target_x = np.where(update, predicted_x, self.target_x)
+        self.target_y = np.where(update, target_y, self.target_y)
+
+        speed = np.minimum(8, np.maximum(3, np.abs(vel[1]) * 0.6)) * self.skill
+        old_x, old_y = self.paddle_x, self.paddle_y
+        self.paddle_x = np.clip(old_x + np.where(self.target_x > old_x, speed, -speed), R, W - R)
+        self.paddle_y = np.clip(old_y + np.where(self.target_y > old_y, speed, -speed), self.y_min, self.y_max)
+
+        # 球拍击球：上方球拍把球打向下方，下方球拍打向上方；deflect 按击球点偏移改变横向速度
+        hit = np.hypot(ball[0] - self.paddle_x, ball[1] - self.paddle_y) <= r + R
+        vel[1] = np.where(hit[0], np.abs(vel[1]), vel[1])
+        vel[1] = np.where(hit[1], -np.abs(vel[1]), vel[1])
+        offset = np.where(hit, (ball[0] - self.paddle_x) / (r + R), 0.0).sum(axis=0)
+        vel[0] += self.deflect * offset * self.serve[0]
+
+        frame = self._emit(seen_ball, seen_vel, old_x, old_y, top_goal, bottom_goal)
+
+        # 计分、回合与对局
+        goal = top_goal | bottom_goal
+        self.score[1] += top_goal
+        self.score[0] += bottom_goal
+        self.round_id += goal
+        finished = self.score.max(axis=0) >= self.points_to_win
+        k = int(finished.sum())
+        if k:
+            self.score[:, finished] = 0
+            self.round_id[finished] = 1
+            self.game_id[finished] = self.next_game_id + np.arange(k)
+            self.next_game_id += k
+        self.frame += 1
+        return frame
+
+    def _emit(self, ball, ball_vel, old_x, old_y, top_goal, bottom_goal):
+        W, H, fps = self.W, self.H, self.fps
+        u = np.stack([ball[0] / W, self.paddle_x[0] / W, self.paddle_x[1] / W])
+        v = np.stack([ball[1] / H, self.paddle_y[0] / H, self.paddle_y[1] / H])
+        if self.noise:
+            u = u + self.rng.normal(0, self.noise, u.shape)
+            v = v + self.rng.normal(0, self.noise, v.shape)
+        # 速度为每秒 u/v；球用当前速度，球拍用本帧实际位移
+        vu = np.stack([ball_vel[0], self.paddle_x[0] - old_x[0], self.paddle_x[1] - old_x[1]]) / W * fps
+        vv = np.stack([ball_vel[1], self.paddle_y[0] - old_y[0], self.paddle_y[1] - old_y[1]]) / H * fps
+        speed = np.hypot(vu, vv)
+        angle = np.where(speed < 0.01, 0.0, np.degrees(np.arctan2(vv, vu)))
+        acc = (speed - self.prev_speed) * fps
+        self.prev_speed = speed
+
+        frame = {"timestamp": self.t0 + self.frame / fps}
+        for k, name in enumerate(["ball", "paddle1", "paddle2"]):
+            frame[f"{name}_u"] = u[k]
+            frame[f"{name}_v"] = v[k]
+            frame[f"{name}_speed"] = speed[k]
+            frame[f"{name}_acc"] = acc[k]
+            frame[f"{name}_angle"] = angle[k]
+        frame["dist_ball_paddle1"] = np.hypot(u[0] - u[1], v[0] - v[1])
+        frame["dist_ball_paddle2"] = np.hypot(u[0] - u[2], v[0] - v[2])
+        frame["dist_paddle1_paddle2"] = np.hypot(u[1] - u[2], v[1] - v[2])
+        frame["dist_ball_goal"] = u[0]  # 与 TrackingEngine 的定义相同
+        frame["in_goal"] = (top_goal | bottom_goal).astype(np.int32)
+        frame["scorer"] = np.where(top_goal, 2, np.where(bottom_goal, 1, 0)).astype(np.int32)
+        frame["round_id"] = self.round_id.astype(np.int32)
+        frame["game_id"] = self.game_id.astype(np.int32)
+        return frame
+
+    def run(self, n_frames, chunk_frames=300):
+        """推进 n_frames 帧，每 chunk_frames 帧产出一块 {列名: 一维数组}，块内按球桌、时间排序"""
+        done = 0
+        while done < n_frames:
+            steps = min(chunk_frames, n_frames - done)
+            block = {c: np.empty((self.n, steps), dtype=np.int32 if c in ("in_goal", "scorer", "round_id", "game_id")
+                                 else np.float64) for c in FRAME_COLUMNS}
+            for k in range(steps):
+                for c, values in self.step().items():
+                    block[c][:, k] = values
+            done += steps
+            yield {c: values.reshape(-1) for c, values in block.items()}
+
+
+def simulate_to(path, n_tables, n_frames, fmt="npz", partition_by=(), max_rows=1 << 21, seed=0, **params):
+    """模拟并写入 FrameRecorder（.csv 单文件或分片目录），返回帧数。
+
+    各球桌的时间互不重叠，输出按球桌、时间排列，即按 timestamp 升序，可直接交给 consolidate 流式归并。
+    为此球桌分组模拟：每组 max_rows // n_frames 张球桌跑完全部帧后整组写出，内存约为 max_rows 行。
+    """
+    group = max(1, min(n_tables, max_rows // max(n_frames, 1)))
+    recorder = FrameRecorder(path, fmt=fmt, block_rows=65536, rotate_by=partition_by, max_pending=2)
+    rows = 0
+    next_game_id = 1
+    try:
+        for first in range(0, n_tables, group):
+            sim = AirHockeySim(min(group, n_tables - first), seed=seed + first, first_table=first,
+                               first_game_id=next_game_id, **params)
+            for block in sim.run(n_frames, chunk_frames=n_frames):  # 一整块：按球桌、时间排序
+                recorder.append_block(block)
+                rows += len(block["timestamp"])
+            next_game_id = sim.next_game_id
+    finally:
+        recorder.close()
+    return rows
+
+
+def benchmark(n_frames=3000):
+    """与 game.py 的逐帧循环（去掉 pygame 渲染）对比第一个进球前的轨迹，并测量不同球桌数下的吞吐量"""
+    import math
+
+    def game_py(n_frames, width=640, height=480):
+        # game.py 的物理与 AI，逐帧返回 (球, 上球拍, 下球拍) 位置；进球时停止（之后发球方向随机）
+        ball_pos, ball_vel, ball_radius, paddle_radius = [width // 2, height // 2], [8, 7], 15, 25
+        top, bottom = [width // 2, paddle_radius + 20], [width // 2, height - paddle_radius - 20]
+        goal_x_min, goal_x_max = width * 0.33, width * 0.67
+        reaction_delay, frame_count = 3, 0
+        last_top, last_bottom = tuple(top), tuple(bottom)
+        trace = []
+        for _ in range(n_frames):
+            ball_pos[0] += ball_vel[0]
+            ball_pos[1] += ball_vel[1]
+            if ball_pos[0] - ball_radius <= 0 or ball_pos[0] + ball_radius >= width:
+                ball_vel[0] = -ball_vel[0]
+            if ball_pos[1] - ball_radius <= 0:
+                if goal_x_min < ball_pos[0] < goal_x_max:
+                    break
+                ball_vel[1] = abs(ball_vel[1])
+            if ball_pos[1] + ball_radius >= height:
+                if goal_x_min < ball_pos[0] < goal_x_max:
+                    break
+                ball_vel[1] = -abs(ball_vel[1])
+
+            adaptive_speed = min(8, max(3, abs(ball_vel[1]) * 0.6))
+            for pos, y_target in ((top, min(height // 2 - paddle_radius, max(paddle_radius, ball_pos[1]))),
+                                  (bottom, max(height // 2 + paddle_radius, min(height - paddle_radius, ball_pos[1])))):
+                predicted_x = ball_pos[0] + ball_vel[0] * (pos[1] - ball_pos[1]) / ball_vel[1]
+                while predicted_x < 0 or predicted_x > width:
+                    predicted_x = -predicted_x if predicted_x < 0 else 2 * width - predicted_x
+                if frame_count % reaction_delay == 0:
+                    if pos is top:
+                        last_top = (predicted_x, y_target)
+                    else:
+                        last_bottom = (predicted_x, y_target)
+                last = last_top if pos is top else last_bottom
+                pos[0] += adaptive_speed if last[0] > pos[0] else -adaptive_speed
+                pos[1] += adaptive_speed if last[1] > pos[1] else -adaptive_speed
+            frame_count += 1
+            top[0] = max(paddle_radius, min(width - paddle_radius, top[0]))
+            top[1] = max(paddle_radius, min(height // 2 - paddle_radius, top[1]))
+            bottom[0] = max(paddle_radius, min(width - paddle_radius, bottom[0]))
+            bottom[1] = max(height // 2 + paddle_radius, min(height - paddle_radius, bottom[1]))
+            if math.hypot(ball_pos[0] - top[0], ball_pos[1] - top[1]) <= ball_radius + paddle_radius:
+                ball_vel[1] = abs(ball_vel[1])
+            if math.hypot(ball_pos[0] - bottom[0], ball_pos[1] - bottom[1]) <= ball_radius + paddle_radius:
+                ball_vel[1] = -abs(ball_vel[1])
+            trace.append(ball_pos[:2] + top[:2] + bottom[:2])
+        return np.array(trace, dtype=np.float64)
+
+    start = time.perf_counter()
+    expected = game_py(n_frames)
+    t_loop = (time.perf_counter() - start) / max(len(expected), 1)
+
+    sim = AirHockeySim(1)
+    trace = []
+    for _ in range(len(expected)):
+        f = sim.step()
+        trace.append([f["ball_u"][0] * 640, f["ball_v"][0] * 480, f["paddle1_u"][0] * 640,
+                      f["paddle1_v"][0] * 480, f["paddle2_u"][0] * 640, f["paddle2_v"][0] * 480])
+    np.testing.assert_allclose(np.array(trace), expected, atol=1e-9)
+    print(f"game.py 前 {len(expected)} 帧轨迹一致；game.py 逻辑单独运行 {1 / t_loop:,.0f} 帧/秒（实际锁定 60 帧/秒）")
+
+    for n_tables in [1, 64, 1024, 4096]:
+        sim = AirHockeySim(n_tables, ball_jitter=0.3, reaction_delay=(2, 6), skill=(0.6, 1.2), deflect=(0.0, 0.3))
+        steps = max(300, 400000 // n_tables)
+        start = time.perf_counter()
+        goals = 0
+        for block in sim.run(steps):
+            goals += int(block["in_goal"].sum())
+        elapsed = time.perf_counter() - start
+        rate = n_tables * steps / elapsed
+        print(f"{n_tables:5d} 张球桌：{rate:12,.0f} 帧/秒（实时 30 FPS 的 {rate / 30:,.0f} 倍），{goals} 个进球")
+
+    # 含写盘的端到端吞吐量：不分区 vs 按 game_id 分区
+    import os
+    import shutil
+    import tempfile
+
+    import pandas as pd
+
+    from consolidate import consolidate
+    from dataset_builder import load_goal_windows, load_sorted, select_goal_windows
+    from recorder import load_recording
+
+    out = tempfile.mkdtemp()
+    params = dict(ball_jitter=0.3, reaction_delay=(2, 6), skill=(0.6, 1.2), deflect=(0.0, 0.3))
+    for partition_by in [(), ("game_id",)]:
+        path = os.path.join(out, "_".join(partition_by) or "flat")
+        start = time.perf_counter()
+        rows = simulate_to(path, 256, 900, partition_by=partition_by, **params)
+        elapsed = time.perf_counter() - start
+        n_files = sum(len(files) for _, _, files in os.walk(path))
+        print(f"simulate_to 分区 {partition_by or '无'}：{rows / elapsed:12,.0f} 帧/秒，{n_files} 个文件")
+
+    # 往返：多组模拟 -> consolidate 流式归并 -> dataset_builder，与整表排序后的结果相同
+    path = os.path.join(out, "roundtrip")
+    simulate_to(path, 32, 1800, max_rows=8 * 1800, **params)
+    expected = load_recording(path).sort_values("timestamp", kind="stable").reset_index(drop=True)
+    assert expected.groupby("game_id")["timestamp"].agg(lambda t: t.max() - t.min()).max() < 1e6  # 对局不跨球桌
+    merged = os.path.join(out, "merged.csv")
+    consolidate([path], merged)
+    windows = load_goal_windows(merged, cache_dir=os.path.join(out, "cache"))
+    pd.testing.assert_frame_equal(windows, select_goal_windows(expected), check_dtype=False)
+    simulate_to(os.path.join(out, "roundtrip.csv"), 32, 1800, max_rows=8 * 1800, **params)
+    pd.testing.assert_frame_equal(load_sorted(os.path.join(out, "roundtrip.csv")), expected, check_dtype=False)
+    print(f"往返一致：simulate_to -> consolidate -> load_goal_windows，{len(expected)} 帧，{len(windows)} 个窗口行")
+    shutil.rmtree(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="无界面向量化桌上冰球模拟，生成与追踪 CSV 同格式的训练数据")
+    parser.add_argument("-o", "--output", default="sim_data", help="以 .csv 结尾时写单个 CSV，否则写分片目录")
+    parser.add_argument("--format", default="npz", choices=["npz", "parquet", "csv"])
+    parser.add_argument("--tables", type=int, default=1024, help="并行模拟的球桌数")
+    parser.add_argument("--seconds", type=float, default=600, help="每张球桌模拟的秒数")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--points", type=int, default=7, help="先得几分结束一局")
+    parser.add_argument("--classic", action="store_true", help="使用 game.py 的固定参数，不随机化球速与球拍水平")
+    parser.add_argument("--noise", type=float, default=0.005, help="坐标观测噪声（u/v 标准差）")
+    parser.add_argument("--partition-by", default="", help="按列分子目录，如 game_id；默认不分区")
+    args = parser.parse_args()
+
+    params = dict(seed=args.seed, fps=args.fps, points_to_win=args.points, noise=args.noise)
+    if not args.classic:
+        params.update(ball_jitter=0.3, reaction_delay=(2, 6), skill=(0.6, 1.2), deflect=(0.0, 0.3))
+    start = time.perf_counter()
+    partition_by = tuple(c for c in args.partition_by.split(",") if c)
+    rows = simulate_to(args.output, args.tables, int(args.seconds * args.fps), args.format,
+                       partition_by=partition_by, **params)
+    elapsed = time.perf_counter() - start
+    print(f"✅ {rows} 帧 -> {args.output}，用时 {elapsed:.1f}s（{rows / elapsed:,.0f} 帧/秒）")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ["--benchmark"]:
+        benchmark()
+    else:
+        main()
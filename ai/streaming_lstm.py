@@ -0,0 +1,126 @@
+import torch
+import torch.nn.functional as F
+
+
+class StreamingLSTM:
+    """LSTMClassifier 的流式推理：在两次调用之间保留 (h, c)，每次只输入新到的帧。
+
+    从 reset() 开始依次输入的所有帧，与把它们一次性交给 model(x, lengths) 的结果相同，
+    每次更新的代价只与新帧数有关。进球或回合切换时调用 reset()。
+    """
+
+    def __init__(self, model, device="cpu"):
+        self.model = model
+        self.device = device
+        self.reset()
+
+    def reset(self):
+        self.state = None
+        self.steps = 0
+        self.logits = None
+
+    @torch.no_grad()
+    def step(self, frames):
+        """frames: (T_new, features) 的数组或张量，返回输入到目前为止的 logits (num_classes,)"""
+        x = torch.as_tensor(frames, dtype=torch.float32, device=self.device)
+        if x.dim() == 1:
+            x = x.unsqueeze(0)
+        if x.shape[0] == 0:
+            return self.logits
+        _, self.state = self.model.lstm(x.unsqueeze(0), self.state)
+        self.steps += x.shape[0]
+        self.logits = self.model.fc(self.state[0][-1])[0]
+        return self.logits
+
+    def probs(self):
+        if self.logits is None:
+            return None
+        return F.softmax(self.logits, dim=0).cpu().numpy()
+
+
+class StaggeredStreamingLSTM:
+    """用两条错开 horizon_sec / 2 重启的流近似滑动窗口：
+    输出取较早开始的那条流，其上下文长度始终在 horizon_sec / 2 到 horizon_sec 之间，
+    与训练时使用的有限长度窗口一致，同时保持每帧 O(1) 的代价。"""
+
+    def __init__(self, model, device="cpu", horizon_sec=2.0):
+        self.horizon_sec = horizon_sec
+        self.streams = [StreamingLSTM(model, device), StreamingLSTM(model, device)]
+        self.reset()
+
+    def reset(self):
+        for s in self.streams:
+            s.reset()
+        self.start_times = [None, None]
+        self.origin = None
+
+    def step(self, timestamp, frames):
+        if self.origin is None:
+            self.origin = timestamp
+        half = self.horizon_sec / 2
+        for k, s in enumerate(self.streams):
+            start = self.start_times[k]
+            if start is not None and timestamp - start >= self.horizon_sec:
+                s.reset()
+                self.start_times[k] = None
+            # 第二条流比第一条晚 half 秒开始
+            if self.start_times[k] is None and timestamp - self.origin >= k * half:
+                self.start_times[k] = timestamp
+            if self.start_times[k] is not None:
+                s.step(frames)
+
+        active = [k for k in (0, 1) if self.start_times[k] is not None]
+        oldest = min(active, key=lambda k: self.start_times[k])
+        return self.streams[oldest].logits
+
+    def probs(self):
+        active = [k for k in (0, 1) if self.start_times[k] is not None]
+        if not active:
+            return None
+        return self.streams[min(active, key=lambda k: self.start_times[k])].probs()
+
+
+if __name__ == "__main__":
+    import time
+
+    from model import LSTMClassifier
+
+    # 一致性检查：分块流式输入 vs 整段 pack_padded_sequence 前向
+    torch.manual_seed(0)
+    model = LSTMClassifier(input_size=19, hidden_size=64, num_layers=1, num_classes=2).eval()
+    seq = torch.randn(300, 19)
+    with torch.no_grad():
+        expected = model(seq.unsqueeze(0), torch.tensor([len(seq)]))[0]
+
+    stream = StreamingLSTM(model)
+    pos = 0
+    for chunk in [1, 5, 17, 1, 100, 176]:
+        stream.step(seq[pos:pos + chunk])
+        pos += chunk
+    assert torch.allclose(stream.logits, expected, atol=1e-5), (stream.logits, expected)
+    print(f"一致性检查通过：最大误差 {(stream.logits - expected).abs().max().item():.2e}")
+
+    # 错开的两条流：输出应等于从较早那条流的起点开始的窗口前向
+    staggered = StaggeredStreamingLSTM(model, horizon_sec=2.0)
+    for k in range(len(seq)):
+        logits = staggered.step(k / 60, seq[k])
+    start_idx = round(min(t for t in staggered.start_times if t is not None) * 60)
+    with torch.no_grad():
+        expected = model(seq[start_idx:].unsqueeze(0), torch.tensor([len(seq) - start_idx]))[0]
+    assert torch.allclose(logits, expected, atol=1e-5)
+    print(f"错开双流：上下文 {len(seq) - start_idx} 帧，与窗口前向一致")
+
+    # 每帧更新的代价：窗口重算（2 秒 / 60 FPS = 120 帧）vs 流式单帧
+    window = seq[:120].unsqueeze(0)
+    n = 500
+    with torch.no_grad():
+        start = time.perf_counter()
+        for _ in range(n):
+            model(window, torch.tensor([120]))
+        t_window = (time.perf_counter() - start) / n
+    stream.reset()
+    start = time.perf_counter()
+    for k in range(n):
+        stream.step(seq[k % 300])
+    t_stream = (time.perf_counter() - start) / n
+    print(f"窗口重算 {t_window * 1e3:.2f} ms/次，流式 {t_stream * 1e3:.2f} ms/帧")
@@ -1,8 +1,9 @@
 import pandas as pd
 import numpy as np
+from schema import normalize_columns
 
 def analyze_csv(csv_path, window_sec=1.0):
-    df = pd.read_csv(csv_path)
+    df = normalize_columns(pd.read_csv(csv_path))
 
     if len(df) == 0:
         raise ValueError("CSV文件为空")
@@ -34,7 +35,7 @@ def analyze_csv(csv_path, window_sec=1.0):
     report["max_ball_speed"] = window_df["ball_speed"].max()
 
     # 球运动方向
-    report["avg_ball_dir"] = window_df["ball_dir"].mean()
+    report["avg_ball_dir"] = window_df["ball_angle"].mean()
 
     # 球场分布
     upper_half_frames = window_df[window_df["ball_v"] < 0.5]
@@ -0,0 +1,225 @@
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import AdaBoostClassifier, ExtraTreesClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import accuracy_score, f1_score, roc_auc_score
+from sklearn.model_selection import GroupKFold
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+from dataset_builder import load_goal_windows
+from forest_compiler import compile_forest
+
+# 各训练脚本使用的特征（与 RealTimePredictor 的 12 维输入一致）
+FEATURES = [
+    "ball_u", "ball_v", "ball_speed", "ball_angle",
+    "paddle1_u", "paddle1_v", "paddle1_speed", "paddle1_angle",
+    "paddle2_u", "paddle2_v", "paddle2_speed", "paddle2_angle",
+]
+
+# 进球前的时间窗 (before, after)，即 [goal - before, goal - after)
+WINDOWS = {
+    "0.2-0.4s": (0.4, 0.2),   # current.py
+    "0.5-1s": (1.0, 0.5),     # ml.py
+    "1-1.5s": (1.5, 1.0),     # XGBoost.py
+}
+
+# 模型族 -> (构造函数, 超参数网格)
+MODEL_GRID = {
+    "RandomForest": (RandomForestClassifier, {"n_estimators": [50, 100], "max_depth": [8, 12, None]}),
+    "ExtraTrees": (ExtraTreesClassifier, {"n_estimators": [100], "max_depth": [8, None]}),
+    "AdaBoost": (AdaBoostClassifier, {"n_estimators": [100], "learning_rate": [0.1, 0.5]}),
+    "LogisticRegression": (LogisticRegression, {"max_iter": [1000], "C": [0.1, 1.0]}),
+    "SVM": (SVC, {"probability": [True], "C": [1.0]}),
+    "MLP": (MLPClassifier, {"hidden_layer_sizes": [(64, 32)], "max_iter": [500]}),
+    "DecisionTree": (DecisionTreeClassifier, {"max_depth": [8, 28]}),
+    "KNN": (KNeighborsClassifier, {"n_neighbors": [5, 15]}),
+    "GaussianNB": (GaussianNB, {}),
+}
+
+try:
+    import xgboost as xgb
+    MODEL_GRID["XGBoost"] = (xgb.XGBClassifier, {
+        "n_estimators": [200], "max_depth": [5], "learning_rate": [0.05], "eval_metric": ["logloss"]})
+except ImportError:
+    pass
+
+# RealTimePredictor 通过 load_forest 加载，只支持随机森林类模型
+DEPLOYABLE = ("RandomForest", "ExtraTrees")
+
+_datasets = {}  # 子进程中的 {窗口名: (X, y, groups)}
+
+
+def load_datasets(csv_path, windows=WINDOWS):
+    """每个时间窗一个 (X, y, groups)。按比赛分组；只有一场比赛时按进球分组（同一进球的窗口不会跨折）"""
+    datasets = {}
+    for name, (before, after) in windows.items():
+        df = load_goal_windows(csv_path, before=before, after=after)
+        df = df.dropna(subset=FEATURES)
+        groups = df["game_id"].to_numpy()
+        if len(np.unique(groups)) < 2:
+            groups = df["goal_id"].to_numpy()
+        if len(np.unique(groups)) < 2:
+            raise ValueError(f"{csv_path} 在时间窗 {name} 内少于 2 组（比赛或进球），无法做分组交叉验证")
+        datasets[name] = (df[FEATURES].to_numpy(), df["scorer"].to_numpy().astype(int), groups)
+    return datasets
+
+
+def expand_grid(grid):
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def make_jobs(families=None, windows=WINDOWS):
+    families = families or list(MODEL_GRID)
+    return [(family, params, window)
+            for family in families
+            for params in expand_grid(MODEL_GRID[family][1])
+            for window in windows]
+
+
+def _init_worker(datasets):
+    global _datasets
+    _datasets = datasets
+
+
+def build_model(family, params):
+    factory = MODEL_GRID[family][0]
+    try:
+        return factory(random_state=42, **params)
+    except TypeError:  # KNN、GaussianNB 等没有 random_state
+        return factory(**params)
+
+
+def predict_latency(family, model, x, n=200):
+    """单帧推理延迟 (ms)。森林类模型按 RealTimePredictor 实际使用的编译版本计时"""
+    predictor = compile_forest(model) if family in DEPLOYABLE else model
+    predictor.predict_proba(x)
+    start = time.perf_counter()
+    for _ in range(n):
+        predictor.predict_proba(x)
+    return (time.perf_counter() - start) / n * 1000
+
+
+def run_job(family, params, window, n_splits=5):
+    """按比赛分组的交叉验证：返回平均指标、训练耗时与单帧预测延迟"""
+    X, y, groups = _datasets[window]
+    n_splits = min(n_splits, len(np.unique(groups)))
+    scores = {"accuracy": [], "f1": [], "auroc": [], "fit_sec": [], "latency_ms": []}
+    for train_idx, test_idx in GroupKFold(n_splits=n_splits).split(X, y, groups):
+        model = build_model(family, params)
+        start = time.perf_counter()
+        model.fit(X[train_idx], y[train_idx])
+        scores["fit_sec"].append(time.perf_counter() - start)
+
+        y_pred = model.predict(X[test_idx])
+        scores["accuracy"].append(accuracy_score(y[test_idx], y_pred))
+        scores["f1"].append(f1_score(y[test_idx], y_pred, zero_division=0))
+        if len(np.unique(y[test_idx])) == 2:
+            scores["auroc"].append(roc_auc_score(y[test_idx], model.predict_proba(X[test_idx])[:, 1]))
+        scores["latency_ms"].append(predict_latency(family, model, X[test_idx[:1]]))
+
+    result = {"family": family, "params": params, "window": window, "folds": n_splits,
+              "samples": len(y)}
+    for key, values in scores.items():
+        result[key] = float(np.mean(values)) if values else np.nan
+    return result
+
+
+def sweep(csv_path, output="sweep_results.csv", families=None, workers=None, n_splits=5):
+    datasets = load_datasets(csv_path)
+    for name, (X, y, groups) in datasets.items():
+        print(f"窗口 {name}: {len(y)} 个样本, {len(np.unique(groups))} 组")
+    jobs = make_jobs(families)
+
+    start_time = time.time()
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                             initializer=_init_worker, initargs=(datasets,)) as pool:
+        futures = [pool.submit(run_job, *job, n_splits) for job in jobs]
+        for job, future in zip(jobs, futures):
+            result = future.result()
+            results.append(result)
+            print(f"  {job[0]:18s} {job[2]:8s} {job[1]}  AUROC={result['auroc']:.4f}  "
+                  f"{result['latency_ms']:.3f} ms")
+
+    table = pd.DataFrame(results).sort_values("auroc", ascending=False).reset_index(drop=True)
+    table.to_csv(output, index=False)
+    print(f"共 {len(jobs)} 个任务, 用时 {time.time() - start_time:.1f}s -> {output}")
+    return table, datasets
+
+
+def retime_latency(table, datasets, latency_budget_ms, margin=4.0, n=200):
+    """进程池中其它进程同时在训练，latency_ms 含 CPU 争用。对延迟在 [预算 / margin, 预算 * margin] 内的候选，
+    在本进程中用全部数据重新训练并串行计时，覆盖 latency_ms（池中测得的值保留在 latency_pool_ms）"""
+    table = table.copy()
+    table["latency_pool_ms"] = table["latency_ms"]
+    near = table["latency_ms"].between(latency_budget_ms / margin, latency_budget_ms * margin)
+    for idx in table.index[near]:
+        row = table.loc[idx]
+        X, y, _ = datasets[row["window"]]
+        model = build_model(row["family"], row["params"])
+        model.fit(X, y)
+        table.at[idx, "latency_ms"] = predict_latency(row["family"], model, X[:1], n)
+    print(f"预算 {latency_budget_ms} ms 附近的 {int(near.sum())} 个候选已在本进程中串行重新计时")
+    return table
+
+
+def pick_best(table, latency_budget_ms, metric="auroc", families=None):
+    """延迟预算内 metric 最高的一行；families 限定可选的模型族"""
+    candidates = table[table["latency_ms"] <= latency_budget_ms]
+    if families is not None:
+        candidates = candidates[candidates["family"].isin(families)]
+    if len(candidates) == 0:
+        return None
+    return candidates.sort_values(metric, ascending=False).iloc[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程模型 / 超参数 / 时间窗扫描，按比赛分组交叉验证")
+    parser.add_argument("csv")
+    parser.add_argument("-o", "--output", default="sweep_results.csv")
+    parser.add_argument("--families", default=None, help="逗号分隔，默认全部：" + ",".join(MODEL_GRID))
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--latency-budget", type=float, default=1.0, help="单帧预测延迟上限 (ms)")
+    parser.add_argument("--save", default="random_forest_model.pkl",
+                        help="用全部数据重新训练预算内最好的森林模型并保存，供 RealTimePredictor 使用")
+    args = parser.parse_args()
+
+    families = args.families.split(",") if args.families else None
+    table, datasets = sweep(args.csv, args.output, families, args.workers, args.folds)
+    table = retime_latency(table, datasets, args.latency_budget)
+    table.to_csv(args.output, index=False)
+    print(table[["family", "params", "window", "auroc", "accuracy", "fit_sec", "latency_ms"]].head(10)
+          .to_string(index=False))
+
+    best = pick_best(table, args.latency_budget)
+    if best is not None:
+        print(f"\n预算 {args.latency_budget} ms 内最佳: {best['family']} {best['params']} "
+              f"{best['window']}  AUROC={best['auroc']:.4f}")
+
+    best = pick_best(table, args.latency_budget, families=DEPLOYABLE)
+    if best is None:
+        print(f"没有满足 {args.latency_budget} ms 预算的森林模型")
+        return
+    X, y, _ = datasets[best["window"]]
+    model = build_model(best["family"], best["params"])
+    model.fit(X, y)
+    joblib.dump(model, args.save)
+    compile_forest(model).save(os.path.splitext(args.save)[0] + ".npz")
+    print(f"✅ 部署模型 {best['family']} {best['params']} ({best['window']}) 已保存为 {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,615 @@
+import math
+import time
+from collections import defaultdict
+
+import cv2
+import numpy as np
+
+from kalman import KalmanTracker
+from hand_scheduler import HandScheduler, track_points_flow
+from schema import FEATURE_COLUMNS, normalize_columns, state_row
+
+
+def hsv_range(lower, upper):
+    return np.array(lower), np.array(upper)
+
+
+# 常用颜色区间
+RED_BALL_RANGES = [hsv_range([165, 110, 110], [180, 255, 255]), hsv_range([0, 120, 120], [8, 255, 255])]
+RED_RANGES = [hsv_range([0, 70, 70], [10, 255, 255]), hsv_range([170, 70, 70], [179, 255, 255])]
+RED_RANGES_STRICT = [hsv_range([0, 100, 100], [10, 255, 255]), hsv_range([170, 100, 100], [179, 255, 255])]
+BLUE_RANGES = [hsv_range([100, 150, 50], [140, 255, 255])]
+YELLOW_RANGES = [hsv_range([20, 100, 100], [40, 255, 255])]
+YELLOW_RANGES_NARROW = [hsv_range([20, 100, 100], [30, 255, 255])]
+
+
+class FieldDetector:
+    """打开视频源并确定球场四个角点（顺序：左上、右上、右下、左下）。
+
+    corner_mode:
+        "fixed"  按画面比例固定角点（顶部缩短、底部贴边）
+        "margin" 按固定边距设置角点
+        "gray"   用灰度阈值检测球场区域
+    """
+
+    def __init__(self, video_source, corner_mode="gray", gray_range=(200, 240), fps=None, rotate=None):
+        self.cap = cv2.VideoCapture(video_source)
+        if fps is not None:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+            print("实际帧率：", self.cap.get(cv2.CAP_PROP_FPS))
+
+        if not self.cap.isOpened():
+            raise IOError("无法打开摄像头或视频源")
+        self.corner_mode = corner_mode
+        self.gray_range = gray_range
+        self.rotate = rotate
+        self.corner_points = None
+
+    def detect_field(self):
+        if self.corner_mode == "gray":
+            return self.detect_field_once()
+
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        if self.rotate is not None:
+            frame = cv2.rotate(frame, self.rotate)
+
+        if self.corner_mode == "fixed":
+            self.corner_points = self._fixed_corners(frame)
+            print("✅ 使用固定角点（顶部缩短，底部贴边）")
+        else:
+            self.corner_points = self._margin_corners(frame)
+            print("已手动设置四个角点：", self.corner_points)
+        return frame
+
+    def _fixed_corners(self, frame):
+        h, w = frame.shape[:2]
+
+        # 顶部：居中、缩短
+        shrink_top_ratio = 0.65
+        top_width = int(w * shrink_top_ratio)
+        top_left_x = (w - top_width) // 2
+        top_right_x = top_left_x + top_width
+        top_y = int(h * 0.27)  # 顶部稍微向下
+
+        # 底部：贴边
+        bottom_y = h - 15
+        bottom_left_x = 50
+        bottom_right_x = w - 50
+
+        return np.array([[top_left_x, top_y], [top_right_x, top_y],
+                         [bottom_right_x, bottom_y], [bottom_left_x, bottom_y]], dtype=np.int32)
+
+    def _margin_corners(self, frame, margin_side=30, margin_bottom=20, margin_top=20):
+        h, w = frame.shape[:2]
+        # 沿用 data.py 的设定：角点按旋转前的画面方向计算
+        return np.array([[margin_side, margin_top], [h - margin_side, margin_top],
+                         [h - margin_side, w - margin_bottom], [margin_side, w - margin_bottom]], dtype=np.int32)
+
+    def detect_field_once(self):
+        lower_gray, upper_gray = self.gray_range
+        while True:
+            ret, frame = self.cap.read()
+            if not ret:
+                return None
+
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            mask = cv2.inRange(gray, lower_gray, upper_gray)
+            kernel = np.ones((5, 5), np.uint8)
+            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+            large = [cnt.reshape(-1, 2) for cnt in contours if cv2.contourArea(cnt) > 500]
+            if not large or sum(len(c) for c in large) < 4:
+                print("未找到足够的灰度点，按q退出或等待检测")
+                if cv2.waitKey(1) & 0xFF == ord('q'):
+                    return None
+                continue
+
+            all_points = np.concatenate(large)
+            sum_coords = all_points.sum(axis=1)
+            diff_coords = np.diff(all_points, axis=1).reshape(-1)
+
+            top_left = all_points[np.argmin(sum_coords)]
+            bottom_right = all_points[np.argmax(sum_coords)]
+            top_right = all_points[np.argmin(diff_coords)]
+            bottom_left = all_points[np.argmax(diff_coords)]
+
+            self.corner_points = np.array([top_left, top_right, bottom_right, bottom_left], dtype=np.int32)
+            print("检测到四个角点")
+            return frame
+
+    def draw_fixed_field(self, frame):
+        if self.corner_points is None:
+            return frame
+
+        # 画场地
+        cv2.polylines(frame, [self.corner_points], isClosed=True, color=(0, 255, 0), thickness=3)
+
+        labels = ["Top-Left", "Top-Right", "Bottom-Right", "Bottom-Left"]
+        for i, pt in enumerate(self.corner_points):
+            cv2.circle(frame, tuple(int(c) for c in pt), 5, (0, 0, 255), -1)
+            cv2.putText(frame, labels[i], (int(pt[0]) + 5, int(pt[1]) - 5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+
+        # 球门线（占32%居中）
+        TL, TR, BR, BL = self.corner_points
+        for start, end, name in [(TL, TR, "Top Goal"), (BL, BR, "Bottom Goal")]:
+            vec = (end - start).astype(np.float32)
+            length = np.linalg.norm(vec)
+            gate_len = length * 0.32
+            center = (start + end) / 2
+            direction = vec / length
+            gate_a = center - direction * (gate_len / 2)
+            gate_b = center + direction * (gate_len / 2)
+            cv2.line(frame, tuple(gate_a.astype(int)), tuple(gate_b.astype(int)), (255, 0, 0), 3)
+            cv2.putText(frame, name, tuple(center.astype(int)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 0, 0), 2)
+
+        return frame
+
+    def release(self):
+        self.cap.release()
+        cv2.destroyAllWindows()
+
+
+class FieldGeometry:
+    """像素坐标与归一化球场坐标 (u, v) 之间的透视变换，矩阵只计算一次"""
+
+    def __init__(self, corners):
+        self.set_corners(corners)
+
+    def set_corners(self, corners):
+        self.corners = np.asarray(corners)
+        TL, TR, BR, BL = self.corners
+        src_quad = np.array([TL, TR, BR, BL], dtype=np.float32)
+        dst_quad = np.array([[0, 0], [1, 0], [1, 1], [0, 1]], dtype=np.float32)
+        self.M = cv2.getPerspectiveTransform(src_quad, dst_quad)
+        self.M_inv = cv2.getPerspectiveTransform(dst_quad, src_quad)
+
+    def to_uv(self, pt):
+        uv = cv2.perspectiveTransform(np.array([[[pt[0], pt[1]]]], dtype=np.float32), self.M)
+        return uv[0, 0]
+
+    def to_px(self, uv):
+        px = cv2.perspectiveTransform(np.array([[[uv[0], uv[1]]]], dtype=np.float32), self.M_inv)
+        return px[0, 0]
+
+    def window_to_rect(self, window, shape, pad_px):
+        """把 uv 空间的搜索窗口 (中心, 半径) 映射为像素矩形 (x0, y0, x1, y1)"""
+        (u, v), r = window
+        pts = np.array([[[u - r, v - r]], [[u + r, v - r]], [[u + r, v + r]], [[u - r, v + r]]], dtype=np.float32)
+        px = cv2.perspectiveTransform(pts, self.M_inv).reshape(-1, 2)
+        h, w = shape[:2]
+        x0 = max(int(px[:, 0].min()) - pad_px, 0)
+        y0 = max(int(px[:, 1].min()) - pad_px, 0)
+        x1 = min(int(px[:, 0].max()) + pad_px, w)
+        y1 = min(int(px[:, 1].max()) + pad_px, h)
+        return x0, y0, x1, y1
+
+    def search_roi(self, filters, shape, pad_px):
+        """所有目标搜索窗口的并集；任一目标丢失则返回 None（全画面搜索）"""
+        rects = []
+        for f in filters:
+            window = f.search_window()
+            if window is None:
+                return None
+            rects.append(self.window_to_rect(window, shape, pad_px))
+        if not rects:
+            return None
+        x0 = min(r[0] for r in rects)
+        y0 = min(r[1] for r in rects)
+        x1 = max(r[2] for r in rects)
+        y1 = max(r[3] for r in rects)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return x0, y0, x1, y1
+
+
+def crop_roi(frame, roi):
+    """返回 (裁剪后的画面, HSV, 偏移)；roi 为 None 时用整幅画面"""
+    x0, y0 = 0, 0
+    if roi is not None:
+        x0, y0, x1, y1 = roi
+        frame = frame[y0:y1, x0:x1]
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    return frame, hsv, (x0, y0)
+
+
+def extract_color_objects(frame, hsv, ranges, offset=(0, 0), morph=False, min_area=0,
+                          min_radius=0, max_radius=None, min_circularity=0.0, check_red=False):
+    """在 HSV 画面中提取指定颜色的圆形物体，按面积降序返回 [(面积, (x, y), 半径, 轮廓)]，坐标加上 offset。"""
+    mask = None
+    for lower, upper in ranges:
+        m = cv2.inRange(hsv, lower, upper)
+        mask = m if mask is None else cv2.bitwise_or(mask, m)
+
+    if morph:
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        # 先闭操作填充物体间隙，再开操作去噪
+        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel, iterations=2)
+        mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel, iterations=1)
+
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    x0, y0 = offset
+    objects = []
+    for c in contours:
+        contour_area = cv2.contourArea(c)
+        if contour_area < min_area:
+            continue
+        (x, y), radius = cv2.minEnclosingCircle(c)
+        if radius < min_radius or (max_radius is not None and radius > max_radius):
+            continue
+        if min_circularity > 0:
+            circle_area = math.pi * radius * radius
+            if circle_area <= 0 or contour_area / circle_area < min_circularity:
+                continue
+        if check_red:
+            b, g, r = frame[int(y), int(x)]
+            if r < 80 or r < g or r < b:
+                continue
+        objects.append((contour_area, (x + x0, y + y0), radius, c + (x0, y0)))
+
+    objects.sort(key=lambda o: -o[0])
+    return objects
+
+
+class Detection:
+    """检测器的单帧输出：像素坐标 + 归一化坐标；measured 表示本帧是否为真实观测"""
+
+    def __init__(self):
+        self.ball_uv = None
+        self.ball_px = None
+        self.ball_radius = None
+        self.paddle_uvs = [None, None]
+        self.paddle_px = [None, None]
+        self.paddle_radii = [None, None]
+        self.hands = []  # 供调用方绘制的手部关键点
+
+
+class HSVContourDetector:
+    """按颜色阈值检测球和拍子：球取面积最大的候选，拍子按 split_axis 分左右/上下两半各取最大。"""
+
+    name = "hsv"
+
+    def __init__(self, ball_ranges, paddle_ranges=None, split_axis=1,
+                 ball_min_radius=0, ball_max_radius=None, use_windows=True):
+        self.ball_ranges = ball_ranges
+        self.paddle_ranges = paddle_ranges
+        self.split_axis = split_axis
+        self.ball_min_radius = ball_min_radius
+        self.ball_max_radius = ball_max_radius
+        self.use_windows = use_windows
+
+    def detect(self, frame, engine):
+        det = Detection()
+        targets = [engine.ball_filter]
+        if self.paddle_ranges is not None:
+            targets += engine.paddle_filters
+        roi = engine.geometry.search_roi(targets, frame.shape, engine.search_pad_px) if self.use_windows else None
+        crop, hsv, offset = crop_roi(frame, roi)
+
+        balls = extract_color_objects(crop, hsv, self.ball_ranges, offset,
+                                      min_radius=self.ball_min_radius, max_radius=self.ball_max_radius)
+        for area, (x, y), radius, c in balls:
+            uv = engine.geometry.to_uv((x, y))
+            if engine.ball_filter.gate(uv):
+                det.ball_uv, det.ball_px, det.ball_radius = uv, (x, y), radius
+                break
+
+        if self.paddle_ranges is not None:
+            paddles = extract_color_objects(crop, hsv, self.paddle_ranges, offset)
+            for area, (x, y), radius, c in paddles:
+                uv = engine.geometry.to_uv((x, y))
+                i = 0 if uv[self.split_axis] < 0.5 else 1
+                if det.paddle_uvs[i] is not None or not engine.paddle_filters[i].gate(uv):
+                    continue
+                det.paddle_uvs[i], det.paddle_px[i], det.paddle_radii[i] = uv, (x, y), radius
+                if det.paddle_uvs[0] is not None and det.paddle_uvs[1] is not None:
+                    break
+        return det
+
+
+class HandLandmarkDetector:
+    """用 MediaPipe 手部关键点定位拍子（拇指、食指、中指指尖的中点），按手腕 u 坐标分左右。
+
+    手部模型由 HandScheduler 降频运行，间隔帧用光流跟踪上一帧的拍子位置。
+    """
+
+    name = "hands"
+
+    def __init__(self, hands, frame_budget=1 / 30, max_interval=6):
+        self.hands = hands
+        self.scheduler = HandScheduler(hands, frame_budget=frame_budget, max_interval=max_interval)
+        self.prev_gray = None
+        self.prev_paddle_px = [None, None]
+
+    def detect(self, frame, engine):
+        det = Detection()
+        h, w = frame.shape[:2]
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        hands_result = self.scheduler.process(frame)  # 本帧跳过时为 None
+
+        if hands_result is None:
+            # 本帧未运行手部模型：用光流跟踪上一帧的拍子像素位置
+            flow_centers = track_points_flow(self.prev_gray, gray, self.prev_paddle_px)
+            for i in [0, 1]:
+                if flow_centers[i] is None:
+                    continue
+                uv = engine.geometry.to_uv(flow_centers[i])
+                if 0 <= uv[0] <= 1 and 0 <= uv[1] <= 1 and engine.paddle_filters[i].gate(uv):
+                    det.paddle_uvs[i], det.paddle_px[i] = uv, flow_centers[i]
+
+        for hand_landmarks in hands_result or []:
+            # 至少有一个关键点落在球场内才视为有效的手
+            if not any(0 <= uv[0] <= 1 and 0 <= uv[1] <= 1
+                       for uv in (engine.geometry.to_uv((int(lm.x * w), int(lm.y * h)))
+                                  for lm in hand_landmarks.landmark)):
+                continue
+            det.hands.append(hand_landmarks)
+
+            wrist_lm = hand_landmarks.landmark[0]
+            wrist_u = engine.geometry.to_uv((int(wrist_lm.x * w), int(wrist_lm.y * h)))[0]
+            i = 0 if wrist_u < 0.5 else 1
+            if det.paddle_uvs[i] is not None:
+                continue
+
+            # 拇指尖(4)、食指尖(8)、中指尖(12)的中点
+            tips = [hand_landmarks.landmark[k] for k in (8, 4, 12)]
+            x_m = int(sum(lm.x for lm in tips) / 3 * w)
+            y_m = int(sum(lm.y for lm in tips) / 3 * h)
+            uv_m = engine.geometry.to_uv((x_m, y_m))
+            if engine.paddle_filters[i].gate(uv_m):
+                det.paddle_uvs[i], det.paddle_px[i] = uv_m, (x_m, y_m)
+
+        self.prev_gray = gray
+        self.prev_paddle_px = list(det.paddle_px)
+        return det
+
+    def report_frame_time(self, elapsed):
+        self.scheduler.report_frame_time(elapsed)
+
+
+class HybridDetector:
+    """手部关键点定位拍子，红色轮廓作为拍子的后备并用于检测球（cv.py 的检测逻辑）。"""
+
+    name = "hybrid"
+
+    def __init__(self, hands, ball_ranges=RED_BALL_RANGES, frame_budget=1 / 30, max_history_len=15,
+                 min_dist_to_paddle=20):
+        self.hand_detector = HandLandmarkDetector(hands, frame_budget=frame_budget)
+        self.ball_ranges = ball_ranges
+        self.max_history_len = max_history_len  # 轮廓拍子位置取最近15帧平均（大概0.5秒）
+        self.paddle_history = [[], []]
+        self.min_dist_to_paddle = min_dist_to_paddle  # 球与拍子的最小距离（像素），防止把拍子附近物体当成球
+
+    def smooth_uv(self, history, new_uv):
+        history.append(new_uv)
+        if len(history) > self.max_history_len:
+            history.pop(0)
+        avg_u = sum(pt[0] for pt in history) / len(history)
+        avg_v = sum(pt[1] for pt in history) / len(history)
+        return np.array([avg_u, avg_v], dtype=np.float32)
+
+    def detect(self, frame, engine):
+        det = self.hand_detector.detect(frame, engine)
+
+        # 红色物体只在窗口并集内检测：球 + 未被手部检测到的拍子
+        targets = [engine.ball_filter] + [engine.paddle_filters[i] for i in (0, 1) if det.paddle_uvs[i] is None]
+        roi = engine.geometry.search_roi(targets, frame.shape, engine.search_pad_px)
+        crop, hsv, offset = crop_roi(frame, roi)
+        red_objects = extract_color_objects(crop, hsv, self.ball_ranges, offset, morph=True, min_area=150,
+                                            min_radius=10, max_radius=100, min_circularity=0.4, check_red=True)
+        used_indices = set()
+
+        for idx, (area, (x, y), radius, contour) in enumerate(red_objects):
+            if radius > 40:
+                continue
+            uv = engine.geometry.to_uv((x, y))
+            if not (0 <= uv[0] <= 1 and 0 <= uv[1] <= 1):
+                continue
+            i = 0 if uv[0] < 0.5 else 1
+            if det.paddle_uvs[i] is None:
+                det.paddle_uvs[i] = self.smooth_uv(self.paddle_history[i], uv)
+                det.paddle_px[i] = (x, y)
+                used_indices.add(idx)
+
+        # 球：两个拍子都确定后，取最大的、远离拍子且符合预测的红色物体
+        if det.paddle_uvs[0] is not None and det.paddle_uvs[1] is not None:
+            for idx, (area, (x, y), radius, contour) in enumerate(red_objects):
+                if idx in used_indices or radius > 30:
+                    continue
+                if any(p is not None and math.hypot(x - p[0], y - p[1]) < self.min_dist_to_paddle
+                       for p in det.paddle_px):
+                    continue
+                uv = engine.geometry.to_uv((x, y))
+                if not engine.ball_filter.gate(uv):
+                    continue  # 偏离预测位置太远，视为误检
+                det.ball_uv, det.ball_px, det.ball_radius = uv, (x, y), radius
+                break
+
+        self.hand_detector.prev_paddle_px = list(det.paddle_px)
+        return det
+
+    def report_frame_time(self, elapsed):
+        self.hand_detector.report_frame_time(elapsed)
+
+
+class GoalZone:
+    """根据球的位置判定进球：球在 axis 方向到达边缘且另一方向落在球门区间内。
+
+    到达低端（< edge）记为 player 2 得分，到达高端（> 1 - edge）记为 player 1 得分。
+    """
+
+    def __init__(self, axis=1, band=(0.3, 0.7), edge=0.05, cooldown=3.0):
+        self.axis = axis
+        self.band = band
+        self.edge = edge
+        self.cooldown = cooldown
+        self.last_goal_time = 0
+
+    def check(self, ball_uv, timestamp):
+        if ball_uv is None:
+            return 0
+        across = ball_uv[1 - self.axis]
+        along = ball_uv[self.axis]
+        if not (self.band[0] < across < self.band[1]):
+            return 0
+        if timestamp - self.last_goal_time <= self.cooldown:
+            return 0
+        if along < self.edge:
+            scorer = 2
+        elif along > 1 - self.edge:
+            scorer = 1
+        else:
+            return 0
+        self.last_goal_time = timestamp
+        return scorer
+
+
+class TrackingEngine:
+    """统一的追踪引擎：滤波预测 -> 检测器检测 -> 状态更新，输出 FRAME_COLUMNS 格式的一帧数据。
+
+    检测器可替换（HSVContourDetector / HandLandmarkDetector / HybridDetector），
+    逐阶段耗时记录在 stage_totals 中，供 bench_tracking.py 统计。
+    """
+
+    def __init__(self, corners, detector, goal_zone=None, search_pad_px=40, default_dt=0.033):
+        self.geometry = FieldGeometry(corners)
+        self.detector = detector
+        self.goal_zone = goal_zone
+        self.search_pad_px = search_pad_px  # 搜索窗口外扩像素（覆盖拍子/球半径）
+        self.default_dt = default_dt
+
+        # 球和两个拍子的状态估计：预测下一帧位置，只在小窗口内检测
+        self.ball_filter = KalmanTracker(process_noise=30.0, bounce=True)
+        self.paddle_filters = [KalmanTracker(process_noise=60.0, bounce=False, max_misses=8) for _ in range(2)]
+
+        self.prev_time = None
+        self.prev_speeds = [None, None, None]  # ball, paddle1, paddle2
+
+        self.in_goal = 0
+        self.scorer = 0
+        self.round_id = 1
+        self.game_id = 1
+
+        self.frames = 0
+        self.detected_counts = [0, 0, 0]
+        self.stage_totals = defaultdict(float)
+
+    @property
+    def corners(self):
+        return self.geometry.corners
+
+    def set_game_state(self, in_goal=None, scorer=None, round_id=None, game_id=None):
+        if in_goal is not None:
+            self.in_goal = int(in_goal)
+        if scorer is not None:
+            self.scorer = scorer
+        if round_id is not None:
+            self.round_id = round_id
+        if game_id is not None:
+            self.game_id = game_id
+
+    def reset(self):
+        self.ball_filter.reset()
+        for f in self.paddle_filters:
+            f.reset()
+        self.prev_time = None
+        self.prev_speeds = [None, None, None]
+
+    def process(self, frame, timestamp=None):
+        """处理一帧，返回状态字典：FRAME_COLUMNS 各列 + ball_px / paddle_px / hands 等绘制信息"""
+        t_start = time.perf_counter()
+        if timestamp is None:
+            timestamp = time.time()
+        dt = timestamp - self.prev_time if self.prev_time else self.default_dt
+
+        self.ball_filter.predict(dt)
+        for f in self.paddle_filters:
+            f.predict(dt)
+
+        t_detect = time.perf_counter()
+        det = self.detector.detect(frame, self)
+        t_estimate = time.perf_counter()
+
+        state = self._estimate(det, timestamp, dt)
+        t_end = time.perf_counter()
+
+        self.stage_totals["predict"] += t_detect - t_start
+        self.stage_totals["detect"] += t_estimate - t_detect
+        self.stage_totals["estimate"] += t_end - t_estimate
+        self.frames += 1
+        if hasattr(self.detector, "report_frame_time"):
+            self.detector.report_frame_time(t_end - t_start)
+        return state
+
+    def _estimate(self, det, timestamp, dt):
+        filters = [self.ball_filter] + self.paddle_filters
+        measured = [det.ball_uv] + det.paddle_uvs
+        positions = []
+        motions = []
+        for k, (f, uv) in enumerate(zip(filters, measured)):
+            # 有观测则更新；否则记一次丢失，未彻底丢失时用预测值补齐
+            if uv is not None:
+                pos = f.update(uv)
+                self.detected_counts[k] += 1
+            else:
+                f.miss()
+                pos = f.position if not f.lost else None
+
+            if pos is not None and f.initialized:
+                speed, angle = f.speed, f.angle
+                prev_speed = self.prev_speeds[k]
+                acc = (speed - prev_speed) / dt if prev_speed is not None and dt > 0 else None
+            else:
+                speed = angle = acc = None
+            self.prev_speeds[k] = speed
+            positions.append(None if pos is None else (float(pos[0]), float(pos[1])))
+            motions.append((speed, acc, angle))
+        self.prev_time = timestamp
+
+        ball, p1, p2 = positions
+
+        def dist(a, b):
+            return math.hypot(a[0] - b[0], a[1] - b[1]) if a is not None and b is not None else None
+
+        if self.goal_zone is not None:
+            scorer = self.goal_zone.check(ball, timestamp)
+            self.in_goal = int(scorer != 0)
+            self.scorer = scorer
+
+        state = {"timestamp": timestamp}
+        for name, pos, (speed, acc, angle) in zip(["ball", "paddle1", "paddle2"], positions, motions):
+            state[f"{name}_u"] = pos[0] if pos is not None else None
+            state[f"{name}_v"] = pos[1] if pos is not None else None
+            state[f"{name}_speed"] = speed
+            state[f"{name}_acc"] = acc
+            state[f"{name}_angle"] = angle
+        state["dist_ball_paddle1"] = dist(ball, p1)
+        state["dist_ball_paddle2"] = dist(ball, p2)
+        state["dist_paddle1_paddle2"] = dist(p1, p2)
+        # 沿用 monitor.py 的定义（LSTM 模型按此训练）
+        state["dist_ball_goal"] = ball[0] if ball is not None else None
+        state["in_goal"] = self.in_goal
+        state["scorer"] = self.scorer
+        state["round_id"] = self.round_id
+        state["game_id"] = self.game_id
+
+        state["ball_px"] = det.ball_px
+        state["ball_radius_px"] = det.ball_radius
+        state["paddle_px"] = det.paddle_px
+        state["paddle_radii_px"] = det.paddle_radii
+        state["hands"] = det.hands
+        state["detected"] = [m is not None for m in measured]
+        return state
+
+    def stage_report(self):
+        """各阶段平均耗时（毫秒）与检测率"""
+        n = max(self.frames, 1)
+        report = {f"{k}_ms": v * 1000 / n for k, v in self.stage_totals.items()}
+        for name, count in zip(["ball", "paddle1", "paddle2"], self.detected_counts):
+            report[f"{name}_detect_rate"] = count / n
+        return report
+
@@ -1,14 +1,13 @@
-import pandas as pd
-import numpy as np
 import torch
 from torch.utils.data import Dataset, DataLoader, random_split
 import torch.nn as nn
 import torch.optim as optim
 from model import LSTMClassifier
+from dataset_builder import load_goal_sequences
 
 class ScoreSequenceDataset(Dataset):
     def __init__(self, csv_path, window_sec=2.0):
-        self.df = pd.read_csv(csv_path)
+        self.csv_path = csv_path
         self.window_sec = window_sec
         self.feature_cols = [
             "ball_u", "ball_v", "ball_speed", "ball_angle",
@@ -21,24 +20,10 @@ class ScoreSequenceDataset(Dataset):
         self.prepare_samples()
 
     def prepare_samples(self):
-        df = self.df
-        scorer_rows = df[df['scorer'] != 0].index.tolist()
-
-        for idx in scorer_rows:
-            score_time = df.loc[idx, 'timestamp']
-            scorer = int(df.loc[idx, 'scorer']) - 1  # 标签0或1
-
-            window_start_time = score_time - 2
-            window_end_time = score_time -0.2
-            window_df = df[(df['timestamp'] >= window_start_time) & (df['timestamp'] < window_end_time)]
-            window_df = window_df.dropna(subset=self.feature_cols)
-
-            if len(window_df) == 0:
-                continue
-
-            data = window_df[self.feature_cols].values.astype(np.float32)
-            self.samples.append(torch.tensor(data))
-            self.labels.append(scorer)
+        # 每次得分前 [window_sec, 0.2) 秒内去掉缺失值的帧，标签0或1
+        sequences, self.labels = load_goal_sequences(self.csv_path, self.feature_cols,
+                                                     before=self.window_sec, after=0.2)
+        self.samples = [torch.from_numpy(seq) for seq in sequences]
 
     def __len__(self):
         return len(self.samples)
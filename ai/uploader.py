@@ -0,0 +1,210 @@
+import json
+import os
+import random
+import threading
+import time
+import uuid
+
+import requests
+
+
+class AnalysisUploader:
+    """后台线程把分析结果 POST 到后端，追踪循环只调用 submit()，不等待网络。
+
+    - 复用同一个 requests.Session（keep-alive 连接池），每次请求带超时；
+    - 待发送的结果先追加到磁盘上的 JSONL outbox，程序重启后继续发送，
+      最多保留 max_items 条（超出时丢弃最旧的）；
+    - 发送失败（连接错误、超时、5xx）按指数退避重试，4xx 视为数据问题直接丢弃；
+    - 同一个 key（如同一局同一回合）尚未发出的旧结果被新结果替换，
+      每次唤醒把积压的结果在同一连接上依次发出。
+    """
+
+    def __init__(self, base_url, outbox_path="upload_outbox.jsonl", max_items=1000, timeout=3.0,
+                 max_backoff=30.0, batch_size=20):
+        self.base_url = base_url.rstrip("/")
+        self.outbox_path = outbox_path
+        self.max_items = max_items
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.batch_size = batch_size
+
+        self.session = requests.Session()
+        self.pending = []  # [{"id", "endpoint", "payload", "key"}]，按提交顺序
+        self.cond = threading.Condition()
+        self.closed = False
+        self.sent = 0
+        self.failures = 0
+        self.dropped = 0
+
+        self._load_outbox()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def _load_outbox(self):
+        if not os.path.exists(self.outbox_path):
+            return
+        items = {}
+        with open(self.outbox_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except json.JSONDecodeError:  # 上次退出时写了一半的行
+                    continue
+                items[item["id"]] = item
+        for item in items.values():
+            self._enqueue(item)
+        if self.pending:
+            print(f"outbox 中有 {len(self.pending)} 条未发送的结果，继续发送")
+        self._compact()
+
+    def _enqueue(self, item):
+        # 调用方需持有 cond（或在后台线程启动前调用）
+        if item.get("key") is not None:
+            for k, old in enumerate(self.pending):
+                if old.get("key") == item["key"]:
+                    del self.pending[k]
+                    break
+        self.pending.append(item)
+        if len(self.pending) > self.max_items:
+            self.pending.pop(0)
+            self.dropped += 1
+
+    def _compact(self):
+        # 只保留未发送的结果，原子替换
+        tmp = self.outbox_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for item in self.pending:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+        os.replace(tmp, self.outbox_path)
+
+    def submit(self, endpoint, payload, key=None):
+        """加入发送队列并立即返回；key 相同的未发送结果只保留最新一条"""
+        item = {"id": uuid.uuid4().hex, "endpoint": endpoint, "payload": payload, "key": key}
+        with self.cond:
+            self._enqueue(item)
+            with open(self.outbox_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(item, ensure_ascii=False) + "\n")
+            self.cond.notify()
+
+    def _post(self, item):
+        """返回 True 表示可以从 outbox 删除（成功或不可重试的错误）"""
+        try:
+            response = self.session.post(self.base_url + item["endpoint"], json=item["payload"],
+                                         timeout=self.timeout)
+        except requests.RequestException as e:
+            print(f"上传 {item['endpoint']} 失败：{e}")
+            return False
+        if response.status_code >= 500:
+            print(f"上传 {item['endpoint']} 失败：HTTP {response.status_code}")
+            return False
+        if response.status_code >= 400:
+            print(f"上传 {item['endpoint']} 被拒绝：HTTP {response.status_code}，丢弃")
+            self.dropped += 1
+        return True
+
+    def _send_batch(self):
+        """发送积压的最多 batch_size 条，遇到可重试的失败即停止；返回是否全部成功"""
+        with self.cond:
+            batch = self.pending[:self.batch_size]
+        done = set()
+        ok = True
+        for item in batch:
+            if not self._post(item):
+                ok = False
+                break
+            done.add(item["id"])
+        with self.cond:
+            self.pending = [item for item in self.pending if item["id"] not in done]
+            self.sent += len(done)
+            self._compact()
+        return ok
+
+    def _run(self):
+        backoff = 0.0
+        while True:
+            with self.cond:
+                while not self.pending and not self.closed:
+                    self.cond.wait()
+                if self.closed:
+                    break
+            if self._send_batch():
+                backoff = 0.0
+                continue
+            self.failures += 1
+            backoff = min(self.max_backoff, max(0.5, backoff * 2))
+            with self.cond:
+                # 退避期间 close() 可以打断等待
+                self.cond.wait_for(lambda: self.closed, timeout=backoff * random.uniform(0.5, 1.0))
+
+    def drain(self, timeout=5.0):
+        """等待队列发送完毕（最多 timeout 秒），返回剩余条数"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self.cond:
+                if not self.pending:
+                    return 0
+            time.sleep(0.05)
+        with self.cond:
+            return len(self.pending)
+
+    def close(self, timeout=5.0):
+        """尽量在 timeout 秒内发完，剩余的留在 outbox 中下次启动再发"""
+        remaining = self.drain(timeout)
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+        self.session.close()
+        if remaining:
+            print(f"仍有 {remaining} 条结果未发送，已保存在 {self.outbox_path}")
+
+
+if __name__ == "__main__":
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    # 本地模拟后端：前 3 次请求返回 503，之后正常；统计收到的回合
+    received = []
+    state = {"calls": 0}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            state["calls"] += 1
+            code = 503 if state["calls"] <= 3 else 200
+            if code == 200:
+                received.append(json.loads(body))
+            self.send_response(code)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    outbox = os.path.join(tempfile.mkdtemp(), "outbox.jsonl")
+
+    uploader = AnalysisUploader(f"http://127.0.0.1:{server.server_port}", outbox, max_backoff=0.5)
+    start = time.perf_counter()
+    for rid in range(1, 31):
+        uploader.submit("/analysis/round/new", {"gid": 1, "rid": rid}, key=f"round:1:{rid}")
+    uploader.submit("/analysis/round/new", {"gid": 1, "rid": 30, "A_type": "更新"}, key="round:1:30")
+    t_submit = (time.perf_counter() - start) / 31
+    uploader.close(timeout=10)
+    server.shutdown()
+
+    assert [r["rid"] for r in received] == list(range(1, 31)), received
+    assert received[-1].get("A_type") == "更新"
+    print(f"submit {t_submit * 1e6:.0f} us/次；{uploader.failures} 次失败后全部送达，"
+          f"共 {state['calls']} 次请求，outbox 剩余 {os.path.getsize(outbox)} 字节")
+
+    # 后端不可用：结果保留在 outbox，重启后继续发送
+    uploader = AnalysisUploader("http://127.0.0.1:9", outbox, timeout=0.2, max_backoff=0.2)
+    uploader.submit("/analysis/game/new", {"gid": 1}, key="game:1")
+    uploader.close(timeout=0.5)
+    restarted = AnalysisUploader("http://127.0.0.1:9", outbox, timeout=0.2)
+    assert [item["payload"] for item in restarted.pending] == [{"gid": 1}]
+    restarted.close(timeout=0)